@@ -9,31 +9,13 @@ export default function AnalysisProgress({ sessionId, onComplete, onError }) {
   const [message, setMessage] = useState("Starting analysis...");
   const [error, setError] = useState(null);
   const [polling, setPolling] = useState(true);
+  // Server-Sent Events push every progress change; polling is the fallback if the stream fails.
+  const [streaming, setStreaming] = useState(typeof window !== "undefined" && "EventSource" in window);
 
   useEffect(() => {
     if (!sessionId || !polling) return;
 
-    const pollProgress = async () => {
-      try {
-        const token = localStorage.getItem("token");
-        if (!token) {
-          setPolling(false);
-          return;
-        }
-
-        const res = await fetch(`http://localhost:5000/session/${sessionId}/progress`, {
-          headers: {
-            Authorization: `Bearer ${token}`,
-            "Content-Type": "application/json"
-          }
-        });
-
-        if (!res.ok) {
-          throw new Error("Failed to fetch progress");
-        }
-
-        const data = await res.json();
-
+    const applyProgress = (data) => {
         // Check for failure FIRST (even if status is still "processing")
         // This handles cases where DB update is slightly delayed
         if (data.status === "failed" || data.error) {
@@ -66,11 +48,23 @@ export default function AnalysisProgress({ sessionId, onComplete, onError }) {
           return; // Stop processing, don't update other state
         }
 
+        if (data.status === "cancelled") {
+          setPolling(false);
+          setStatus("failed");
+          setProgress(0);
+          setError("Analysis was cancelled.");
+          setMessage("Analysis was cancelled.");
+          if (onError) {
+            onError("Analysis was cancelled.");
+          }
+          return;
+        }
+
         const raw = data.progress;
         const nextProgress = typeof raw === "number" ? raw : Number.parseFloat(raw);
         setProgress(Number.isFinite(nextProgress) ? nextProgress : 0);
         const statusValue = data.status || "unknown";
-        setStatus(statusValue === "processing" ? "running" : statusValue); // Map processing to running for UI
+        setStatus(statusValue === "processing" || statusValue === "queued" ? "running" : statusValue); // Map processing/queued to running for UI
         setMessage(data.message || "");
         setError(null); // Clear error if no error in response
 
@@ -102,7 +96,86 @@ export default function AnalysisProgress({ sessionId, onComplete, onError }) {
         if (statusValue === "not_started") {
           setPolling(false);
         }
+    };
+
+    const token = localStorage.getItem("token");
+    if (!token) {
+      setPolling(false);
+      return;
+    }
+
+    if (streaming) {
+      let source = null;
+      let closed = false;
+
+      // EventSource cannot send an Authorization header, so the stream URL carries a
+      // short-lived stream token for this session, never the login token.
+      const openStream = async () => {
+        try {
+          const res = await fetch(`http://localhost:5000/session/${sessionId}/progress/stream-token`, {
+            method: "POST",
+            headers: {
+              Authorization: `Bearer ${token}`,
+              "Content-Type": "application/json"
+            }
+          });
+          if (!res.ok) {
+            throw new Error("Failed to get progress stream token");
+          }
+          const { stream_token: streamToken, expires_in: expiresIn } = await res.json();
+          if (closed) return;
+
+          const expiresAt = Date.now() + (expiresIn || 0) * 1000;
+          const stream = new EventSource(
+            `http://localhost:5000/session/${sessionId}/progress/stream?stream_token=${encodeURIComponent(streamToken)}`
+          );
+          source = stream;
+          stream.addEventListener("progress", (event) => {
+            try {
+              applyProgress(JSON.parse(event.data));
+            } catch (err) {
+              console.error("Progress stream parse error:", err);
+            }
+          });
+          stream.onerror = () => {
+            // The browser reconnects on its own unless the server refused the stream.
+            if (stream.readyState !== EventSource.CLOSED || closed) return;
+            if (Date.now() >= expiresAt) {
+              // Refused because the stream token expired: get a new one and keep streaming.
+              openStream();
+            } else {
+              setStreaming(false);
+            }
+          };
+        } catch (err) {
+          console.error("Progress stream error:", err);
+          if (!closed) setStreaming(false);
+        }
+      };
+
+      openStream();
+      return () => {
+        closed = true;
+        if (source) source.close();
+      };
+    }
+
+    const pollProgress = async () => {
+      try {
+        // ETag revalidation: unchanged progress comes back as 304 and is served from the browser cache.
+        const res = await fetch(`http://localhost:5000/session/${sessionId}/progress`, {
+          headers: {
+            Authorization: `Bearer ${token}`,
+            "Content-Type": "application/json"
+          },
+          cache: "no-cache"
+        });
+
+        if (!res.ok) {
+          throw new Error("Failed to fetch progress");
+        }
 
+        applyProgress(await res.json());
       } catch (err) {
         console.error("Progress polling error:", err);
         // Don't stop polling on network errors, just log
@@ -114,7 +187,7 @@ export default function AnalysisProgress({ sessionId, onComplete, onError }) {
     const interval = setInterval(pollProgress, 3000);
 
     return () => clearInterval(interval);
-  }, [sessionId, polling, onComplete, onError]);
+  }, [sessionId, polling, streaming, onComplete, onError]);
 
   // Don't render if not started
   if (status === "not_started") {
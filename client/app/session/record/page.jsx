@@ -212,7 +212,7 @@ const RecordPage = () => {
               router.push("/my-videos");
             }, 1000);
           } else {
-            toast.warning("✅ Saved to device, but upload failed.");
+            toast.warning(data?.error ? `✅ Saved to device, but upload failed: ${data.error}` : "✅ Saved to device, but upload failed.");
           }
         } catch (uploadError) {
           console.error("Upload error:", uploadError);
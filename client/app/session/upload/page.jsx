@@ -6,6 +6,60 @@ import { Upload, X, FileVideo, CheckCircle2, AlertCircle, Sparkles } from "lucid
 import { ToastContainer, toast } from "react-toastify";
 import "react-toastify/dist/ReactToastify.css";
 
+const API_URL = "http://localhost:5000";
+const MAX_CHUNK_RETRIES = 5;
+
+// Resumable upload: init, PUT chunks in order (after a dropped connection, continue from the
+// server's offset), then finalize. Resolves with the finalize response.
+async function uploadInChunks(file, token, title, onProgress) {
+  const auth = { Authorization: `Bearer ${token}` };
+  const initRes = await fetch(`${API_URL}/session/upload/init`, {
+    method: "POST",
+    headers: { ...auth, "Content-Type": "application/json" },
+    body: JSON.stringify({ filename: file.name, size: file.size, title: title || null }),
+  });
+  const init = await initRes.json();
+  if (!initRes.ok) throw new Error(init?.error || "Upload failed");
+
+  const uploadUrl = `${API_URL}/session/upload/${init.upload_id}`;
+  let offset = init.offset;
+  let failures = 0;
+  while (offset < file.size) {
+    const end = Math.min(offset + init.chunk_size, file.size);
+    let res = null;
+    try {
+      res = await fetch(uploadUrl, {
+        method: "PUT",
+        headers: { ...auth, "Content-Range": `bytes ${offset}-${end - 1}/${file.size}` },
+        body: file.slice(offset, end),
+      });
+    } catch (err) {
+      res = null; // network error: resume below
+    }
+    if (res && (res.ok || res.status === 409)) {
+      offset = (await res.json()).offset; // 409: the server already has a different offset
+      failures = 0;
+      onProgress(Math.round((offset / file.size) * 100));
+      continue;
+    }
+    if (res && res.status < 500) {
+      const data = await res.json().catch(() => ({}));
+      throw new Error(data?.error || "Upload failed");
+    }
+    if (++failures > MAX_CHUNK_RETRIES) throw new Error("Upload interrupted. Check your connection and try again.");
+    await new Promise((resolve) => setTimeout(resolve, 1000 * failures));
+    try {
+      const status = await fetch(uploadUrl, { headers: auth });
+      if (status.ok) offset = (await status.json()).offset;
+    } catch (err) {
+      // still offline: retry the same chunk
+    }
+  }
+
+  const finalRes = await fetch(`${uploadUrl}/finalize`, { method: "POST", headers: auth });
+  return { status: finalRes.status, data: await finalRes.json() };
+}
+
 export default function UploadPage() {
   const [file, setFile] = useState(null);
   const [title, setTitle] = useState("");
@@ -24,8 +78,8 @@ export default function UploadPage() {
       toast.error("Only MP4 and WebM files are allowed.");
       return;
     }
-    if (selected.size > 100 * 1024 * 1024) { // Increased to 100MB for flexibility
-      toast.error("Maximum size allowed is 100 MB.");
+    if (selected.size > 1024 * 1024 * 1024) { // Server default UPLOAD_MAX_MB
+      toast.error("Maximum size allowed is 1 GB.");
       return;
     }
 
@@ -43,46 +97,14 @@ export default function UploadPage() {
       const token = localStorage.getItem("token");
       if (!token) return toast.error("No auth token found");
 
-      const form = new FormData();
-      form.append("file", file);
-      if (title.trim()) {
-        form.append("title", title.trim());
+      const { status, data } = await uploadInChunks(file, token, title.trim(), setUploadProgress);
+      if (status !== 201) {
+        toast.error(data?.error || "Upload failed");
+      } else {
+        toast.success("Uploaded Successfully!");
+        setTimeout(() => router.push("/my-videos"), 1500);
       }
-
-      const xhr = new XMLHttpRequest();
-      xhr.open("POST", "http://localhost:5000/session/upload");
-
-      // ✅ Only set Authorization, DO NOT set Content-Type manually
-      xhr.setRequestHeader("Authorization", `Bearer ${token}`);
-
-      xhr.upload.onprogress = (event) => {
-        if (event.lengthComputable) {
-          const percent = Math.round((event.loaded / event.total) * 100);
-          setUploadProgress(percent);
-        }
-      };
-
-      xhr.onload = () => {
-        try {
-          const data = JSON.parse(xhr.responseText);
-          if (xhr.status !== 201) {
-            toast.error(data?.error || "Upload failed");
-          } else {
-            toast.success("Uploaded Successfully!");
-            setTimeout(() => router.push("/my-videos"), 1500);
-          }
-        } catch (err) {
-          toast.error("Upload failed: Invalid response");
-        }
-        setLoading(false);
-      };
-
-      xhr.onerror = () => {
-        toast.error("Upload failed. Try again.");
-        setLoading(false);
-      };
-
-      xhr.send(form);
+      setLoading(false);
 
     } catch (err) {
       toast.error(err.message);
@@ -18,7 +18,8 @@ CORS(
         r"/*": {
             "origins": [origin.strip() for origin in allowed_origins.split(",") if origin.strip()],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-            "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"],
+            "allow_headers": ["Content-Type", "Authorization", "X-Requested-With", "Content-Range"],
+            "expose_headers": ["Retry-After"],
             "supports_credentials": False,
         }
     },
@@ -59,6 +60,9 @@ def uploaded_file(filename):
 if __name__ == '__main__':
     # Background analysis threads log via print; line-buffer so Windows consoles show progress live.
     import sys
+    import multiprocessing
+    # Required for spawned Whisper worker processes in the frozen (PyInstaller) build.
+    multiprocessing.freeze_support()
     if hasattr(sys.stdout, "reconfigure"):
         try:
             sys.stdout.reconfigure(line_buffering=True)
@@ -73,28 +77,40 @@ if __name__ == '__main__':
     else:
         print(f"WARNING: {db_message}")
         print("   Server will still start, but DB-backed endpoints may return 503 until connection is fixed.")
+    # On Windows, completely disable reloader to prevent thread killing
+    # On other platforms, you can enable it if needed
+    use_reloader = sys.platform != 'win32'
+    # With the auto-reloader this block runs in both the watcher and the serving process; only the
+    # serving one owns analysis jobs and Whisper workers (the watcher just restarts it on changes).
+    serving_process = not use_reloader or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+    # Resume analyses interrupted by the previous shutdown.
+    if db_ok and serving_process:
+        try:
+            from utils.analysis_manager import get_analysis_manager
+            resumed = get_analysis_manager().recover_jobs()
+            if resumed:
+                print(f"Resumed {resumed} interrupted analysis job(s)")
+        except Exception as e:
+            print(f"WARNING: Could not recover analysis jobs: {e}")
     # Disable reloader completely to prevent thread killing on Windows
     # This is critical for background analysis threads to survive
     # Pre-load Whisper model on startup to avoid first-time download delay
-    print("Pre-loading Whisper model (tiny) for faster analysis...")
-    try:
-        from utils.transcription import load_whisper_model
-        load_whisper_model()
-        print("Whisper model pre-loaded successfully!")
-    except Exception as e:
-        print(f"WARNING: Could not pre-load Whisper model: {e}")
-        print("   Model will be downloaded on first analysis (may take a few minutes)")
+    if serving_process:
+        print("Starting Whisper transcription workers for faster analysis...")
+        try:
+            from utils.analysis_manager import get_analysis_manager
+            get_analysis_manager().warm_up()
+            print("Whisper transcription ready (workers load their model in the background)")
+        except Exception as e:
+            print(f"WARNING: Could not pre-load Whisper model: {e}")
+            print("   Model will be downloaded on first analysis (may take a few minutes)")
     
-    # On Windows, completely disable reloader to prevent thread killing
-    # On other platforms, you can enable it if needed
     try:
         _server_port = int(os.getenv("FLASK_PORT", os.getenv("PORT", "5000")))
     except ValueError:
         _server_port = 5000
     print(f"Listening on port {_server_port} (set FLASK_PORT or PORT to override)")
 
-    if sys.platform == 'win32':
+    if not use_reloader:
         print("WARNING: Windows detected: Disabling auto-reloader to protect background threads")
-        app.run(host="0.0.0.0", port=_server_port, debug=True, use_reloader=False, threaded=True)
-    else:
-        app.run(host="0.0.0.0", port=_server_port, debug=True, use_reloader=True, threaded=True)
+    app.run(host="0.0.0.0", port=_server_port, debug=True, use_reloader=use_reloader, threaded=True)
@@ -1,8 +1,12 @@
 from datetime import datetime
 from bson import ObjectId
 from utils.auth import verify_token
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, Response, request, jsonify, send_from_directory
+import hashlib
+import json
 import os
+import queue
+import time
 from werkzeug.utils import secure_filename
 from config.database import get_collection
 from utils.path_utils import resolve_uploads_dir
@@ -37,6 +41,57 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 def _allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
+
+def _reject_ineligible_uploads() -> bool:
+    """UPLOAD_REJECT_INELIGIBLE=0 keeps uploads that fail the eligibility rules, flagged, instead of rejecting them."""
+    return (os.getenv("UPLOAD_REJECT_INELIGIBLE") or "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _probe_upload(save_path):
+    """
+    Probe a saved upload once and check it against the analysis eligibility rules.
+
+    Returns:
+        (media fields for the session document, error response or None to accept the upload)
+    """
+    import subprocess
+    from utils.analysis_eligibility import check_media_eligibility
+    from utils.media_probe import MediaProbeError, probe_media
+
+    try:
+        media = probe_media(save_path)
+    except subprocess.TimeoutExpired:
+        # Not accepted unchecked: a file ffprobe cannot get through in time would stall its analysis too
+        print(f"[API] Rejected upload {os.path.basename(save_path)}: probe timed out")
+        return {}, (jsonify({
+            "success": False,
+            "error": "The video file took too long to read. It may be corrupt or in an unusual format.",
+            "reason": "probe_timeout"
+        }), 400)
+    except MediaProbeError as e:
+        print(f"[API] Rejected upload {os.path.basename(save_path)}: unreadable ({e})")
+        return {}, (jsonify({
+            "success": False,
+            "error": "The video file could not be read. It may be corrupt or incomplete.",
+            "reason": "unreadable"
+        }), 400)
+    except Exception as e:
+        # ffprobe unavailable: keep the upload, the analysis checks the file when it runs
+        print(f"[API] WARNING: Could not probe upload {save_path}: {e}")
+        return {}, None
+
+    eligible, warnings = check_media_eligibility(media)
+    if not eligible and _reject_ineligible_uploads():
+        print(f"[API] Rejected upload {os.path.basename(save_path)}: {'; '.join(warnings)}")
+        return {}, (jsonify({
+            "success": False,
+            "error": "Video cannot be analyzed: " + "; ".join(warnings),
+            "reason": "ineligible",
+            "warnings": warnings,
+            "media": media
+        }), 400)
+    return {"media": media, "media_eligible": eligible, "media_warnings": warnings}, None
+
 #  CREATE SESSION
 @session_bp.route('/create', methods=['POST'])
 def create_session():
@@ -89,6 +144,11 @@ def upload_video():
         if not user:
             return jsonify({"error": "User not found"}), 404
 
+        from utils.resumable_upload import get_max_upload_bytes
+        max_bytes = get_max_upload_bytes()
+        if max_bytes and (request.content_length or 0) > max_bytes:
+            return jsonify({"error": f"File is too large (limit {max_bytes // (1024 * 1024)} MB)"}), 413
+
         print("Request.files keys:", request.files.keys())  # debug
 
         if 'file' not in request.files:
@@ -101,26 +161,192 @@ def upload_video():
         if not _allowed_file(file.filename):
             return jsonify({"error": "Unsupported file type. Only MP4 and WEBM allowed"}), 400
 
-        # Save file
+        # Save file, hashing it as it is written (stored by content, see blob_store)
+        from utils.blob_store import save_stream
         base_name = secure_filename(file.filename)
         ext = base_name.rsplit(".", 1)[1].lower()
-        unique_name = f"{str(user['_id'])}_{int(datetime.now().timestamp())}.{ext}"
-        save_path = os.path.join(UPLOAD_FOLDER, unique_name)
-        file.save(save_path)
+        try:
+            save_path, digest, size = save_stream(file.stream, UPLOAD_FOLDER, ext, max_bytes)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 413
 
-        session_data = {
-            "user_id": str(user["_id"]),
-            "video_path": unique_name,
-            "title": request.form.get('title') or None,
-            "start_time": request.form.get('start_time') or datetime.now().isoformat(),
-            "end_time": request.form.get('end_time') or None,
-            "created_at": datetime.now().isoformat(),
-        }
-        result = collection_sessions.insert_one(session_data)
-        inserted_session = collection_sessions.find_one({"_id": result.inserted_id})
-        inserted_session["_id"] = str(inserted_session["_id"])
+        return _create_uploaded_session(user, save_path, digest, size, request.form)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _create_uploaded_session(user, save_path, digest, size, fields):
+    """
+    Store a complete upload as a content-addressed blob, probe it and create its session
+    (title/start_time/end_time from `fields`).
+    """
+    from utils.blob_store import blob_name, release_blob, reserve_blob, store_blob
+    extension = save_path.rsplit(".", 1)[1]
+    reservations = get_collection("blob_reservation")
+    # Reserved until the session exists, so deleting another session with this content cannot remove the blob
+    with reserve_blob(reservations, blob_name(digest, extension)):
+        unique_name = store_blob(UPLOAD_FOLDER, save_path, digest, extension)
+
+        # Too short, silent or unreadable videos are turned away before any analysis runs
+        media_fields, rejection = _probe_upload(os.path.join(UPLOAD_FOLDER, unique_name))
+        if rejection is None:
+            session_data = {
+                "user_id": str(user["_id"]),
+                "video_path": unique_name,
+                "title": fields.get('title') or None,
+                "start_time": fields.get('start_time') or datetime.now().isoformat(),
+                "end_time": fields.get('end_time') or None,
+                "created_at": datetime.now().isoformat(),
+                "content_sha256": digest,
+                "file_size": size,
+                **media_fields,
+            }
+            result = collection_sessions.insert_one(session_data)
+    if rejection is not None:
+        release_blob(collection_sessions, UPLOAD_FOLDER, unique_name, reservations)
+        return rejection
+
+    inserted_session = collection_sessions.find_one({"_id": result.inserted_id})
+    inserted_session["_id"] = str(inserted_session["_id"])
+
+    return jsonify({"success": True, "filename": unique_name, "session": inserted_session}), 201
+
+
+#  RESUMABLE (CHUNKED) UPLOAD: init -> PUT byte ranges -> finalize
+_resumable_uploads = None
+
+
+def _get_resumable_uploads():
+    global _resumable_uploads
+    if _resumable_uploads is None:
+        from utils.resumable_upload import ResumableUploads
+        _resumable_uploads = ResumableUploads(get_collection("upload"), UPLOAD_FOLDER)
+    return _resumable_uploads
+
+
+def _upload_status(upload):
+    return {
+        "success": True,
+        "upload_id": upload["_id"],
+        "offset": upload["received"],
+        "size": upload["size"],
+    }
+
+
+@session_bp.route('/upload/init', methods=['POST'])
+def init_upload():
+    db_error = ensure_db_connection()
+    if db_error:
+        return db_error
+    try:
+        auth_header = request.headers.get("Authorization", "")
+        token = auth_header.replace("Bearer ", "")
+
+        email = verify_token(token)
+        if not email:
+            return jsonify({"error": "Invalid or expired token"}), 401
+
+        user = collection_users.find_one({"email": email})
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+
+        from utils.resumable_upload import UploadError, get_chunk_bytes
+        data = request.get_json(silent=True) or {}
+        filename = secure_filename(data.get("filename") or "")
+        if not _allowed_file(filename):
+            return jsonify({"error": "Unsupported file type. Only MP4 and WEBM allowed"}), 400
+        try:
+            size = int(data.get("size") or 0)
+        except (TypeError, ValueError):
+            size = 0
+
+        metadata = {key: data.get(key) for key in ("title", "start_time", "end_time")}
+        try:
+            upload = _get_resumable_uploads().create(
+                str(user["_id"]), filename.rsplit(".", 1)[1].lower(), size, metadata
+            )
+        except UploadError as e:
+            return jsonify(e.to_dict()), e.status
+        return jsonify({**_upload_status(upload), "chunk_size": get_chunk_bytes()}), 201
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@session_bp.route('/upload/<upload_id>', methods=['GET', 'PUT', 'DELETE'])
+def resumable_upload(upload_id):
+    """GET: offset to resume from; PUT: the next chunk (Content-Range); DELETE: abort."""
+    db_error = ensure_db_connection()
+    if db_error:
+        return db_error
+    try:
+        auth_header = request.headers.get("Authorization", "")
+        token = auth_header.replace("Bearer ", "")
+
+        email = verify_token(token)
+        if not email:
+            return jsonify({"error": "Invalid or expired token"}), 401
+
+        user = collection_users.find_one({"email": email})
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+
+        from utils.resumable_upload import UploadError, parse_content_range
+        uploads = _get_resumable_uploads()
+        upload = uploads.get(upload_id, str(user["_id"]))
+        if not upload:
+            return jsonify({"error": "Upload not found or expired"}), 404
+
+        if request.method == 'GET':
+            return jsonify(_upload_status(upload)), 200
+        if request.method == 'DELETE':
+            uploads.discard(upload)
+            return jsonify({"success": True, "message": "Upload cancelled"}), 200
+
+        try:
+            start, length, total = parse_content_range(request.headers.get("Content-Range"))
+            if total is not None and total != upload["size"]:
+                raise UploadError(400, f"Content-Range total does not match the upload size ({upload['size']})")
+            if request.content_length is not None and request.content_length != length:
+                raise UploadError(400, "Content-Length does not match Content-Range")
+            # Streamed from the socket into the file (no request buffering)
+            offset = uploads.write(upload, start, length, request.stream)
+        except UploadError as e:
+            return jsonify(e.to_dict()), e.status
+        return jsonify({**_upload_status(upload), "offset": offset}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@session_bp.route('/upload/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    db_error = ensure_db_connection()
+    if db_error:
+        return db_error
+    try:
+        auth_header = request.headers.get("Authorization", "")
+        token = auth_header.replace("Bearer ", "")
+
+        email = verify_token(token)
+        if not email:
+            return jsonify({"error": "Invalid or expired token"}), 401
 
-        return jsonify({"success": True, "filename": unique_name, "session": inserted_session}), 201
+        user = collection_users.find_one({"email": email})
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+
+        from utils.resumable_upload import UploadError
+        uploads = _get_resumable_uploads()
+        upload = uploads.get(upload_id, str(user["_id"]))
+        if not upload:
+            return jsonify({"error": "Upload not found or expired"}), 404
+        try:
+            save_path, digest = uploads.complete(upload)
+        except UploadError as e:
+            return jsonify(e.to_dict()), e.status
+        return _create_uploaded_session(user, save_path, digest, upload["size"], upload.get("metadata") or {})
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -218,18 +444,18 @@ def delete_session(session_id):
         if not session:
             return jsonify({"error": "Session not found or access denied"}), 404
 
-        # Delete video file if it exists
-        video_path = session.get("video_path")
-        if video_path:
-            file_path = os.path.join(UPLOAD_FOLDER, video_path)
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    print(f"Warning: Could not delete file {file_path}: {e}")
+        # Stop its analysis first so no worker keeps spending CPU on (or writing results to) it
+        from utils.analysis_manager import get_analysis_manager
+        get_analysis_manager().cancel_analysis(session_id)
+        _progress_owners.pop(session_id, None)
 
-        # Delete session from MongoDB
+        # Delete session from MongoDB, then its video unless another session shares the same content
         collection_sessions.delete_one({"_id": session_obj_id})
+        from utils.blob_store import release_blob
+        release_blob(collection_sessions, UPLOAD_FOLDER, session.get("video_path"), get_collection("blob_reservation"))
+
+        from utils.analysis_checkpoints import clear_checkpoints
+        clear_checkpoints(session_id)
 
         return jsonify({"success": True, "message": "Session deleted successfully"}), 200
 
@@ -271,6 +497,13 @@ def get_session(session_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _admission_rejected_response(rejection):
+    """429 with Retry-After for an analysis request turned away by admission control."""
+    print(f"[API] Analysis request rejected: {rejection.reason} (retry after {rejection.retry_after}s)")
+    response = jsonify(rejection.to_dict())
+    response.headers["Retry-After"] = str(rejection.retry_after)
+    return response, 429
+
 # Trigger analysis for a session
 @session_bp.route('/<session_id>/analyze', methods=['POST', 'OPTIONS'])
 def analyze_session(session_id):
@@ -302,6 +535,13 @@ def analyze_session(session_id):
         if not session:
             return jsonify({"error": "Session not found or access denied"}), 404
 
+        # Scheduling class: "interactive" (default) or "bulk" for background re-analysis
+        from utils.analysis_scheduler import DEFAULT_PRIORITY, PRIORITY_CLASSES
+        body = request.get_json(silent=True) or {}
+        priority = body.get("priority") or request.args.get("priority") or DEFAULT_PRIORITY
+        if priority not in PRIORITY_CLASSES:
+            return jsonify({"error": f"Invalid priority. Use one of: {', '.join(PRIORITY_CLASSES)}"}), 400
+
         # Check analysis status
         analysis_status = session.get("analysis_status", "not_started")
         if analysis_status == "completed":
@@ -331,6 +571,35 @@ def analyze_session(session_id):
                 # Allow re-analysis for other types of failures
                 pass
         
+        # Flagged as ineligible when it was uploaded: refuse before spending any analysis resources
+        if session.get("media_eligible") is False:
+            warnings = session.get("media_warnings") or []
+            return jsonify({
+                "success": False,
+                "error": "Video cannot be analyzed: " + "; ".join(warnings),
+                "ineligible": True,
+                "warnings": warnings
+            }), 400
+        
+        from utils.analysis_manager import get_analysis_manager
+        manager = get_analysis_manager()
+        busy = manager.is_running(session_id) or manager.is_queued(session_id)
+        
+        # Identical video already analyzed by this pipeline version: reuse its results, no job
+        if not busy and manager.reuse_results(session, collection_sessions):
+            return jsonify({
+                "success": True,
+                "message": "Analysis completed (results reused from an identical video)",
+                "already_completed": True,
+                "reused": True
+            }), 200
+        
+        # Admission control: turn the request away before doing any work if over capacity
+        if not busy:
+            rejection = manager.admission_check(str(user["_id"]))
+            if rejection is not None:
+                return _admission_rejected_response(rejection)
+        
         # Set status to "processing" immediately
         session_obj_id = ObjectId(session_id)
         collection_sessions.update_one(
@@ -367,19 +636,12 @@ def analyze_session(session_id):
         # Quick duration check before starting analysis (if not already failed)
         if analysis_status != "failed":
             try:
-                from utils.audioextraction import extract_audio, get_audio_duration
-                
-                # Extract audio quickly to check duration
-                print(f"[API] Checking video duration before analysis...")
-                audio_path = extract_audio(video_path)
-                duration = get_audio_duration(audio_path)
+                from utils.media_probe import probe_media
                 
-                # Clean up temp audio file
-                try:
-                    if os.path.exists(audio_path):
-                        os.remove(audio_path)
-                except:
-                    pass
+                # Metadata stored at upload, else one cached ffprobe call (the scheduler reuses it)
+                duration = (session.get("media") or {}).get("duration") or probe_media(video_path)["duration"]
+                if duration is None:
+                    raise Exception("duration unknown")
                 
                 # Check if video is too short
                 MIN_DURATION = 10.0
@@ -404,12 +666,8 @@ def analyze_session(session_id):
                 # If duration check fails, continue with analysis (let it fail during validation)
                 print(f"[API] WARNING: Duration check failed, continuing with analysis: {str(duration_error)}")
 
-        # Start analysis in background thread
-        from utils.analysis_manager import get_analysis_manager
-        manager = get_analysis_manager()
-        
-        # Check if already running
-        if manager.is_running(session_id):
+        # Check if already running or waiting in the queue
+        if manager.is_running(session_id) or manager.is_queued(session_id):
             return jsonify({
                 "success": True,
                 "message": "Analysis already in progress",
@@ -418,22 +676,37 @@ def analyze_session(session_id):
         
         # Start background analysis
         print(f"[API] Starting analysis for session {session_id}, video: {video_path}")
-        started = manager.start_analysis(
-            session_id=session_id,
-            video_path=video_path,
-            user_id=str(user["_id"]),
-            db_collection=collection_sessions
-        )
+        from utils.admission_control import AdmissionRejected
+        try:
+            started = manager.start_analysis(
+                session_id=session_id,
+                video_path=video_path,
+                user_id=str(user["_id"]),
+                db_collection=collection_sessions,
+                priority=priority
+            )
+        except AdmissionRejected as rejection:
+            # Not accepted after all (load changed or this video is too large): restore the status
+            collection_sessions.update_one(
+                {"_id": session_obj_id},
+                {"$set": {
+                    "analysis_status": analysis_status,
+                    "analysis_error": session.get("analysis_error")
+                }}
+            )
+            return _admission_rejected_response(rejection)
         
         if not started:
             print(f"[API] Failed to start analysis for session {session_id}")
             return jsonify({"error": "Failed to start analysis (may already be running)"}), 500
 
-        print(f"[API] Analysis started successfully for session {session_id}")
+        queue_position = (manager.get_progress(session_id) or {}).get("queue_position")
+        print(f"[API] Analysis queued for session {session_id} (position {queue_position})")
         return jsonify({
             "success": True,
             "message": "Analysis started successfully",
-            "session_id": session_id
+            "session_id": session_id,
+            "queue_position": queue_position
         }), 200
 
     except Exception as e:
@@ -443,16 +716,374 @@ def analyze_session(session_id):
         return jsonify({"error": f"Failed to start analysis: {str(e)}"}), 500
 
 
+# Sessions whose ownership was already verified by a progress request: session_id -> email.
+# Lets polls of a live analysis answer from memory without any database lookups.
+_progress_owners = {}
+_PROGRESS_OWNERS_MAX = 1000
+
+TERMINAL_PROGRESS_STATUSES = ("completed", "failed", "cancelled", "not_started")
+SSE_KEEPALIVE_SECONDS = 15
+# A stream opened before its analysis was requested waits this long for the job to appear
+SSE_NOT_STARTED_SECONDS = 60
+
+
+def _remember_progress_owner(session_id, email):
+    if len(_progress_owners) >= _PROGRESS_OWNERS_MAX:
+        _progress_owners.clear()
+    _progress_owners[session_id] = email
+
+
+def _live_progress_payload(manager_progress):
+    """Progress response built from the analysis manager's in-memory state only."""
+    status = manager_progress.get("status")
+    if status == "failed":
+        error_msg = manager_progress.get("error", "Analysis failed")
+        return {
+            "status": "failed",
+            "progress": 0,
+            "message": f"Analysis failed: {error_msg}",
+            "error": error_msg
+        }
+
+    if status == "cancelled":
+        return {
+            "status": "cancelled",
+            "progress": 0,
+            "message": "Analysis cancelled"
+        }
+
+    if status == "completed":
+        refining = bool(manager_progress.get("refining"))
+        return {
+            "status": "completed",
+            "progress": 100,
+            "message": manager_progress.get("message") or "Analysis completed",
+            "completed": True,
+            "refining": refining,
+            "transcript_stage": "draft" if refining else "final"
+        }
+
+    if status == "queued":
+        position = manager_progress.get("queue_position")
+        return {
+            "status": "queued",
+            "progress": 0,
+            "message": f"Waiting in queue (position {position} of {manager_progress.get('queue_length')})",
+            "queue_position": position,
+            "priority": manager_progress.get("priority")
+        }
+
+    stages = manager_progress.get("stages") or {}
+    return {
+        "status": "processing",
+        "progress": manager_progress.get("progress", 0),
+        "message": manager_progress.get("message", "Processing..."),
+        "stages": {
+            name: {key: state.get(key) for key in ("status", "progress", "seconds")}
+            for name, state in stages.items()
+        },
+        # Stages restored from checkpoints of an earlier failed run
+        "reused_stages": [name for name, state in stages.items() if state.get("reused")]
+    }
+
+
+def _session_progress_payload(session, manager):
+    """Progress response for a session: the DB status is the source of truth, the manager adds live detail."""
+    session_id = str(session["_id"])
+    analysis_status = session.get("analysis_status", "not_started")
+    manager_progress = manager.get_progress(session_id)
+
+    # Prioritize DB status, but also check manager progress for failed status
+    # (in case DB update is slightly delayed)
+    if analysis_status == "failed" or (manager_progress and manager_progress.get("status") == "failed"):
+        # Try to get error from analysis_error field first, then from analysis_report
+        error_msg = session.get("analysis_error")
+        if not error_msg and manager_progress and manager_progress.get("error"):
+            error_msg = manager_progress.get("error")
+        if not error_msg and session.get("analysis_report"):
+            rejection_reason = session.get("analysis_report", {}).get("rejection_reason")
+            if rejection_reason:
+                # Extract user-friendly message for short videos
+                if "too short" in rejection_reason.lower() or "minimum" in rejection_reason.lower():
+                    error_msg = "Video is too short. Minimum presentation length is 10 seconds."
+                else:
+                    error_msg = rejection_reason
+        if not error_msg:
+            error_msg = "Unknown error"
+
+        return {
+            "status": "failed",
+            "progress": 0,
+            "message": f"Analysis failed: {error_msg}",
+            "error": error_msg
+        }
+
+    if analysis_status == "cancelled" or (manager_progress and manager_progress.get("status") == "cancelled"):
+        return {
+            "status": "cancelled",
+            "progress": 0,
+            "message": "Analysis cancelled"
+        }
+
+    if analysis_status == "completed":
+        # Draft-then-refine: results are final only once the refinement has landed.
+        refining = session.get("refinement_status") == "running"
+        return {
+            "status": "completed",
+            "progress": 100,
+            "message": "Provisional results ready, refining transcript..." if refining else "Analysis completed",
+            "completed": True,
+            "refining": refining,
+            "transcript_stage": session.get("transcript_stage", "final")
+        }
+
+    if analysis_status == "processing":
+        # Get progress from manager (real-time progress)
+        if manager_progress:
+            return _live_progress_payload(manager_progress)
+
+        # Status is processing but no manager progress.
+        # This commonly happens after backend restarts/crashes mid-analysis.
+        # Jobs still in the durable job store are resumed automatically once their lease expires.
+        job = manager.get_job(session_id)
+        if job and job.get("state") in ("queued", "leased"):
+            return {
+                "status": "processing",
+                "progress": 0,
+                "message": "Waiting to resume after a server restart..."
+            }
+
+        analysis_started_at = session.get("analysis_started_at")
+        try:
+            started_dt = datetime.fromisoformat(analysis_started_at) if analysis_started_at else None
+        except Exception:
+            started_dt = None
+
+        if started_dt and (datetime.now() - started_dt).total_seconds() > 45:
+            interrupted_msg = "Analysis was interrupted on the server. Please click Analyze again."
+            collection_sessions.update_one(
+                {"_id": session["_id"]},
+                {"$set": {"analysis_status": "failed", "analysis_error": interrupted_msg}}
+            )
+            return {
+                "status": "failed",
+                "progress": 0,
+                "message": interrupted_msg,
+                "error": interrupted_msg
+            }
+
+        return {
+            "status": "processing",
+            "progress": 15,
+            "message": "Analysis is initializing..."
+        }
+
+    # Not started
+    return {
+        "status": "not_started",
+        "progress": 0,
+        "message": "Analysis not started"
+    }
+
+
+def _progress_response(payload):
+    """JSON progress response with an ETag; 304 when the client already has this state."""
+    body = json.dumps(payload, sort_keys=True)
+    etag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest()[:20] + '"'
+    if request.if_none_match.contains(etag.strip('"')):
+        response = Response(status=304)
+    else:
+        response = Response(body, status=200, mimetype="application/json")
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
 # Get analysis progress
 @session_bp.route('/<session_id>/progress', methods=['GET', 'OPTIONS'])
 def get_analysis_progress(session_id):
     # Handle CORS preflight
     if request.method == 'OPTIONS':
         return jsonify({}), 200
+
+    auth_header = request.headers.get("Authorization", "")
+    token = auth_header.replace("Bearer ", "")
+
+    email = verify_token(token)
+    if not email:
+        return jsonify({"error": "Invalid or expired token"}), 401
+
+    from utils.analysis_manager import get_analysis_manager
+    manager = get_analysis_manager()
+
+    # Fast path: a live analysis this user was already verified for is answered from memory.
+    if _progress_owners.get(session_id) == email:
+        manager_progress = manager.get_progress(session_id)
+        if manager_progress and manager_progress.get("status") in ("queued", "running", "cancelling"):
+            return _progress_response(_live_progress_payload(manager_progress))
+
     db_error = ensure_db_connection()
     if db_error:
         return db_error
-    
+
+    try:
+        user = collection_users.find_one({"email": email})
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+
+        try:
+            session_obj_id = ObjectId(session_id)
+        except:
+            return jsonify({"error": "Invalid session ID"}), 400
+
+        session = collection_sessions.find_one({"_id": session_obj_id, "user_id": str(user["_id"])})
+        if not session:
+            return jsonify({"error": "Session not found or access denied"}), 404
+
+        _remember_progress_owner(session_id, email)
+        return _progress_response(_session_progress_payload(session, manager))
+
+    except Exception as e:
+        print(f"Progress error: {str(e)}")
+        return jsonify({"error": f"Failed to get progress: {str(e)}"}), 500
+
+
+# Short-lived token for the progress stream (EventSource cannot send an Authorization header)
+@session_bp.route('/<session_id>/progress/stream-token', methods=['POST', 'OPTIONS'])
+def create_progress_stream_token(session_id):
+    # Handle CORS preflight
+    if request.method == 'OPTIONS':
+        return jsonify({}), 200
+
+    auth_header = request.headers.get("Authorization", "")
+    token = auth_header.replace("Bearer ", "")
+
+    email = verify_token(token)
+    if not email:
+        return jsonify({"error": "Invalid or expired token"}), 401
+
+    db_error = ensure_db_connection()
+    if db_error:
+        return db_error
+
+    try:
+        user = collection_users.find_one({"email": email})
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+
+        try:
+            session_obj_id = ObjectId(session_id)
+        except:
+            return jsonify({"error": "Invalid session ID"}), 400
+
+        session = collection_sessions.find_one({"_id": session_obj_id, "user_id": str(user["_id"])})
+        if not session:
+            return jsonify({"error": "Session not found or access denied"}), 404
+
+        from utils.auth import STREAM_TOKEN_SECONDS, generate_stream_token
+        return jsonify({
+            "success": True,
+            "stream_token": generate_stream_token(email, session_id),
+            "expires_in": STREAM_TOKEN_SECONDS
+        }), 200
+
+    except Exception as e:
+        print(f"Progress stream token error: {str(e)}")
+        return jsonify({"error": f"Failed to create stream token: {str(e)}"}), 500
+
+
+# Stream analysis progress (Server-Sent Events)
+@session_bp.route('/<session_id>/progress/stream', methods=['GET'])
+def stream_analysis_progress(session_id):
+    # EventSource cannot send headers: it passes a stream token as ?stream_token= instead,
+    # never the login token, which would end up in access logs
+    auth_header = request.headers.get("Authorization", "")
+    token = auth_header.replace("Bearer ", "")
+
+    if token:
+        email = verify_token(token)
+    else:
+        from utils.auth import verify_stream_token
+        email = verify_stream_token(request.args.get("stream_token", ""), session_id)
+    if not email:
+        return jsonify({"error": "Invalid or expired token"}), 401
+
+    db_error = ensure_db_connection()
+    if db_error:
+        return db_error
+
+    try:
+        user = collection_users.find_one({"email": email})
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+
+        try:
+            session_obj_id = ObjectId(session_id)
+        except:
+            return jsonify({"error": "Invalid session ID"}), 400
+
+        session = collection_sessions.find_one({"_id": session_obj_id, "user_id": str(user["_id"])})
+        if not session:
+            return jsonify({"error": "Session not found or access denied"}), 404
+
+        from utils.analysis_manager import get_analysis_manager
+        manager = get_analysis_manager()
+        # Subscribe before reading the initial state so no update in between is lost.
+        subscriber = manager.subscribe(session_id)
+        initial = _session_progress_payload(session, manager)
+    except Exception as e:
+        print(f"Progress stream error: {str(e)}")
+        return jsonify({"error": f"Failed to stream progress: {str(e)}"}), 500
+
+    def _event(payload, version=None):
+        event_id = f"id: {version}\n" if version is not None else ""
+        return f"event: progress\n{event_id}data: {json.dumps(payload)}\n\n"
+
+    def _finished(payload):
+        return payload["status"] in TERMINAL_PROGRESS_STATUSES and not payload.get("refining")
+
+    def generate():
+        # No database work from here on: events come straight from the analysis manager.
+        try:
+            yield "retry: 3000\n\n"
+            yield _event(initial)
+            if _finished(initial) and initial["status"] != "not_started":
+                return
+            # Not started: stay open briefly for an analysis requested right after connecting
+            waiting_since = time.monotonic() if initial["status"] == "not_started" else None
+            while True:
+                try:
+                    snapshot = subscriber.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    if waiting_since is not None and time.monotonic() - waiting_since >= SSE_NOT_STARTED_SECONDS:
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                waiting_since = None
+                payload = _live_progress_payload(snapshot)
+                yield _event(payload, snapshot.get("version"))
+                if _finished(payload):
+                    return
+        finally:
+            manager.unsubscribe(session_id, subscriber)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Cancel a queued or running analysis
+@session_bp.route('/<session_id>/analyze/cancel', methods=['POST', 'OPTIONS'])
+def cancel_analysis(session_id):
+    # Handle CORS preflight
+    if request.method == 'OPTIONS':
+        return jsonify({}), 200
+    db_error = ensure_db_connection()
+    if db_error:
+        return db_error
+
     try:
         auth_header = request.headers.get("Authorization", "")
         token = auth_header.replace("Bearer ", "")
@@ -474,103 +1105,42 @@ def get_analysis_progress(session_id):
         if not session:
             return jsonify({"error": "Session not found or access denied"}), 404
 
-        # Check analysis_status from DB first (this is the source of truth)
-        analysis_status = session.get("analysis_status", "not_started")
-        
-        # Also check manager's in-memory progress for real-time updates
         from utils.analysis_manager import get_analysis_manager
-        manager = get_analysis_manager()
-        manager_progress = manager.get_progress(session_id)
-        
-        # Prioritize DB status, but also check manager progress for failed status
-        # (in case DB update is slightly delayed)
-        if analysis_status == "failed" or (manager_progress and manager_progress.get("status") == "failed"):
-            # Try to get error from analysis_error field first, then from analysis_report
-            error_msg = session.get("analysis_error")
-            if not error_msg and manager_progress and manager_progress.get("error"):
-                error_msg = manager_progress.get("error")
-            if not error_msg and session.get("analysis_report"):
-                rejection_reason = session.get("analysis_report", {}).get("rejection_reason")
-                if rejection_reason:
-                    # Extract user-friendly message for short videos
-                    if "too short" in rejection_reason.lower() or "minimum" in rejection_reason.lower():
-                        error_msg = "Video is too short. Minimum presentation length is 10 seconds."
-                    else:
-                        error_msg = rejection_reason
-            if not error_msg:
-                error_msg = "Unknown error"
-            
-            return jsonify({
-                "status": "failed",
-                "progress": 0,
-                "message": f"Analysis failed: {error_msg}",
-                "error": error_msg
-            }), 200
-        
-        if analysis_status == "completed":
-            return jsonify({
-                "status": "completed",
-                "progress": 100,
-                "message": "Analysis completed",
-                "completed": True
-            }), 200
-        
-        if analysis_status == "processing":
-            # Get progress from manager (real-time progress)
-            if manager_progress:
-                # Check if manager shows failed status (in case DB hasn't updated yet)
-                if manager_progress.get("status") == "failed":
-                    error_msg = manager_progress.get("error", "Analysis failed")
-                    return jsonify({
-                        "status": "failed",
-                        "progress": 0,
-                        "message": f"Analysis failed: {error_msg}",
-                        "error": error_msg
-                    }), 200
-                
-                return jsonify({
-                    "status": "processing",
-                    "progress": manager_progress.get("progress", 0),
-                    "message": manager_progress.get("message", "Processing...")
-                }), 200
-            else:
-                # Status is processing but no manager progress.
-                # This commonly happens after backend restarts/crashes mid-analysis.
-                analysis_started_at = session.get("analysis_started_at")
-                try:
-                    started_dt = datetime.fromisoformat(analysis_started_at) if analysis_started_at else None
-                except Exception:
-                    started_dt = None
+        cancelled = get_analysis_manager().cancel_analysis(session_id)
 
-                if started_dt and (datetime.now() - started_dt).total_seconds() > 45:
-                    interrupted_msg = "Analysis was interrupted on the server. Please click Analyze again."
-                    collection_sessions.update_one(
-                        {"_id": session_obj_id},
-                        {"$set": {"analysis_status": "failed", "analysis_error": interrupted_msg}}
-                    )
-                    return jsonify({
-                        "status": "failed",
-                        "progress": 0,
-                        "message": interrupted_msg,
-                        "error": interrupted_msg
-                    }), 200
+        if session.get("analysis_status") == "processing":
+            # Also covers a run lost with a server restart that is no longer tracked anywhere.
+            collection_sessions.update_one(
+                {"_id": session_obj_id, "analysis_status": "processing"},
+                {"$set": {"analysis_status": "cancelled", "analysis_error": None}}
+            )
+        elif not cancelled:
+            return jsonify({"error": "No analysis in progress for this session"}), 409
 
-                return jsonify({
-                    "status": "processing",
-                    "progress": 15,
-                    "message": "Analysis is initializing..."
-                }), 200
-        
-        # Not started
+        print(f"[API] Cancelled analysis for session {session_id} ({cancelled or 'not tracked'})")
         return jsonify({
-            "status": "not_started",
-            "progress": 0,
-            "message": "Analysis not started"
+            "success": True,
+            "message": "Analysis cancelled" if cancelled != "running" else "Analysis is stopping",
+            "cancelled": cancelled or "processing"
         }), 200
 
     except Exception as e:
-        print(f"Progress error: {str(e)}")
-        return jsonify({"error": f"Failed to get progress: {str(e)}"}), 500
+        print(f"[API] ERROR: Cancel error: {str(e)}")
+        return jsonify({"error": f"Failed to cancel analysis: {str(e)}"}), 500
+
+
+# Analysis queue statistics (per-class wait times for scheduler tuning)
+@session_bp.route('/queue/stats', methods=['GET'])
+def get_queue_stats():
+    auth_header = request.headers.get("Authorization", "")
+    token = auth_header.replace("Bearer ", "")
+
+    email = verify_token(token)
+    if not email:
+        return jsonify({"error": "Invalid or expired token"}), 401
+
+    from utils.analysis_manager import get_analysis_manager
+    return jsonify(get_analysis_manager().queue_stats()), 200
 
 
 # New endpoint: POST /analyze-video (direct video analysis)
@@ -636,6 +1206,12 @@ def analyze_video():
         if not os.path.exists(video_path):
             return jsonify({"error": f"Video file not found: {video_path}"}), 404
 
+        # Runs in this request rather than on the analysis pool, but still only with spare capacity
+        from utils.analysis_manager import get_analysis_manager
+        rejection = get_analysis_manager().admission_check(str(user["_id"]))
+        if rejection is not None:
+            return _admission_rejected_response(rejection)
+
         # Run analysis pipeline
         from utils.analysis_pipeline import analyze_presentation_video
         
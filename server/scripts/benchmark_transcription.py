@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark Whisper transcription throughput under concurrent load.
+
+Submits every input file --concurrency times at once to a fresh transcription service and
+reports audio-seconds processed per wall-second and per CPU-second (service processes
+included). Run once per configuration to compare, e.g. sequential vs batched encoding:
+
+Usage:
+  cd server
+
+  # Baseline: one window at a time
+  python scripts/benchmark_transcription.py samples/*.wav --concurrency 4 --batch-size 1
+
+  # Batched encoder, several sizes in one run
+  python scripts/benchmark_transcription.py samples/*.wav --concurrency 4 --batch-size 1 4 8
+
+CPU-seconds come from resource.getrusage and are only reported on Linux/macOS.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVER_ROOT))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _cpu_seconds() -> float | None:
+    if resource is None:
+        return None
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return (
+        self_usage.ru_utime + self_usage.ru_stime
+        + child_usage.ru_utime + child_usage.ru_stime
+    )
+
+
+def _audio_seconds(paths: list[str]) -> float:
+    import soundfile as sf
+
+    return sum(sf.info(p).duration for p in paths)
+
+
+def run_once(paths: list[str], concurrency: int, batch_size: int, workers: int, model_size: str | None) -> dict:
+    """Start a fresh service with the given settings, push the load through it, then stop it."""
+    # Worker processes read these when they are spawned.
+    os.environ["WHISPER_BATCH_SIZE"] = str(batch_size)
+    os.environ["WHISPER_CHUNKED"] = "0"
+
+    from utils.transcription import resolve_whisper_model_size
+    from utils.transcription_service import TranscriptionService, resolve_torch_threads
+
+    service = TranscriptionService(
+        workers=workers,
+        torch_threads=resolve_torch_threads(workers),
+        model_size=model_size or resolve_whisper_model_size(),
+    )
+    service.start()
+    # Warm-up job so model loading is excluded from the measurement.
+    service.transcribe(paths[0], model_size=service.model_size)
+
+    jobs = [p for p in paths for _ in range(concurrency)]
+    cpu_before = _cpu_seconds()
+    wall_before = time.perf_counter()
+    futures = [service.submit(p, model_size=service.model_size) for p in jobs]
+    for future in futures:
+        future.result()
+    wall = time.perf_counter() - wall_before
+    # Child CPU time is only accounted once the worker processes have exited.
+    service.shutdown()
+    cpu_after = _cpu_seconds()
+
+    audio = _audio_seconds(jobs)
+    cpu = (cpu_after - cpu_before) if cpu_before is not None and cpu_after is not None else None
+    return {
+        "batch_size": batch_size,
+        "jobs": len(jobs),
+        "audio_s": audio,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "audio_per_wall_s": audio / wall if wall > 0 else 0.0,
+        "audio_per_cpu_s": (audio / cpu) if cpu else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark transcription throughput (audio-seconds per CPU-second)")
+    parser.add_argument("audio", nargs="+", help="16 kHz WAV files (e.g. output of extract_audio)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Copies of each file submitted at once")
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 8], help="WHISPER_BATCH_SIZE values to compare")
+    parser.add_argument("--workers", type=int, default=1, help="Transcription worker processes")
+    parser.add_argument("--model", default=None, help="Whisper model size (default: resolve_whisper_model_size())")
+    args = parser.parse_args()
+
+    rows = [run_once(args.audio, args.concurrency, bs, args.workers, args.model) for bs in args.batch_size]
+
+    print()
+    print(f"{'batch':>5} {'jobs':>5} {'audio s':>9} {'wall s':>8} {'cpu s':>8} {'audio/wall':>11} {'audio/cpu':>10}")
+    for r in rows:
+        cpu = f"{r['cpu_s']:.1f}" if r["cpu_s"] is not None else "n/a"
+        per_cpu = f"{r['audio_per_cpu_s']:.2f}" if r["audio_per_cpu_s"] is not None else "n/a"
+        print(
+            f"{r['batch_size']:>5} {r['jobs']:>5} {r['audio_s']:>9.1f} {r['wall_s']:>8.1f} "
+            f"{cpu:>8} {r['audio_per_wall_s']:>11.2f} {per_cpu:>10}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Compare Whisper CPU configurations on a fixed sample set: speed and word error rate.
+
+The sample directory holds 16 kHz WAV files with a reference transcript next to each one
+(talk01.wav + talk01.txt). Every configuration transcribes every sample in a fresh process
+(so thread settings and quantization apply cleanly), then the deltas against the first
+configuration are printed.
+
+Usage:
+  cd server
+
+  # float32 baseline vs dynamic int8 Linear layers, 4 threads each
+  python scripts/evaluate_whisper_cpu.py samples/ --threads 4
+
+  # Add the CTranslate2 backend to the comparison
+  python scripts/evaluate_whisper_cpu.py samples/ --threads 4 --with-ctranslate2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parent.parent
+
+CONFIGS = {
+    "float32": {"WHISPER_BACKEND": "whisper", "WHISPER_CPU_QUANTIZE": "0"},
+    "dynamic-int8": {"WHISPER_BACKEND": "whisper", "WHISPER_CPU_QUANTIZE": "1"},
+    "ctranslate2-int8": {"WHISPER_BACKEND": "ctranslate2", "WHISPER_COMPUTE_TYPE": "int8"},
+}
+
+
+def normalize(text: str) -> list[str]:
+    text = re.sub(r"[^\w\s']", " ", text.lower())
+    return text.split()
+
+
+def word_errors(reference: list[str], hypothesis: list[str]) -> int:
+    """Word-level Levenshtein distance (substitutions + insertions + deletions)."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1]
+
+
+def _worker(samples: list[str], model_size: str | None) -> None:
+    """Child-process mode: transcribe samples in-process and print JSON timings + hypotheses."""
+    sys.path.insert(0, str(SERVER_ROOT))
+    from utils.transcription import load_whisper_model, transcribe_local
+
+    load_whisper_model(model_size)
+    out = []
+    for path in samples:
+        start = time.perf_counter()
+        result = transcribe_local(path, model_size=model_size)
+        out.append({"path": path, "seconds": time.perf_counter() - start, "text": result["text"]})
+    print("__RESULTS__" + json.dumps(out))
+
+
+def run_config(name: str, samples: list[str], threads: int, model_size: str | None) -> list[dict]:
+    env = dict(os.environ)
+    env.update(CONFIGS[name])
+    env.update({
+        "WHISPER_WORKERS": "0",
+        "WHISPER_TORCH_THREADS": str(threads),
+        "WHISPER_BATCH_SIZE": "1",
+        "WHISPER_CHUNKED": "0",
+        "TRANSCRIPTION_CACHE": "0",
+    })
+    cmd = [sys.executable, __file__, "--worker", *samples]
+    if model_size:
+        cmd += ["--model", model_size]
+    proc = subprocess.run(cmd, env=env, cwd=str(SERVER_ROOT), stdout=subprocess.PIPE, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith("__RESULTS__"):
+            return json.loads(line[len("__RESULTS__"):])
+    raise RuntimeError(f"Configuration '{name}' failed (exit {proc.returncode})")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Speed and WER of Whisper CPU configurations")
+    parser.add_argument("samples", nargs="*", help="Sample directory (WAV + .txt references)")
+    parser.add_argument("--threads", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument("--model", default=None, help="Whisper model size (default: resolve_whisper_model_size())")
+    parser.add_argument("--with-ctranslate2", action="store_true", help="Also evaluate the CTranslate2 int8 backend")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.samples, args.model)
+        return 0
+
+    if len(args.samples) != 1 or not Path(args.samples[0]).is_dir():
+        parser.error("pass exactly one sample directory")
+    wavs = sorted(str(p.resolve()) for p in Path(args.samples[0]).glob("*.wav") if p.with_suffix(".txt").is_file())
+    if not wavs:
+        parser.error("no WAV files with matching .txt references found")
+
+    import soundfile as sf
+
+    audio_seconds = sum(sf.info(p).duration for p in wavs)
+    references = {p: normalize(Path(p).with_suffix(".txt").read_text(encoding="utf-8")) for p in wavs}
+    ref_words = sum(len(r) for r in references.values())
+
+    names = ["float32", "dynamic-int8"] + (["ctranslate2-int8"] if args.with_ctranslate2 else [])
+    rows = []
+    for name in names:
+        print(f"Running {name} on {len(wavs)} sample(s) ({audio_seconds:.0f}s audio, {args.threads} threads)...")
+        results = run_config(name, wavs, args.threads, args.model)
+        seconds = sum(r["seconds"] for r in results)
+        errors = sum(word_errors(references[r["path"]], normalize(r["text"])) for r in results)
+        rows.append({"name": name, "seconds": seconds, "rtf": seconds / audio_seconds, "wer": errors / max(ref_words, 1)})
+
+    base = rows[0]
+    print()
+    print(f"{'config':<18} {'seconds':>8} {'RTF':>6} {'speedup':>8} {'WER':>7} {'dWER':>7}")
+    for r in rows:
+        print(
+            f"{r['name']:<18} {r['seconds']:>8.1f} {r['rtf']:>6.3f} {base['seconds'] / max(r['seconds'], 1e-9):>7.2f}x "
+            f"{r['wer'] * 100:>6.2f}% {(r['wer'] - base['wer']) * 100:>+6.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
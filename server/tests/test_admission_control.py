@@ -0,0 +1,92 @@
+import pytest
+
+from utils import admission_control
+from utils.admission_control import AdmissionRejected, check_admission
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    """Default limits and plenty of free memory."""
+    for name in ("ANALYSIS_MAX_QUEUE", "ANALYSIS_MAX_PENDING_SECONDS", "ANALYSIS_MIN_FREE_MEMORY_MB",
+                 "ANALYSIS_MAX_JOBS_PER_USER"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(admission_control, "get_available_memory_mb", lambda: 4096.0)
+
+
+def _load(**overrides):
+    load = {"queued": 0, "running": 0, "pending_seconds": 0.0, "workers": 2, "user_jobs": 0,
+            "user_remaining_seconds": None}
+    load.update(overrides)
+    return load
+
+
+def test_idle_server_admits():
+    assert check_admission(_load(), estimated_seconds=120) is None
+
+
+def test_user_over_quota_retries_when_their_job_finishes():
+    rejected = check_admission(_load(user_jobs=2, running=2, pending_seconds=400, user_remaining_seconds=45))
+
+    assert rejected.reason == "user_quota"
+    assert rejected.retry_after == 45
+    assert rejected.estimated_wait_seconds == 200
+
+
+def test_full_queue_rejects(monkeypatch):
+    monkeypatch.setenv("ANALYSIS_MAX_QUEUE", "3")
+
+    rejected = check_admission(_load(queued=3, running=2, pending_seconds=600))
+
+    assert rejected.reason == "queue_full"
+    assert rejected.retry_after == 100  # wait of 300 s spread over 3 queued jobs
+
+
+def test_backlog_over_limit_rejects(monkeypatch):
+    monkeypatch.setenv("ANALYSIS_MAX_PENDING_SECONDS", "1000")
+
+    assert check_admission(_load(running=2, pending_seconds=900), estimated_seconds=100) is None
+    rejected = check_admission(_load(running=2, pending_seconds=900), estimated_seconds=300)
+
+    assert rejected.reason == "backlog"
+    assert rejected.retry_after == 100
+
+
+def test_oversized_job_is_admitted_on_an_idle_server(monkeypatch):
+    monkeypatch.setenv("ANALYSIS_MAX_PENDING_SECONDS", "1000")
+
+    assert check_admission(_load(), estimated_seconds=5000) is None
+
+
+def test_low_memory_rejects_only_while_jobs_run(monkeypatch):
+    monkeypatch.setattr(admission_control, "get_available_memory_mb", lambda: 100.0)
+
+    assert check_admission(_load(queued=1)) is None
+    rejected = check_admission(_load(running=1, pending_seconds=60))
+
+    assert rejected.reason == "memory"
+    assert rejected.retry_after == admission_control.MEMORY_RETRY_AFTER_SECONDS
+
+
+def test_unknown_memory_admits(monkeypatch):
+    monkeypatch.setattr(admission_control, "get_available_memory_mb", lambda: None)
+
+    assert check_admission(_load(running=1)) is None
+
+
+def test_zero_disables_a_limit(monkeypatch):
+    monkeypatch.setenv("ANALYSIS_MAX_JOBS_PER_USER", "0")
+    monkeypatch.setenv("ANALYSIS_MAX_QUEUE", "0")
+
+    assert check_admission(_load(user_jobs=10, queued=50, running=2, pending_seconds=600)) is None
+
+
+@pytest.mark.parametrize("retry_after, expected", [
+    (0.2, admission_control.MIN_RETRY_AFTER_SECONDS),
+    (42.7, 42),
+    (10_000, admission_control.MAX_RETRY_AFTER_SECONDS),
+])
+def test_retry_after_is_clamped(retry_after, expected):
+    rejected = AdmissionRejected("backlog", "busy", retry_after, -3)
+
+    assert rejected.retry_after == expected
+    assert rejected.to_dict()["estimated_wait_seconds"] == 0.0
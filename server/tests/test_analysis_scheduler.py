@@ -0,0 +1,121 @@
+import types
+
+import pytest
+
+from utils import analysis_scheduler
+from utils.analysis_scheduler import AnalysisScheduler, estimate_cost, schedule_key
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    """Replace the scheduler's monotonic clock with one the test advances."""
+    for name in ("ANALYSIS_SCHEDULER", "ANALYSIS_AGING_RATE", "ANALYSIS_BULK_OFFSET_SECONDS"):
+        monkeypatch.delenv(name, raising=False)
+    fake = types.SimpleNamespace(now=1000.0)
+    fake.monotonic = lambda: fake.now
+    monkeypatch.setattr(analysis_scheduler, "time", fake)
+    return fake
+
+
+def _drain(scheduler):
+    return [scheduler.pop()[0][0] for _ in range(len(scheduler))]
+
+
+def test_shortest_job_runs_first():
+    scheduler = AnalysisScheduler()
+    scheduler.push(("long",), estimated_seconds=600)
+    scheduler.push(("short",), estimated_seconds=30)
+    scheduler.push(("medium",), estimated_seconds=120)
+
+    assert _drain(scheduler) == ["short", "medium", "long"]
+
+
+def test_equal_estimates_keep_arrival_order():
+    scheduler = AnalysisScheduler()
+    for name in ("first", "second", "third"):
+        scheduler.push((name,), estimated_seconds=60)
+
+    assert _drain(scheduler) == ["first", "second", "third"]
+
+
+def test_bulk_jobs_yield_to_interactive_ones():
+    scheduler = AnalysisScheduler()
+    scheduler.push(("reanalysis",), priority="bulk", estimated_seconds=30)
+    scheduler.push(("upload",), priority="interactive", estimated_seconds=600)
+
+    assert _drain(scheduler) == ["upload", "reanalysis"]
+
+
+def test_waiting_job_overtakes_newer_short_jobs(clock):
+    scheduler = AnalysisScheduler()
+    scheduler.push(("long",), estimated_seconds=600)
+    clock.now += 580
+    scheduler.push(("short",), estimated_seconds=30)
+
+    assert scheduler.position("long") == 1
+    assert _drain(scheduler) == ["long", "short"]
+
+
+def test_pop_records_wait_per_class(clock):
+    scheduler = AnalysisScheduler()
+    scheduler.push(("job",), estimated_seconds=60)
+    clock.now += 12.5
+
+    _, entry = scheduler.pop()
+
+    assert entry["waited_seconds"] == 12.5
+    stats = scheduler.stats()["classes"]
+    assert (stats["interactive"]["samples"], stats["interactive"]["max_wait"]) == (1, 12.5)
+    assert stats["bulk"]["samples"] == 0
+
+
+def test_fifo_policy_ignores_estimates():
+    scheduler = AnalysisScheduler(policy="fifo")
+    scheduler.push(("long",), estimated_seconds=600)
+    scheduler.push(("short",), estimated_seconds=30)
+
+    assert _drain(scheduler) == ["long", "short"]
+
+
+def test_remove_and_position():
+    scheduler = AnalysisScheduler()
+    scheduler.push(("a",), estimated_seconds=300)
+    scheduler.push(("b",), estimated_seconds=100)
+    scheduler.push(("c",), estimated_seconds=200)
+
+    assert [scheduler.position(name) for name in ("a", "b", "c")] == [3, 1, 2]
+    assert scheduler.remove("b") == ("b",)
+    assert scheduler.remove("b") is None
+    assert scheduler.position("b") is None
+    assert scheduler.position("c") == 1
+    assert scheduler.pending_seconds() == 500
+
+
+def test_schedule_key_orders_like_the_scheduler(clock):
+    scheduler = AnalysisScheduler()
+    jobs = [("long", "interactive", 600, 0), ("bulk", "bulk", 30, 100), ("short", "interactive", 30, 200),
+            ("old", "interactive", 900, -500)]
+    for name, priority, estimate, enqueued_at in jobs:
+        clock.now = 1000.0 + enqueued_at
+        scheduler.push((name,), priority=priority, estimated_seconds=estimate)
+    clock.now = 1300.0
+
+    by_key = sorted(jobs, key=lambda job: schedule_key(job[1], job[2], 1000.0 + job[3]))
+
+    assert [job[0] for job in by_key] == _drain(scheduler)
+
+
+def test_schedule_key_is_arrival_time_under_fifo(monkeypatch):
+    monkeypatch.setenv("ANALYSIS_SCHEDULER", "fifo")
+
+    assert schedule_key("bulk", 600, 42.0) == 42.0
+
+
+def test_estimate_cost_scales_with_duration_and_resolution():
+    at_720p = estimate_cost(60, 1280, 720)
+
+    assert at_720p == pytest.approx(60.0)
+    assert estimate_cost(120, 1280, 720) == pytest.approx(2 * at_720p)
+    assert estimate_cost(60, 1920, 1080) > at_720p
+    assert estimate_cost(60) == at_720p
+    assert estimate_cost(None) == analysis_scheduler.UNKNOWN_COST_SECONDS
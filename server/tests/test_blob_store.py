@@ -0,0 +1,104 @@
+import hashlib
+import io
+import os
+import time
+
+import mongomock
+import pytest
+
+from utils.blob_store import RESERVATION_SECONDS, release_blob, reserve_blob, save_stream, store_blob
+
+DATA = b"presentation" * 1000
+DIGEST = hashlib.sha256(DATA).hexdigest()
+NAME = f"{DIGEST}.webm"
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().db
+
+
+def _store(folder):
+    path, digest, _ = save_stream(io.BytesIO(DATA), str(folder), "webm")
+    return store_blob(str(folder), path, digest, "webm")
+
+
+def test_save_stream_hashes_and_sizes_the_upload(tmp_path):
+    path, digest, size = save_stream(io.BytesIO(DATA), str(tmp_path), "mp4")
+
+    assert (digest, size) == (DIGEST, len(DATA))
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+
+
+def test_save_stream_over_limit_leaves_nothing_behind(tmp_path):
+    with pytest.raises(ValueError):
+        save_stream(io.BytesIO(DATA), str(tmp_path), "mp4", max_bytes=len(DATA) - 1)
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_identical_uploads_share_the_existing_blob(tmp_path):
+    assert _store(tmp_path) == NAME
+    inode = os.stat(tmp_path / NAME).st_ino
+
+    assert _store(tmp_path) == NAME
+
+    assert os.listdir(tmp_path) == [NAME]
+    assert os.stat(tmp_path / NAME).st_ino == inode
+
+
+def test_blob_is_kept_while_another_session_uses_it(tmp_path, db):
+    _store(tmp_path)
+    db.session.insert_one({"video_path": NAME})
+
+    assert release_blob(db.session, str(tmp_path), NAME, db.blob_reservation) is False
+    assert os.path.exists(tmp_path / NAME)
+
+
+def test_last_reference_deletes_the_blob_and_its_mp4(tmp_path, db):
+    _store(tmp_path)
+    mp4 = tmp_path / f"{DIGEST}.mp4"
+    mp4.write_bytes(b"converted")
+
+    assert release_blob(db.session, str(tmp_path), NAME, db.blob_reservation) is True
+    assert os.listdir(tmp_path) == []
+
+
+def test_reserved_blob_is_kept_until_its_session_exists(tmp_path, db):
+    with reserve_blob(db.blob_reservation, NAME):
+        _store(tmp_path)
+        assert release_blob(db.session, str(tmp_path), NAME, db.blob_reservation) is False
+        db.session.insert_one({"video_path": NAME})
+
+    assert db.blob_reservation.count_documents({}) == 0
+    assert os.path.exists(tmp_path / NAME)
+
+
+def test_expired_reservation_does_not_keep_the_blob(tmp_path, db):
+    _store(tmp_path)
+    db.blob_reservation.insert_one({"name": NAME, "created_at": time.time() - RESERVATION_SECONDS - 1})
+
+    assert release_blob(db.session, str(tmp_path), NAME, db.blob_reservation) is True
+    assert not os.path.exists(tmp_path / NAME)
+
+
+def test_reservation_made_during_release_restores_the_blob(tmp_path, db):
+    class ReservedMeanwhile:
+        """Reservations that gain one for the blob right after the first reference count."""
+
+        def __init__(self, collection):
+            self.collection = collection
+            self.counts = 0
+
+        def count_documents(self, query, **kwargs):
+            count = self.collection.count_documents(query, **kwargs)
+            self.counts += 1
+            if self.counts == 1:
+                self.collection.insert_one({"name": NAME, "created_at": time.time()})
+            return count
+
+    _store(tmp_path)
+
+    assert release_blob(db.session, str(tmp_path), NAME, ReservedMeanwhile(db.blob_reservation)) is False
+    assert os.listdir(tmp_path) == [NAME]
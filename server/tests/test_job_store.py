@@ -0,0 +1,129 @@
+import mongomock
+import pytest
+
+from utils.job_store import MongoJobStore, SQLiteJobStore, queue_load
+
+
+@pytest.fixture(params=["sqlite", "mongo"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    return MongoJobStore(mongomock.MongoClient().db.session)
+
+
+def _enqueue(store, estimated_seconds, priority="interactive", user_id="user"):
+    """Queue a job on a new session and return its session ID."""
+    if isinstance(store, MongoJobStore):
+        session_id = str(store.collection.insert_one({"video_path": "video.mp4"}).inserted_id)
+    else:
+        session_id = f"session-{estimated_seconds}-{priority}"
+    store.enqueue(session_id, "video.mp4", user_id, None, priority=priority, estimated_seconds=estimated_seconds)
+    return session_id
+
+
+def test_claim_takes_the_shortest_job_first(store):
+    long_job = _enqueue(store, 300.0)
+    short_job = _enqueue(store, 30.0)
+
+    first = store.claim("worker-a", lease_seconds=60)
+    second = store.claim("worker-b", lease_seconds=60)
+
+    assert first["session_id"] == short_job
+    assert second["session_id"] == long_job
+    assert (first["state"], first["owner"], first["attempts"]) == ("leased", "worker-a", 1)
+    assert store.claim("worker-a", lease_seconds=60) is None
+
+
+def test_expired_lease_is_requeued_for_another_worker(store):
+    session_id = _enqueue(store, 30.0)
+    store.claim("dead-worker", lease_seconds=-1)
+
+    assert store.expire_leases(max_attempts=3) == []
+    job = store.claim("worker-b", lease_seconds=60)
+
+    assert job["session_id"] == session_id
+    assert job["attempts"] == 2
+
+
+def test_job_fails_once_it_used_every_attempt(store):
+    session_id = _enqueue(store, 30.0)
+    store.claim("dead-worker", lease_seconds=-1)
+
+    exhausted = store.expire_leases(max_attempts=1)
+
+    assert [job["session_id"] for job in exhausted] == [session_id]
+    assert store.get(session_id)["state"] == "failed"
+    assert store.claim("worker-b", lease_seconds=60) is None
+
+
+def test_heartbeat_keeps_the_lease(store):
+    session_id = _enqueue(store, 30.0)
+    store.claim("worker-a", lease_seconds=-1)
+
+    store.heartbeat([session_id], "worker-a", lease_seconds=60)
+
+    assert store.expire_leases(max_attempts=3) == []
+    assert store.get(session_id)["state"] == "leased"
+
+
+def test_heartbeat_from_a_former_owner_is_ignored(store):
+    session_id = _enqueue(store, 30.0)
+    store.claim("worker-a", lease_seconds=-1)
+    store.expire_leases(max_attempts=3)
+
+    store.heartbeat([session_id], "worker-a", lease_seconds=60)
+
+    assert store.get(session_id)["state"] == "queued"
+
+
+def test_cancelled_job_stays_cancelled_when_its_worker_finishes(store):
+    session_id = _enqueue(store, 30.0)
+    store.claim("worker-a", lease_seconds=60)
+
+    assert store.cancel(session_id) is True
+    assert store.cancelled([session_id]) == [session_id]
+    store.complete(session_id, "worker-a")
+
+    assert store.get(session_id)["state"] == "cancelled"
+    assert store.cancel(session_id) is False
+
+
+def test_requeuing_a_finished_job_resets_its_attempts(store):
+    session_id = _enqueue(store, 30.0)
+    store.claim("worker-a", lease_seconds=60)
+    store.fail(session_id, "worker-a", "boom")
+
+    store.enqueue(session_id, "video.mp4", "user", None, estimated_seconds=30.0)
+
+    assert store.claim("worker-a", lease_seconds=60)["attempts"] == 1
+
+
+def test_recover_requeues_orphaned_and_expired_jobs(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    store.enqueue("orphaned", "a.mp4", "user", "old-server", estimated_seconds=30.0)
+    store.enqueue("interrupted", "b.mp4", "user", "old-server", estimated_seconds=30.0)
+    store.lease("interrupted", "old-server", lease_seconds=-1)
+    store.enqueue("exhausted", "c.mp4", "user", "old-server", estimated_seconds=30.0)
+    for _ in range(3):
+        store.lease("exhausted", "old-server", lease_seconds=-1)
+    store.enqueue("mine", "d.mp4", "user", "new-server", estimated_seconds=30.0)
+
+    recovered = store.recover("new-server", max_attempts=3)
+
+    assert sorted(job["session_id"] for job in recovered["requeue"]) == ["interrupted", "orphaned"]
+    assert [job["session_id"] for job in recovered["exhausted"]] == ["exhausted"]
+    assert store.get("interrupted")["owner"] == "new-server"
+    assert store.get("exhausted")["state"] == "failed"
+
+
+def test_queue_load_counts_leased_work_by_remaining_time(store):
+    _enqueue(store, 100.0, user_id="alice")
+    _enqueue(store, 50.0, user_id="bob")
+    store.claim("worker-a", lease_seconds=60)  # bob's shorter job
+
+    load = queue_load(store.active_jobs(), "alice")
+
+    assert (load["queued"], load["running"], load["workers"]) == (1, 1, 1)
+    assert load["queued_seconds"] == 100.0
+    assert 149.0 <= load["pending_seconds"] <= 150.0
+    assert (load["user_jobs"], load["user_remaining_seconds"]) == (1, 100.0)
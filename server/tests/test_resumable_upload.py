@@ -0,0 +1,147 @@
+import hashlib
+import io
+import time
+
+import mongomock
+import pytest
+
+from utils.resumable_upload import CLAIM_STALE_SECONDS, ResumableUploads, UploadError, parse_content_range
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.fixture
+def uploads(tmp_path):
+    return ResumableUploads(mongomock.MongoClient().db.upload, str(tmp_path))
+
+
+@pytest.fixture
+def upload(uploads):
+    return uploads.create("user", "mp4", len(DATA), {"title": "Talk"})
+
+
+def _write(uploads, upload, start, end):
+    return uploads.write(upload, start, end - start, io.BytesIO(DATA[start:end]))
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes 0-1023/4096", (0, 1024, 4096)),
+    ("bytes 1024-1024/4096", (1024, 1, 4096)),
+    (" bytes 2048-4095/* ", (2048, 2048, None)),
+])
+def test_parse_content_range(header, expected):
+    assert parse_content_range(header) == expected
+
+
+@pytest.mark.parametrize("header", [None, "", "bytes 10-5/100", "bytes=0-10/100", "bytes 0-/100", "items 0-1/2"])
+def test_parse_content_range_rejects(header):
+    with pytest.raises(UploadError) as error:
+        parse_content_range(header)
+    assert error.value.status == 400
+
+
+def test_chunks_in_order_complete_with_content_hash(uploads, upload):
+    assert _write(uploads, upload, 0, 4096) == 4096
+    assert _write(uploads, upload, 4096, len(DATA)) == len(DATA)
+
+    path, digest = uploads.complete(upload)
+
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+    assert digest == hashlib.sha256(DATA).hexdigest()
+    assert uploads.get(upload["_id"], "user") is None
+
+
+def test_hash_is_rebuilt_when_another_process_wrote_the_previous_chunk(uploads, upload):
+    _write(uploads, upload, 0, 4096)
+    other_process = ResumableUploads(uploads.collection, uploads.upload_folder)
+    _write(other_process, upload, 4096, len(DATA))
+
+    assert other_process.complete(upload)[1] == hashlib.sha256(DATA).hexdigest()
+
+
+def test_out_of_order_chunk_reports_the_offset(uploads, upload):
+    _write(uploads, upload, 0, 4096)
+
+    with pytest.raises(UploadError) as error:
+        _write(uploads, upload, 8192, len(DATA))
+
+    assert (error.value.status, error.value.offset) == (409, 4096)
+
+
+def test_chunk_past_declared_size_is_rejected(uploads, upload):
+    with pytest.raises(UploadError) as error:
+        uploads.write(upload, 0, len(DATA) + 1, io.BytesIO(DATA + b"x"))
+
+    assert error.value.status == 413
+    assert uploads.get(upload["_id"], "user")["received"] == 0
+
+
+def test_dropped_connection_keeps_the_bytes_that_arrived(uploads, upload):
+    with pytest.raises(UploadError) as error:
+        uploads.write(upload, 0, 8192, io.BytesIO(DATA[:3000]))
+
+    assert (error.value.status, error.value.offset) == (400, 3000)
+    assert uploads.get(upload["_id"], "user")["received"] == 3000
+    _write(uploads, upload, 3000, len(DATA))
+    assert uploads.complete(upload)[1] == hashlib.sha256(DATA).hexdigest()
+
+
+def test_complete_with_missing_bytes_is_rejected(uploads, upload):
+    _write(uploads, upload, 0, 4096)
+
+    with pytest.raises(UploadError) as error:
+        uploads.complete(upload)
+
+    assert (error.value.status, error.value.offset) == (409, 4096)
+
+
+def test_second_finalize_is_rejected(uploads, upload):
+    _write(uploads, upload, 0, len(DATA))
+    finished = uploads.get(upload["_id"], "user")
+    uploads.complete(finished)
+
+    with pytest.raises(UploadError) as error:
+        uploads.complete(finished)
+
+    assert error.value.status == 404
+
+
+def test_chunk_being_written_elsewhere_is_refused(uploads, upload):
+    uploads.collection.update_one({"_id": upload["_id"]}, {"$set": {"writer": "other", "writer_ts": time.time()}})
+
+    with pytest.raises(UploadError) as error:
+        _write(uploads, upload, 0, 4096)
+
+    assert (error.value.status, error.value.offset) == (409, 0)
+
+
+def test_stale_claim_is_taken_over(uploads, upload):
+    stale = time.time() - CLAIM_STALE_SECONDS - 1
+    uploads.collection.update_one({"_id": upload["_id"]}, {"$set": {"writer": "dead", "writer_ts": stale}})
+
+    assert _write(uploads, upload, 0, 4096) == 4096
+    assert uploads.get(upload["_id"], "user").get("writer") is None
+
+
+def test_writer_that_lost_its_claim_does_not_record(uploads, upload):
+    class TakenOver(io.BytesIO):
+        def read(self, size=-1):
+            uploads.collection.update_one({"_id": upload["_id"]}, {"$set": {"writer": "other"}})
+            return super().read(size)
+
+    with pytest.raises(UploadError) as error:
+        uploads.write(upload, 0, 4096, TakenOver(DATA[:4096]))
+
+    assert error.value.status == 409
+    assert uploads.get(upload["_id"], "user")["received"] == 0
+
+
+def test_discard_removes_record_and_file(uploads, upload):
+    _write(uploads, upload, 0, 4096)
+
+    uploads.discard(upload)
+
+    assert uploads.get(upload["_id"], "user") is None
+    with pytest.raises(FileNotFoundError):
+        open(uploads.path(upload), "rb")
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from utils.transcription import cache_options
+from utils.transcription_cache import hash_audio, make_cache_key
+
+PERFORMANCE_ENV = ("WHISPER_BATCH_SIZE", "WHISPER_CPU_QUANTIZE", "WHISPER_COMPUTE_TYPE",
+                   "WHISPER_CHUNK_SECONDS", "WHISPER_CHUNK_OVERLAP_SECONDS")
+
+
+@pytest.fixture(autouse=True)
+def default_settings(monkeypatch):
+    for name in PERFORMANCE_ENV:
+        monkeypatch.delenv(name, raising=False)
+
+
+def _key(**overrides):
+    options = dict(word_timestamps=True, decode_options=None, chunked=False, backend_name="whisper")
+    options.update(overrides)
+    return make_cache_key("audio", options["backend_name"], "base", cache_options(**options))
+
+
+def test_same_settings_give_the_same_key():
+    assert _key() == _key()
+
+
+@pytest.mark.parametrize("overrides", [
+    {"word_timestamps": False},
+    {"decode_options": {"beam_size": 5}},
+    {"chunked": True},
+    {"backend_name": "ctranslate2"},
+])
+def test_transcript_affecting_options_change_the_key(overrides):
+    assert _key(**overrides) != _key()
+
+
+def test_cpu_quantization_changes_the_key(monkeypatch):
+    plain = _key()
+    monkeypatch.setenv("WHISPER_CPU_QUANTIZE", "1")
+    assert _key() != plain
+
+
+def test_chunk_settings_change_the_key_only_for_chunked_jobs(monkeypatch):
+    chunked, whole = _key(chunked=True), _key()
+    monkeypatch.setenv("WHISPER_CHUNK_SECONDS", "60")
+    assert _key(chunked=True) != chunked
+    assert _key() == whole
+
+
+def test_batched_decoding_only_applies_to_greedy_jobs_without_word_timings(monkeypatch):
+    monkeypatch.setenv("WHISPER_BATCH_SIZE", "8")
+    assert cache_options(False, None, False, "whisper")["batched"] is True
+    assert cache_options(True, None, False, "whisper")["batched"] is False
+    assert cache_options(False, {"beam_size": 5}, False, "whisper")["batched"] is False
+
+
+def test_audio_hash_depends_on_samples_not_the_container(tmp_path):
+    samples = (np.sin(np.linspace(0, 200, 16000)) * 16000).astype(np.int16)
+    first, second, other = tmp_path / "a.wav", tmp_path / "b.flac", tmp_path / "c.wav"
+    sf.write(first, samples, 16000, subtype="PCM_16")
+    sf.write(second, samples, 16000, subtype="PCM_16")
+    sf.write(other, samples // 2, 16000, subtype="PCM_16")
+
+    assert hash_audio(str(first)) == hash_audio(str(second))
+    assert hash_audio(str(first)) != hash_audio(str(other))
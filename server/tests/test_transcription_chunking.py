@@ -0,0 +1,73 @@
+import numpy as np
+
+from utils.transcription_chunking import find_cut_points, plan_chunks, stitch_chunk_results
+
+
+def _segment(start, end, text):
+    return {"start": start, "end": end, "text": text}
+
+
+def test_plan_chunks_owns_contiguous_ranges_and_overlaps_backwards():
+    chunks = plan_chunks(100.0, [40.0, 75.0], overlap_seconds=2.0)
+
+    assert [(c["own_start"], c["own_end"]) for c in chunks] == [(0.0, 40.0), (40.0, 75.0), (75.0, 100.0)]
+    assert [(c["start"], c["end"]) for c in chunks] == [(0.0, 40.0), (38.0, 75.0), (73.0, 100.0)]
+    assert [c["index"] for c in chunks] == [0, 1, 2]
+
+
+def test_find_cut_points_snaps_to_the_quietest_frame():
+    sample_rate = 1000
+    samples = np.ones(100 * sample_rate, dtype=np.float32)
+    samples[43 * sample_rate:44 * sample_rate] = 0.0  # a pause near the first nominal boundary
+
+    cuts = find_cut_points(samples, sample_rate, chunk_seconds=40.0)
+
+    assert len(cuts) == 1
+    assert 43.0 <= cuts[0] <= 44.0
+
+
+def test_find_cut_points_leaves_short_audio_whole():
+    assert find_cut_points(np.ones(50 * 1000, dtype=np.float32), 1000, chunk_seconds=40.0) == []
+
+
+def test_stitch_offsets_timestamps_and_removes_repeated_seam_words():
+    chunks = plan_chunks(20.0, [10.0], overlap_seconds=2.0)
+    results = [
+        {"language": "en", "segments": [_segment(0.0, 9.8, " Welcome to the quarterly review.")]},
+        # Decoded from 8.0s: the first segment repeats the seam words before the new ones.
+        {"language": "en", "segments": [_segment(2.5, 5.0, " quarterly review. Revenue grew"),
+                                        _segment(5.0, 9.0, " ten percent.")]},
+    ]
+
+    merged = stitch_chunk_results(chunks, results)
+
+    assert merged["text"] == "Welcome to the quarterly review. Revenue grew ten percent."
+    assert [s["id"] for s in merged["segments"]] == [0, 1, 2]
+    assert merged["segments"][1]["start"] == 10.5
+    assert merged["segments"][2]["end"] == 17.0
+    assert merged["language"] == "en"
+
+
+def test_stitch_drops_segments_owned_by_the_previous_chunk():
+    chunks = plan_chunks(20.0, [10.0], overlap_seconds=2.0)
+    results = [
+        {"segments": [_segment(0.0, 9.5, " First part.")]},
+        # Midpoint 9.0s on the original timeline falls in chunk 0's range: already transcribed there.
+        {"segments": [_segment(0.5, 1.5, " part."), _segment(2.5, 6.0, " Second part.")]},
+    ]
+
+    merged = stitch_chunk_results(chunks, results)
+
+    assert merged["text"] == "First part. Second part."
+    assert len(merged["segments"]) == 2
+    assert merged["language"] == "en"
+
+
+def test_stitch_matches_seam_words_regardless_of_case_and_punctuation():
+    chunks = plan_chunks(20.0, [10.0], overlap_seconds=2.0)
+    results = [
+        {"segments": [_segment(0.0, 9.9, " Thank you, everyone")]},
+        {"segments": [_segment(2.1, 6.0, " everyone. Let's begin.")]},
+    ]
+
+    assert stitch_chunk_results(chunks, results)["text"] == "Thank you, everyone Let's begin."
@@ -0,0 +1,61 @@
+import pytest
+
+from utils.transcription_tiers import get_tiers, predict_latency, select_tier
+
+
+@pytest.fixture(autouse=True)
+def tier_settings(monkeypatch):
+    monkeypatch.setenv("WHISPER_MODEL_SIZE", "small")
+    monkeypatch.setenv("WHISPER_FAST_MODEL_SIZE", "tiny")
+    monkeypatch.setenv("WHISPER_REALTIME_FACTOR", "0.25")
+    monkeypatch.delenv("WHISPER_TIER", raising=False)
+    monkeypatch.delenv("TRANSCRIPTION_LATENCY_TARGET_SECONDS", raising=False)
+
+
+def test_standard_tier_without_a_latency_target():
+    tier = select_tier(600.0, queue_depth=5)
+
+    assert tier["name"] == "standard"
+    assert tier["model_size"] == "small"
+    assert tier["decode_options"] == {}
+    assert tier["reason"] == "default"
+
+
+def test_most_accurate_tier_that_fits_the_target():
+    # 120s of audio: accurate takes 120 * 0.25 * 2.5 = 75s
+    tier = select_tier(120.0, queue_depth=0, latency_target=100.0)
+
+    assert tier["name"] == "accurate"
+    assert tier["decode_options"] == {"beam_size": 5, "best_of": 5, "temperature_fallback": True}
+
+
+def test_load_degrades_to_faster_tiers():
+    assert select_tier(120.0, queue_depth=1, latency_target=100.0)["name"] == "standard"
+    assert select_tier(120.0, queue_depth=3, latency_target=100.0)["name"] == "fast"
+
+
+def test_fastest_tier_when_no_tier_fits():
+    tier = select_tier(3600.0, queue_depth=10, latency_target=10.0)
+
+    assert tier["name"] == "fast"
+    assert tier["model_size"] == "tiny"
+    assert tier["chunked"] is True
+    assert tier["reason"].startswith("fastest tier")
+
+
+def test_forced_tier_wins_over_the_target(monkeypatch):
+    monkeypatch.setenv("WHISPER_TIER", "accurate")
+
+    tier = select_tier(3600.0, queue_depth=10, latency_target=10.0)
+
+    assert tier["name"] == "accurate"
+    assert tier["reason"] == "WHISPER_TIER"
+
+
+def test_chunked_tier_spreads_its_own_decode_over_the_workers():
+    tiers = get_tiers()
+    fast, standard = tiers["fast"], tiers["standard"]
+
+    assert predict_latency(fast, 100.0, queue_depth=0, workers=4) == pytest.approx(100 * 0.25 * 0.35 / 4)
+    assert predict_latency(standard, 100.0, queue_depth=0, workers=4) == pytest.approx(100 * 0.25)
+    assert predict_latency(standard, 100.0, queue_depth=2, workers=2) == pytest.approx(2 * 25 / 2 + 25)
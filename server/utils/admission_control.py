@@ -0,0 +1,171 @@
+"""
+Analysis Admission Control
+Decides whether a new analysis request is accepted now or told to come back later (HTTP 429).
+
+A request is turned away when accepting it would push the server past one of its limits:
+- the user already has ANALYSIS_MAX_JOBS_PER_USER analyses queued or running
+- ANALYSIS_MAX_QUEUE jobs are already waiting
+- the estimated analysis seconds of queued and running work exceed ANALYSIS_MAX_PENDING_SECONDS
+- available memory is below ANALYSIS_MIN_FREE_MEMORY_MB while other analyses are running (with
+  nothing running, the job is admitted: waiting would not free any memory)
+Each rejection carries a Retry-After estimate and the expected start time of the backlog.
+A limit set to 0 is disabled.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+MIN_RETRY_AFTER_SECONDS = 5
+MAX_RETRY_AFTER_SECONDS = 600
+MEMORY_RETRY_AFTER_SECONDS = 30
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def get_max_queue_depth() -> int:
+    """Jobs allowed to wait for a worker (ANALYSIS_MAX_QUEUE, default 20)."""
+    return max(0, int(_env_float("ANALYSIS_MAX_QUEUE", 20)))
+
+
+def get_max_pending_seconds() -> float:
+    """Estimated analysis seconds allowed in the backlog (ANALYSIS_MAX_PENDING_SECONDS, default 3600)."""
+    return max(0.0, _env_float("ANALYSIS_MAX_PENDING_SECONDS", 3600.0))
+
+
+def get_min_free_memory_mb() -> float:
+    """Memory that must stay available to accept a job (ANALYSIS_MIN_FREE_MEMORY_MB, default 256)."""
+    return max(0.0, _env_float("ANALYSIS_MIN_FREE_MEMORY_MB", 256.0))
+
+
+def get_max_jobs_per_user() -> int:
+    """Queued plus running analyses per user (ANALYSIS_MAX_JOBS_PER_USER, default 2)."""
+    return max(0, int(_env_float("ANALYSIS_MAX_JOBS_PER_USER", 2)))
+
+
+def get_available_memory_mb() -> Optional[float]:
+    """Available physical memory in MB (psutil, /proc/meminfo or Win32), or None if unknown."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available / (1024 * 1024)
+    except Exception:
+        pass
+
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/meminfo", "r") as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) / 1024
+        except Exception:
+            return None
+
+    if sys.platform == "win32":
+        try:
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [
+                    ("dwLength", ctypes.c_ulong),
+                    ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong),
+                    ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong),
+                    ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong),
+                    ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+                ]
+
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return status.ullAvailPhys / (1024 * 1024)
+        except Exception:
+            return None
+    return None
+
+
+class AdmissionRejected(Exception):
+    """An analysis request the server cannot take right now."""
+
+    def __init__(self, reason: str, message: str, retry_after: float, estimated_wait_seconds: float):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+        self.retry_after = int(max(MIN_RETRY_AFTER_SECONDS, min(MAX_RETRY_AFTER_SECONDS, retry_after)))
+        self.estimated_wait_seconds = round(max(0.0, estimated_wait_seconds), 1)
+
+    def to_dict(self) -> Dict:
+        return {
+            "success": False,
+            "error": self.message,
+            "reason": self.reason,
+            "retry_after": self.retry_after,
+            "estimated_wait_seconds": self.estimated_wait_seconds,
+            "estimated_start": (datetime.now() + timedelta(seconds=self.estimated_wait_seconds)).isoformat(),
+        }
+
+
+def check_admission(load: Dict, estimated_seconds: float = 0.0) -> Optional[AdmissionRejected]:
+    """
+    Admission decision for one new job.
+
+    Args:
+        load: Current load from AnalysisManager: queued, running, pending_seconds (queued + remaining
+            running work), workers, user_jobs and user_remaining_seconds (soonest of the
+            user's jobs to finish)
+        estimated_seconds: Estimated analysis seconds of the new job
+
+    Returns:
+        None if the job is admitted, else the AdmissionRejected to report
+    """
+    workers = max(1, load.get("workers") or 1)
+    pending = load.get("pending_seconds") or 0.0
+    wait = pending / workers  # until a worker would reach a job queued now
+
+    max_user_jobs = get_max_jobs_per_user()
+    if max_user_jobs and load.get("user_jobs", 0) >= max_user_jobs:
+        return AdmissionRejected(
+            "user_quota",
+            f"You already have {load['user_jobs']} analyses in progress (limit {max_user_jobs}). "
+            "Please wait for one to finish.",
+            load.get("user_remaining_seconds") or wait,
+            wait,
+        )
+
+    max_queue = get_max_queue_depth()
+    queued = load.get("queued", 0)
+    if max_queue and queued >= max_queue:
+        return AdmissionRejected(
+            "queue_full",
+            f"The analysis queue is full ({queued} waiting). Please try again later.",
+            wait / max(1, queued),  # until roughly one queued job has started
+            wait,
+        )
+
+    max_pending = get_max_pending_seconds()
+    if max_pending and pending > 0 and pending + estimated_seconds > max_pending:
+        return AdmissionRejected(
+            "backlog",
+            "The server is busy with other analyses. Please try again later.",
+            (pending + estimated_seconds - max_pending) / workers,
+            wait,
+        )
+
+    min_free = get_min_free_memory_mb()
+    available = get_available_memory_mb() if min_free and load.get("running") else None
+    if available is not None and available < min_free:
+        return AdmissionRejected(
+            "memory",
+            "The server is low on memory. Please try again shortly.",
+            MEMORY_RETRY_AFTER_SECONDS,
+            wait,
+        )
+    return None
@@ -0,0 +1,105 @@
+"""
+Analysis Checkpoints
+Per-stage outputs of an analysis run, kept on disk until the run succeeds.
+
+When a late stage fails (video analysis, scoring, feedback), a retry of the same session loads
+the checkpoints of the stages that already finished and resumes from the first incomplete one
+instead of extracting and transcribing the audio again. Checkpoints are tied to the uploaded
+video (path, size and mtime): a different file for the session invalidates all of them.
+
+Stored as one JSON file per stage under cache/checkpoints/<session_id>/.
+"""
+
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+from utils.path_utils import get_cache_dir
+
+# Bump when the stored stage outputs change shape.
+CHECKPOINT_VERSION = 1
+
+
+def checkpoints_enabled() -> bool:
+    """ANALYSIS_CHECKPOINTS=0 disables stage checkpoints (enabled by default)."""
+    return (os.getenv("ANALYSIS_CHECKPOINTS") or "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def get_checkpoint_dir(session_id: str) -> Path:
+    return Path(get_cache_dir()).joinpath("checkpoints", str(session_id))
+
+
+def _fingerprint(video_path: str) -> Optional[Dict]:
+    try:
+        stat = os.stat(video_path)
+    except OSError:
+        return None
+    return {"video": os.path.abspath(video_path), "size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def _to_json(value):
+    # numpy scalars/arrays from the analyzers
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def load_checkpoints(session_id: str, video_path: str) -> Dict[str, Dict]:
+    """
+    Checkpointed stage outputs for this session that still match its video.
+
+    Returns:
+        Dictionary of stage name -> stored output (empty when nothing can be reused)
+    """
+    if not checkpoints_enabled():
+        return {}
+    directory = get_checkpoint_dir(session_id)
+    if not directory.is_dir():
+        return {}
+
+    fingerprint = _fingerprint(video_path)
+    checkpoints = {}
+    for path in directory.glob("*.json"):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except Exception as e:
+            print(f"[Checkpoints] WARNING: Ignoring unreadable checkpoint {path}: {e}")
+            continue
+        if entry.get("version") != CHECKPOINT_VERSION or entry.get("fingerprint") != fingerprint:
+            continue
+        checkpoints[path.stem] = entry["data"]
+    return checkpoints
+
+
+def save_checkpoint(session_id: str, video_path: str, stage: str, data: Dict):
+    """Store one stage's output atomically. Failures are logged, never raised."""
+    if not checkpoints_enabled():
+        return
+    try:
+        directory = get_checkpoint_dir(session_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{stage}.json"
+        tmp_path = path.with_name(f"{stage}.{uuid.uuid4().hex[:8]}.tmp")
+        entry = {
+            "version": CHECKPOINT_VERSION,
+            "fingerprint": _fingerprint(video_path),
+            "saved_at": time.time(),
+            "data": data,
+        }
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, default=_to_json)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"[Checkpoints] WARNING: Could not save '{stage}' checkpoint for session {session_id}: {e}")
+
+
+def clear_checkpoints(session_id: str):
+    """Delete every checkpoint of a session (after a successful run or when it is deleted)."""
+    directory = get_checkpoint_dir(session_id)
+    if directory.is_dir():
+        shutil.rmtree(directory, ignore_errors=True)
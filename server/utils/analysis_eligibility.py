@@ -82,3 +82,31 @@ def check_analysis_eligibility(
     is_eligible = len(warnings) == 0
     
     return is_eligible, warnings, eligibility_details
+
+
+def check_media_eligibility(media: Dict) -> Tuple[bool, List[str]]:
+    """
+    The hard rules that can be checked from probed media metadata alone (before any audio is
+    extracted or transcribed): duration, audio track and frame count. Unknown values pass;
+    the full check after transcription still applies.
+    
+    Args:
+        media: Metadata from utils.media_probe.probe_media
+    
+    Returns:
+        Tuple of (is_eligible: bool, warnings: List[str])
+    """
+    warnings = []
+    duration = media.get("duration")
+    frame_count = media.get("frame_count")
+    
+    if not media.get("has_video"):
+        warnings.append("No video track detected in file")
+    if duration is not None and duration < MIN_VIDEO_DURATION_SECONDS:
+        warnings.append(f"Video duration ({duration:.1f}s) is less than minimum required ({MIN_VIDEO_DURATION_SECONDS}s)")
+    if not media.get("has_audio"):
+        warnings.append("No audio track detected in video")
+    if media.get("has_video") and frame_count is not None and frame_count < MIN_TOTAL_FRAMES:
+        warnings.append(f"Insufficient video frames ({frame_count} frames, minimum {MIN_TOTAL_FRAMES} required)")
+    
+    return len(warnings) == 0, warnings
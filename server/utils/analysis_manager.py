@@ -1,15 +1,105 @@
 """
 Thread-Safe Analysis Manager
-Manages background video analysis with progress tracking
+Manages background video analysis with progress tracking.
+Jobs wait in a shortest-job-first queue with priority classes (see analysis_scheduler) and run
+on a pool of worker threads (ANALYSIS_MAX_WORKERS, or resized by the autoscaler);
+with ANALYSIS_EXECUTOR=process each pool slot hands its jobs to a warm worker process
+(see analysis_processes). Jobs are also recorded in a durable job store with leases and
+heartbeats, so work interrupted by a restart resumes automatically (see job_store), and each
+finished stage is checkpointed so a retry skips it (see analysis_checkpoints).
+Progress changes are pushed to subscribers (the SSE progress stream) as they happen.
+
+With a shared queue (ANALYSIS_QUEUE_BACKEND=mongo|sqlite) the API process only enqueues and reads
+progress back from the job records; standalone workers (worker.py) claim the jobs, run them
+with run_worker() and report their progress into the store.
 """
 
+import queue
+import socket
 import threading
 import time
-from typing import Dict, Optional
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from bson import ObjectId
 from datetime import datetime
 import os
+from utils.admission_control import check_admission
+from utils.analysis_checkpoints import clear_checkpoints, load_checkpoints, save_checkpoint
 from utils.analysis_pipeline import analyze_presentation_video
+from utils.analysis_scheduler import DEFAULT_PRIORITY, PRIORITY_CLASSES, AnalysisScheduler, estimate_job_cost
+
+
+MIN_WORDS_FOR_SPEECH = 10  # Minimum words to consider speech detected
+
+# Stored with each result; bump when stages, scoring or feedback change what an analysis produces,
+# so results of an identical upload are only reused when this version made them.
+ANALYSIS_PIPELINE_VERSION = 1
+
+# Session fields copied when an identical upload's results are reused (see reuse_results)
+REUSABLE_RESULT_FIELDS = (
+    "analysis_report", "feedback", "analysis_status", "score", "grade", "speech_detected",
+    "face_detected", "word_count", "audio_present", "metric_availability", "warning_message",
+    "transcript_stage", "transcription_tier", "analysis_pipeline_version",
+)
+# Most recent candidate donors considered by reuse_results
+REUSE_CANDIDATES = 20
+
+# Share of the overall progress bar per stage. The video stage runs concurrently with the
+# audio chain (extraction -> transcription -> audio -> text), so progress is the weighted sum.
+STAGE_WEIGHTS = {
+    "audio_extraction": 10,
+    "transcription": 25,
+    "audio_analysis": 10,
+    "text_analysis": 10,
+    "video_analysis": 35,
+    "scoring": 10,
+}
+
+
+# Shared queue: least interval between a worker's progress writes for one job, and how often an
+# API node re-reads the progress of sessions with open progress streams.
+PROGRESS_REPORT_SECONDS = 1.0
+SHARED_PROGRESS_POLL_SECONDS = 1.0
+
+
+def _occupies_worker(progress: Dict) -> bool:
+    """True while a job holds its pool slot, including the transcript refinement after its draft results."""
+    return progress.get("status") in ("running", "cancelling") or bool(progress.get("refining"))
+
+
+def _remaining_seconds(progress: Dict, now: float) -> float:
+    """Estimated seconds until a job frees its slot; refinement re-runs about the transcription share."""
+    if progress.get("refining"):
+        estimate = progress.get("estimated_seconds", 0.0) * STAGE_WEIGHTS["transcription"] / 100.0
+        started = progress.get("refine_started_ts", now)
+    else:
+        estimate = progress.get("estimated_seconds", 0.0)
+        started = progress.get("started_ts", now)
+    return max(0.0, estimate - (now - started))
+
+
+class AnalysisCancelled(Exception):
+    """Raised at a cancellation point once the session's analysis has been cancelled."""
+
+
+def resolve_max_workers() -> int:
+    """
+    Number of analyses that run at once (ANALYSIS_MAX_WORKERS, default 2).
+    Each one decodes audio, transcribes and runs MediaPipe, so this bounds CPU and memory use;
+    further requests wait in the queue.
+    """
+    try:
+        return max(1, int((os.getenv("ANALYSIS_MAX_WORKERS") or "2").strip()))
+    except ValueError:
+        return 2
+
+
+def resolve_executor() -> str:
+    """ANALYSIS_EXECUTOR: "thread" (default, jobs run in the server process) or "process"."""
+    value = (os.getenv("ANALYSIS_EXECUTOR") or "thread").strip().lower()
+    return "process" if value in ("process", "processes") else "thread"
 
 
 class AnalysisManager:
@@ -17,55 +107,796 @@ class AnalysisManager:
     
     def __init__(self):
         # Thread-safe storage for analysis progress
-        # Format: {session_id: {"status": "running|completed|failed", "progress": 0-100, "error": None}}
+        # Format: {session_id: {"status": "queued|running|completed|failed", "progress": 0-100, "error": None}}
         self._progress = {}
         self._lock = threading.Lock()
-        self._threads = {}  # Track running threads
+        self._queue = AnalysisScheduler()  # of (session_id, video_path, user_id, db_collection)
+        self._queue_ready = threading.Condition(self._lock)
+        self._workers = []
+        self.max_workers = resolve_max_workers()
+        # Pool slots in use: max_workers, or what the autoscaler currently allows (see autoscaler).
+        self.active_workers = self.max_workers
+        self._autoscaler = None
+        self._autoscaler_thread = None
+        self._job_seconds = deque(maxlen=20)  # wall time of recent jobs, for the autoscaler
+        self.executor = resolve_executor()
+        self._process_pool = None
+        self._budget_applied = False
+        self._budget_lock = threading.Lock()
+        # Identifies this server process as the owner of job leases in the job store.
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._leased = set()
+        self._heartbeat_thread = None
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._subscribers: Dict[str, List[queue.Queue]] = {}
+        # "standalone": jobs run in this process. "api": a shared queue is in use and this process
+        # only enqueues. "worker": claims jobs from the shared queue (run_worker).
+        from utils.job_store import is_shared_queue
+        self.role = "api" if is_shared_queue() else "standalone"
+        self._stopping = threading.Event()
+        self._reported: Dict[str, tuple] = {}  # session_id -> (monotonic time, status, version) last stored
+        self._progress_poller = None
     
-    def start_analysis(self, session_id: str, video_path: str, user_id: str, db_collection):
+    def start_analysis(self, session_id: str, video_path: str, user_id: str, db_collection,
+                       priority: str = DEFAULT_PRIORITY, admission: bool = True):
         """
-        Start analysis in background thread.
+        Queue an analysis; it starts when a pool worker is free and the scheduler picks it.
         
         Args:
             session_id: Session ID
             video_path: Path to video file
             user_id: User ID
             db_collection: MongoDB collection for sessions
+            priority: Priority class ("interactive" or "bulk")
+            admission: Apply admission control (off for jobs resumed after a restart)
+        
+        Returns:
+            False if the session is already queued or running
+        
+        Raises:
+            AdmissionRejected: The server is over capacity or the user is over quota
         """
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class '{priority}'")
+        # Probe outside the lock: ffprobe takes a moment on large files.
+        estimated_seconds = estimate_job_cost(video_path)
+        if self.role == "api":
+            return self._enqueue_shared(session_id, video_path, user_id, priority, estimated_seconds, admission)
+        
         with self._lock:
-            # Check if analysis already running
             if session_id in self._progress:
                 status = self._progress[session_id].get("status")
-                if status == "running":
-                    return False  # Already running
+                if status in ("queued", "running", "cancelling") or self._progress[session_id].get("refining"):
+                    return False
+            
+            if admission:
+                rejection = check_admission(self._load_locked(user_id), estimated_seconds)
+                if rejection is not None:
+                    print(f"[Analysis Manager] Rejected session {session_id}: {rejection.reason} "
+                          f"(retry after {rejection.retry_after}s)")
+                    raise rejection
             
-            # Initialize progress
             self._progress[session_id] = {
-                "status": "running",
+                "status": "queued",
                 "progress": 0,
+                "message": "Waiting for a free analysis worker...",
                 "error": None,
-                "started_at": datetime.now().isoformat()
+                "queued_at": datetime.now().isoformat(),
+                "priority": priority,
+                "estimated_seconds": round(estimated_seconds, 1),
+                "user_id": user_id
             }
+            self._queue.push((session_id, video_path, user_id, db_collection), priority, estimated_seconds)
+            self._cancel_events[session_id] = threading.Event()
+            position = self._queue.position(session_id)
+            self._ensure_workers_locked()
+            self._queue_ready.notify()
         
-        # Start background thread
-        thread = threading.Thread(
-            target=self._run_analysis,
-            args=(session_id, video_path, user_id, db_collection),
-            daemon=False,  # Not a daemon thread (survives Flask reload)
-            name=f"AnalysisThread-{session_id}"
-        )
-        thread.start()
-        print(f"[Analysis Manager] Started background thread '{thread.name}' for session {session_id}")
+        store = self._job_store()
+        if store is not None:
+            try:
+                store.enqueue(session_id, video_path, user_id, self.instance_id, priority, estimated_seconds)
+            except Exception as e:
+                print(f"[Analysis Manager] WARNING: Could not persist job for session {session_id}: {e}")
+        
+        # Shortest-job-first: a new job can move other queued jobs back.
+        self._publish_queued()
+        print(f"[Analysis Manager] Queued session {session_id} ({priority}, ~{estimated_seconds:.0f}s, "
+              f"position {position}, workers={self.max_workers})")
+        return True
+    
+    def _enqueue_shared(self, session_id: str, video_path: str, user_id: str, priority: str,
+                        estimated_seconds: float, admission: bool) -> bool:
+        """start_analysis on an API node: record the job in the shared queue for a worker to claim."""
+        store = self._job_store()
+        if store is None:
+            raise RuntimeError("The shared analysis queue is unavailable")
+        job = store.get(session_id)
+        if job and job.get("state") in ("queued", "leased"):
+            return False
+        if admission:
+            rejection = check_admission(self._shared_load(store, user_id), estimated_seconds)
+            if rejection is not None:
+                print(f"[Analysis Manager] Rejected session {session_id}: {rejection.reason} "
+                      f"(retry after {rejection.retry_after}s)")
+                raise rejection
+        store.enqueue(session_id, video_path, user_id, None, priority, estimated_seconds)
+        print(f"[Analysis Manager] Queued session {session_id} for the analysis workers "
+              f"({priority}, ~{estimated_seconds:.0f}s)")
+        return True
+    
+    def _ensure_workers_locked(self):
+        """Start pool threads up to active_workers (lazily, on the first queued job)."""
+        self._ensure_autoscaler_locked()
+        alive = {w.name: w for w in self._workers if w.is_alive()}
+        for index in range(self.active_workers):
+            name = f"AnalysisWorker-{index}"
+            if name in alive:
+                continue
+            worker = threading.Thread(
+                target=self._claim_loop if self.role == "worker" else self._worker_loop,
+                args=(index,),
+                daemon=True,  # Idle workers must not keep the process alive on shutdown
+                name=name
+            )
+            worker.start()
+            alive[name] = worker
+        self._workers = list(alive.values())
+        self._ensure_heartbeat_locked()
+    
+    def _ensure_heartbeat_locked(self):
+        if self._heartbeat_thread is None or not self._heartbeat_thread.is_alive():
+            self._heartbeat_thread = threading.Thread(
+                target=self._worker_heartbeat_loop if self.role == "worker" else self._heartbeat_loop,
+                daemon=True,
+                name="AnalysisJobHeartbeat"
+            )
+            self._heartbeat_thread.start()
+    
+    def _ensure_autoscaler_locked(self):
+        from utils.autoscaler import Autoscaler, autoscale_enabled
+        if not autoscale_enabled():
+            return
+        if self._autoscaler is None:
+            self._autoscaler = Autoscaler(self.max_workers)
+            self.active_workers = self._autoscaler.min_workers
+            print(f"[Autoscaler] Analysis workers scale between {self._autoscaler.min_workers} "
+                  f"and {self._autoscaler.max_workers}")
+        if self._autoscaler_thread is None or not self._autoscaler_thread.is_alive():
+            self._autoscaler_thread = threading.Thread(
+                target=self._autoscale_loop,
+                daemon=True,
+                name="AnalysisAutoscaler"
+            )
+            self._autoscaler_thread.start()
+    
+    def _autoscale_loop(self):
+        """Resize the pool every ANALYSIS_AUTOSCALE_INTERVAL_SECONDS from queue length, job latency and host headroom."""
+        from utils.autoscaler import get_autoscale_interval
+        while True:
+            time.sleep(get_autoscale_interval())
+            try:
+                busy, queued, queued_seconds = self._pool_load()
+                with self._lock:
+                    workers = self.active_workers
+                    job_seconds = sum(self._job_seconds) / len(self._job_seconds) if self._job_seconds else None
+                target, _ = self._autoscaler.decide(workers, busy, queued, queued_seconds, job_seconds)
+                if target != workers:
+                    self._scale_to(target)
+            except Exception as e:
+                print(f"[Autoscaler] WARNING: Scaling check failed: {e}")
+    
+    def _pool_load(self) -> tuple:
+        """(busy pool slots, queued jobs, their estimated seconds) for the autoscaler."""
+        if self.role == "worker":
+            # Standalone workers share the queue: it is the backlog of every worker.
+            from utils.job_store import queue_load
+            load = queue_load(self._job_store().active_jobs())
+            with self._lock:
+                busy = len(self._leased)
+            return busy, load["queued"], load["queued_seconds"]
+        with self._lock:
+            busy = sum(1 for p in self._progress.values() if _occupies_worker(p))
+            return busy, len(self._queue), self._queue.pending_seconds()
+    
+    def _scale_to(self, workers: int):
+        """Change the number of pool slots; a removed slot retires after its current job."""
+        with self._lock:
+            self.active_workers = max(1, min(self.max_workers, workers))
+            self._ensure_workers_locked()
+            self._queue_ready.notify_all()  # idle slots above the new size exit
+    
+    def _retire_slot(self, index: int):
+        """Pool slot `index` left the pool: stop its worker process in process mode."""
+        print(f"[Analysis Manager] {threading.current_thread().name} stopped (pool scaled down)")
+        if self.executor == "process" and self._process_pool is not None:
+            self._process_pool.retire(index)
+    
+    def _worker_loop(self, index: int):
+        """Pool thread: take the job the scheduler picks, run it, repeat."""
+        while True:
+            with self._queue_ready:
+                while not self._queue and index < self.active_workers:
+                    self._queue_ready.wait()
+                if index >= self.active_workers:
+                    job = None  # this slot was scaled away
+                else:
+                    job, entry = self._queue.pop()
+                    session_id = job[0]
+                    progress = self._progress.setdefault(session_id, {})
+                    progress["status"] = "running"
+                    progress["started_at"] = datetime.now().isoformat()
+                    progress["started_ts"] = time.time()
+                    progress["queue_wait_seconds"] = round(entry["waited_seconds"], 2)
+            if job is None:
+                self._retire_slot(index)
+                return
+            
+            print(f"[Analysis Manager] {threading.current_thread().name} picked up session {session_id} "
+                  f"({entry['priority']}, ~{entry['estimated_seconds']:.0f}s, waited {entry['waited_seconds']:.1f}s)")
+            self._publish(session_id)
+            self._publish_queued()
+            self._lease_job(session_id)
+            self._run_job(index, job)
+    
+    def _run_job(self, index: int, job: tuple):
+        """Run a leased job on pool slot `index`, then record its outcome."""
+        session_id = job[0]
+        started = time.monotonic()
+        try:
+            self._execute(index, *job)
+        except Exception as e:
+            # _run_analysis reports its own failures; this only keeps the worker alive.
+            print(f"[Analysis Manager] ERROR: Unhandled error for session {session_id}: {e}")
+        finally:
+            self._release_job(session_id)
+            with self._lock:
+                self._cancel_events.pop(session_id, None)
+                self._reported.pop(session_id, None)
+                self._job_seconds.append(time.monotonic() - started)
+    
+    def run_worker(self, workers: Optional[int] = None):
+        """
+        Standalone worker (worker.py): claim jobs from the shared queue and run them on `workers`
+        pool slots (default ANALYSIS_MAX_WORKERS) until stop_worker() is called.
+        Running jobs finish before this returns.
+        """
+        from utils.job_store import is_shared_queue
+        if not is_shared_queue():
+            raise RuntimeError("Standalone workers need ANALYSIS_QUEUE_BACKEND=mongo or sqlite")
+        if self._job_store() is None:
+            raise RuntimeError("The shared analysis queue is unavailable")
+        self.role = "worker"
+        if workers:
+            self.max_workers = max(1, workers)
+        self._stopping.clear()
+        with self._lock:
+            self.active_workers = self.max_workers
+            self._ensure_autoscaler_locked()  # may start smaller
+        try:
+            self.warm_up()
+        except Exception as e:
+            print(f"[Analysis Manager] WARNING: Warm-up failed, models load with the first job: {e}")
+        
+        with self._lock:
+            self._ensure_workers_locked()
+        print(f"[Analysis Manager] Worker {self.instance_id} claiming jobs with {self.active_workers} slot(s) "
+              f"({self.executor} executor)")
+        
+        while not self._stopping.wait(1.0):  # short waits keep Ctrl+C responsive on Windows
+            pass
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(1.0)
+        print(f"[Analysis Manager] Worker {self.instance_id} stopped")
+    
+    def stop_worker(self):
+        """Stop claiming new jobs; run_worker returns once the running ones are finished."""
+        self._stopping.set()
+    
+    def _claim_loop(self, index: int):
+        """Worker pool slot: claim the next shared job, run it, repeat."""
+        from config.database import get_collection
+        from utils.job_store import get_lease_seconds, get_worker_poll_seconds
+        poll_seconds = get_worker_poll_seconds()
+        while not self._stopping.is_set():
+            if index >= self.active_workers:
+                self._retire_slot(index)
+                return
+            try:
+                db_collection = get_collection("session")
+                job = self._job_store().claim(self.instance_id, get_lease_seconds())
+            except Exception as e:
+                print(f"[Analysis Manager] WARNING: Could not claim a job: {e}")
+                job = None
+            if job is None:
+                self._stopping.wait(poll_seconds)
+                continue
+            
+            session_id = job["session_id"]
+            now = time.time()
+            with self._lock:
+                self._progress[session_id] = {
+                    "status": "running",
+                    "progress": 0,
+                    "message": "Starting analysis...",
+                    "error": None,
+                    "priority": job.get("priority") or DEFAULT_PRIORITY,
+                    "estimated_seconds": job.get("estimated_seconds") or 0.0,
+                    "user_id": job["user_id"],
+                    "started_at": datetime.now().isoformat(),
+                    "started_ts": now,
+                    "queue_wait_seconds": round(now - job.get("created_at", now), 2),
+                }
+                self._leased.add(session_id)
+                self._cancel_events[session_id] = threading.Event()
+            
+            print(f"[Analysis Manager] {threading.current_thread().name} claimed session {session_id} "
+                  f"(attempt {job.get('attempts')}, ~{job.get('estimated_seconds') or 0:.0f}s)")
+            self._publish(session_id)
+            self._run_job(index, (session_id, self._shared_video_path(job["video_path"]), job["user_id"],
+                                  db_collection))
+    
+    def _shared_video_path(self, video_path: str) -> str:
+        """The job's video on this machine: its recorded path, else the same file under our UPLOAD_FOLDER."""
+        if os.path.exists(video_path):
+            return video_path
+        from utils.path_utils import resolve_uploads_dir
+        local_path = os.path.join(resolve_uploads_dir(os.getenv("UPLOAD_FOLDER")), os.path.basename(video_path))
+        return local_path if os.path.exists(local_path) else video_path
+    
+    def _worker_heartbeat_loop(self):
+        """
+        Worker: renew leases, apply cancellations made on an API node, flush throttled progress,
+        and requeue jobs of workers that died.
+        """
+        from utils.job_store import get_lease_seconds, get_max_attempts, get_worker_poll_seconds
+        poll_seconds = get_worker_poll_seconds()
+        last_renewal = 0.0
+        while True:
+            time.sleep(poll_seconds)
+            store = self._job_store()
+            with self._lock:
+                leased = list(self._leased)
+            try:
+                for session_id in store.cancelled(leased):
+                    if self.cancel_analysis(session_id):
+                        print(f"[Analysis Manager] Session {session_id} was cancelled on the API")
+                for session_id in leased:
+                    self._report_shared(session_id, force=True)
+                
+                lease_seconds = get_lease_seconds()
+                if time.monotonic() - last_renewal >= lease_seconds / 3.0:
+                    last_renewal = time.monotonic()
+                    store.heartbeat(leased, self.instance_id, lease_seconds)
+                    for job in store.expire_leases(get_max_attempts()):
+                        print(f"[Analysis Manager] Session {job['session_id']}: {job['error']}, giving up")
+                        from config.database import get_collection
+                        get_collection("session").update_one(
+                            {"_id": ObjectId(job["session_id"]), "analysis_status": "processing"},
+                            {"$set": {"analysis_status": "failed",
+                                      "analysis_error": f"{job['error']}. Please click Analyze again."}}
+                        )
+            except Exception as e:
+                print(f"[Analysis Manager] WARNING: Job heartbeat failed: {e}")
+    
+    def _job_store(self):
+        from utils.job_store import get_job_store
+        try:
+            return get_job_store()
+        except Exception as e:
+            print(f"[Analysis Manager] WARNING: Job store unavailable, jobs are not persisted: {e}")
+            return None
+    
+    def _lease_job(self, session_id: str):
+        store = self._job_store()
+        if store is None:
+            return
+        from utils.job_store import get_lease_seconds
+        try:
+            attempt = store.lease(session_id, self.instance_id, get_lease_seconds())
+            with self._lock:
+                self._leased.add(session_id)
+            if attempt > 1:
+                print(f"[Analysis Manager] Session {session_id}: attempt {attempt}")
+        except Exception as e:
+            print(f"[Analysis Manager] WARNING: Could not lease job for session {session_id}: {e}")
+    
+    def _release_job(self, session_id: str):
+        """Record the job's outcome in the job store once its run has finished."""
+        with self._lock:
+            self._leased.discard(session_id)
+            progress = self._progress.get(session_id) or {}
+        store = self._job_store()
+        if store is None:
+            return
+        try:
+            if progress.get("status") == "failed":
+                store.fail(session_id, self.instance_id, progress.get("error") or "Analysis failed")
+            elif progress.get("status") == "cancelled":
+                store.cancel(session_id)
+            else:
+                store.complete(session_id, self.instance_id)
+        except Exception as e:
+            print(f"[Analysis Manager] WARNING: Could not record job result for session {session_id}: {e}")
+    
+    def _heartbeat_loop(self):
+        """Renew leases of running jobs and pick up jobs whose lease expired elsewhere."""
+        from utils.job_store import get_lease_seconds
+        while True:
+            lease_seconds = get_lease_seconds()
+            time.sleep(lease_seconds / 3.0)
+            store = self._job_store()
+            if store is None:
+                continue
+            with self._lock:
+                leased = list(self._leased)
+            try:
+                if leased:
+                    store.heartbeat(leased, self.instance_id, lease_seconds)
+                self.recover_jobs()
+            except Exception as e:
+                print(f"[Analysis Manager] WARNING: Job heartbeat failed: {e}")
+    
+    def recover_jobs(self, db_collection=None) -> int:
+        """
+        Re-queue jobs left behind by a previous server run (or a worker whose lease expired).
+        Called on startup and periodically by the heartbeat thread.
+        
+        Returns:
+            Number of jobs put back in the queue
+        """
+        if self.role != "standalone":
+            # Shared queue: workers requeue each other's expired leases (_worker_heartbeat_loop).
+            return 0
+        store = self._job_store()
+        if store is None:
+            return 0
+        from utils.job_store import get_max_attempts
+        if db_collection is None:
+            # Before claiming anything: if the database is unreachable, leave the jobs unclaimed.
+            from config.database import get_collection
+            db_collection = get_collection("session")
+        recovered = store.recover(self.instance_id, get_max_attempts())
+        
+        for job in recovered["exhausted"]:
+            print(f"[Analysis Manager] Session {job['session_id']}: {job['error']}, giving up")
+            db_collection.update_one(
+                {"_id": ObjectId(job["session_id"]), "analysis_status": "processing"},
+                {"$set": {"analysis_status": "failed", "analysis_error": f"{job['error']}. Please click Analyze again."}}
+            )
+        
+        resumed = 0
+        for job in recovered["requeue"]:
+            session_id = job["session_id"]
+            try:
+                session = db_collection.find_one({"_id": ObjectId(session_id)}, {"analysis_status": 1})
+                if not session or session.get("analysis_status") != "processing":
+                    store.fail(session_id, self.instance_id, "Session no longer waiting for analysis")
+                    continue
+                if self.start_analysis(session_id, job["video_path"], job["user_id"], db_collection,
+                                       job.get("priority") or DEFAULT_PRIORITY, admission=False):
+                    resumed += 1
+                    print(f"[Analysis Manager] Resumed interrupted analysis for session {session_id} "
+                          f"(previous attempts: {job['attempts']})")
+            except Exception as e:
+                print(f"[Analysis Manager] WARNING: Could not resume session {session_id}, will retry: {e}")
+                store.unclaim(session_id)
+        return resumed
+    
+    def get_job(self, session_id: str) -> Optional[Dict]:
+        """Durable job record for a session (None if unknown or the job store is disabled)."""
+        store = self._job_store()
+        if store is None:
+            return None
+        try:
+            return store.get(session_id)
+        except Exception:
+            return None
+    
+    def _execute(self, index: int, session_id: str, video_path: str, user_id: str, db_collection):
+        """Run one job in this thread, or on pool slot `index`'s worker process in process mode."""
+        self._apply_resource_budget()
+        if self.executor != "process":
+            self._run_analysis(session_id, video_path, user_id, db_collection)
+            return
+        
+        with self._lock:
+            snapshot = {sid: dict(p) for sid, p in self._progress.items() if sid != session_id}
+        error = self._get_process_pool().run(index, session_id, video_path, user_id, snapshot)
+        with self._lock:
+            refining = (self._progress.get(session_id) or {}).get("refining")
+        if error and self._is_cancelled(session_id) and refining:
+            # cancel_analysis terminated the worker process while it refined: keep the draft.
+            try:
+                db_collection.update_one(
+                    {"_id": ObjectId(session_id), "refinement_status": "running"},
+                    {"$set": {"refinement_status": "cancelled"}}
+                )
+            except Exception:
+                pass
+            self._update_progress(session_id, 100, "Analysis complete (transcript refinement cancelled)", completed=True)
+        elif error and self._is_cancelled(session_id):
+            # cancel_analysis terminated the worker process.
+            self._mark_cancelled(session_id, db_collection)
+        elif error:
+            print(f"[Analysis Manager] ERROR: {error} (session {session_id})")
+            try:
+                db_collection.update_one(
+                    {"_id": ObjectId(session_id)},
+                    {"$set": {"analysis_status": "failed", "analysis_error": error}}
+                )
+            except Exception:
+                pass
+            self._update_progress(session_id, 0, f"Analysis failed: {error}", failed=True)
+    
+    def _load_locked(self, user_id: Optional[str] = None) -> Dict:
+        """Current load for admission control (see admission_control.check_admission)."""
+        now = time.time()
+        running_remaining = {}
+        for sid, progress in self._progress.items():
+            if _occupies_worker(progress):
+                running_remaining[sid] = _remaining_seconds(progress, now)
+        user_remaining = [
+            running_remaining.get(sid, progress.get("estimated_seconds", 0.0))
+            for sid, progress in self._progress.items()
+            if user_id is not None and progress.get("user_id") == user_id
+            and (progress.get("status") == "queued" or _occupies_worker(progress))
+        ]
+        return {
+            "queued": len(self._queue),
+            "running": len(running_remaining),
+            "pending_seconds": self._queue.pending_seconds() + sum(running_remaining.values()),
+            "workers": self.active_workers,
+            "user_jobs": len(user_remaining),
+            "user_remaining_seconds": min(user_remaining) if user_remaining else 0.0,
+        }
+    
+    def _shared_load(self, store, user_id: Optional[str] = None) -> Dict:
+        """Current load of the shared queue for admission control."""
+        from utils.job_store import queue_load
+        return queue_load(store.active_jobs(), user_id)
+    
+    def admission_check(self, user_id: str):
+        """
+        Early admission check before a request does any work (the new job's own cost unknown).
         
+        Returns:
+            None if a job would be admitted now, else the AdmissionRejected to report
+        """
+        if self.role == "api":
+            store = self._job_store()
+            return check_admission(self._shared_load(store, user_id)) if store is not None else None
         with self._lock:
-            self._threads[session_id] = thread
+            return check_admission(self._load_locked(user_id))
+    
+    def reuse_results(self, session: Dict, db_collection) -> bool:
+        """
+        Complete a session instantly with the results of another session whose upload has the
+        same content (content_sha256) and was analyzed to a final transcript by this
+        ANALYSIS_PIPELINE_VERSION, instead of queuing a new analysis.
+        
+        Only donors transcribed with the configured Whisper model qualify (not a load-shedding
+        fast model), and among those the most accurate transcription tier is preferred.
+        
+        Args:
+            session: Session document about to be analyzed
+            db_collection: Sessions collection
+        
+        Returns:
+            True if results were reused
+        """
+        digest = session.get("content_sha256")
+        if not digest:
+            return False  # uploaded before content addressing
+        from utils.transcription import resolve_whisper_model_size
+        from utils.transcription_tiers import TIER_ORDER
         
+        model_size = resolve_whisper_model_size()
+        candidates = db_collection.find(
+            {
+                "_id": {"$ne": session["_id"]},
+                "content_sha256": digest,
+                "analysis_pipeline_version": ANALYSIS_PIPELINE_VERSION,
+                "analysis_status": {"$in": ["completed", "completed_with_warning"]},
+                "transcript_stage": "final",
+            },
+            sort=[("analyzed_at", -1)]
+        ).limit(REUSE_CANDIDATES)
+        
+        def tier_rank(candidate):
+            tier = candidate.get("transcription_tier") or {}
+            transcription = (candidate.get("analysis_report") or {}).get("transcription") or {}
+            if (tier.get("model_size") or transcription.get("model_size")) != model_size:
+                return None
+            # Results from before tier selection used what is now the standard tier.
+            name = tier.get("name") or "standard"
+            return TIER_ORDER.index(name) if name in TIER_ORDER else len(TIER_ORDER)
+        
+        # Most accurate tier first; the most recent among equals.
+        donor, best = None, None
+        for candidate in candidates:
+            rank = tier_rank(candidate)
+            if rank is not None and (best is None or rank < best):
+                donor, best = candidate, rank
+        if donor is None:
+            return False
+        
+        fields = {name: donor.get(name) for name in REUSABLE_RESULT_FIELDS}
+        fields.update({
+            "analyzed_at": datetime.now().isoformat(),
+            "analysis_error": None,
+            "refinement_status": None,
+            "analysis_reused_from": str(donor["_id"]),
+        })
+        result = db_collection.update_one(
+            {"_id": session["_id"], "analysis_status": {"$ne": "processing"}}, {"$set": fields}
+        )
+        if not result.matched_count:
+            return False  # an analysis was started in the meantime
+        session_id = str(session["_id"])
+        print(f"[Analysis Manager] Reused results of session {donor['_id']} for identical upload {session_id}")
+        self._update_progress(session_id, 100, "Analysis complete (identical video analyzed before)", completed=True)
         return True
     
+    def cancel_analysis(self, session_id: str) -> Optional[str]:
+        """
+        Cancel a queued or running analysis.
+        
+        A queued job is dropped right away. A running job stops at its next cancellation point
+        (the start of a stage or the next sampled video frame); in process mode its worker
+        process is terminated, which frees the CPU immediately. A job refining its transcript
+        stops refining and keeps its provisional results.
+        
+        Returns:
+            "queued" or "running" for what was cancelled, None if there was nothing to cancel
+        """
+        if self.role == "api":
+            # The worker running the job notices within ANALYSIS_WORKER_POLL_SECONDS.
+            store = self._job_store()
+            job = store.get(session_id) if store is not None else None
+            if job and store.cancel(session_id):
+                print(f"[Analysis Manager] Cancelled {job['state']} analysis for session {session_id}")
+                return "running" if job["state"] == "leased" else "queued"
+            return None
+        
+        job = None
+        with self._lock:
+            progress = self._progress.get(session_id) or {}
+            status = progress.get("status")
+            if status == "completed" and progress.get("refining"):
+                # The provisional results are saved: only the refinement pass is stopped.
+                status = "refining"
+                event = self._cancel_events.get(session_id)
+                if event is not None:
+                    event.set()
+                progress["message"] = "Cancelling transcript refinement..."
+            elif status == "queued":
+                job = self._queue.remove(session_id)
+                self._cancel_events.pop(session_id, None)
+            elif status in ("running", "cancelling"):
+                event = self._cancel_events.get(session_id)
+                if event is not None:
+                    event.set()
+                progress["status"] = "cancelling"
+                progress["message"] = "Cancelling analysis..."
+        
+        if status == "queued":
+            self._mark_cancelled(session_id, job[3] if job else None)
+            store = self._job_store()
+            if store is not None:
+                try:
+                    store.cancel(session_id)
+                except Exception as e:
+                    print(f"[Analysis Manager] WARNING: Could not record cancellation for session {session_id}: {e}")
+            self._publish_queued()
+            print(f"[Analysis Manager] Cancelled queued analysis for session {session_id}")
+            return "queued"
+        
+        if status in ("running", "cancelling", "refining"):
+            self._publish(session_id)
+            if self.executor == "process" and self._process_pool is not None:
+                self._process_pool.cancel(session_id)
+            what = "transcript refinement" if status == "refining" else "running analysis"
+            print(f"[Analysis Manager] Cancelling {what} for session {session_id}")
+            return "running"
+        
+        # Not in memory: possibly a job recorded in the store that has not been resumed yet.
+        store = self._job_store()
+        if store is not None:
+            try:
+                if store.cancel(session_id):
+                    print(f"[Analysis Manager] Cancelled pending analysis for session {session_id}")
+                    return "queued"
+            except Exception as e:
+                print(f"[Analysis Manager] WARNING: Could not record cancellation for session {session_id}: {e}")
+        return None
+    
+    def _stop_job_stages(self, session_id: str) -> Optional[threading.Event]:
+        """
+        Make the job's remaining stages stop at their next cancellation point (after one of them
+        failed). Returns the cancel event if it had to be created here (process-mode runners),
+        for the caller to remove.
+        """
+        with self._lock:
+            event = self._cancel_events.get(session_id)
+            created = event is None
+            if created:
+                event = self._cancel_events[session_id] = threading.Event()
+        event.set()
+        return event if created else None
+    
+    def _cancel_event(self, session_id: Optional[str]) -> Optional[threading.Event]:
+        with self._lock:
+            return self._cancel_events.get(session_id)
+    
+    def _is_cancelled(self, session_id: Optional[str]) -> bool:
+        event = self._cancel_event(session_id)
+        return event is not None and event.is_set()
+    
+    def _raise_if_cancelled(self, session_id: Optional[str]):
+        """Cancellation point: abort the current job if it was cancelled."""
+        if self._is_cancelled(session_id):
+            raise AnalysisCancelled(f"Analysis cancelled for session {session_id}")
+    
+    def _mark_cancelled(self, session_id: str, db_collection):
+        """Record a cancelled job on the session (unless it was deleted or restarted meanwhile)."""
+        if db_collection is not None:
+            try:
+                db_collection.update_one(
+                    {"_id": ObjectId(session_id), "analysis_status": "processing"},
+                    {"$set": {"analysis_status": "cancelled", "analysis_error": None}}
+                )
+            except Exception:
+                pass
+        self._update_progress(session_id, 0, "Analysis cancelled", cancelled=True)
+    
+    def _get_process_pool(self):
+        with self._lock:
+            if self._process_pool is None:
+                from utils.analysis_processes import AnalysisProcessPool
+                self._process_pool = AnalysisProcessPool(self, self.max_workers)
+            return self._process_pool
+    
+    def _apply_resource_budget(self):
+        """
+        Plan the core budgets of the analysis and Whisper workers once (see resource_governor) and
+        apply the analysis budget here when analyses run on this process's threads.
+        """
+        with self._budget_lock:
+            if self._budget_applied:
+                return
+            self._budget_applied = True
+            from utils.resource_governor import apply_thread_budget, describe_plan, get_resource_plan
+            from utils.transcription_service import service_enabled
+            plan = get_resource_plan(self.max_workers)
+            print(f"[Resource Governor] {describe_plan(plan)}")
+            if self.executor == "process":
+                return  # each worker process applies its own budget
+            threads = plan["analysis"]["threads"]
+            if not service_enabled():
+                os.environ.setdefault("WHISPER_TORCH_THREADS", str(threads))
+            # The analyses share this process's library pools, and OpenMP/torch start a team per
+            # calling thread, so each call is limited to one worker's share. Pinning needs processes.
+            apply_thread_budget(threads, label="Analysis threads")
+    
+    def warm_up(self):
+        """Load models before the first job: worker processes in process mode, else Whisper here."""
+        if self.role == "api":
+            print("[Analysis Manager] Shared analysis queue: jobs run on standalone workers (worker.py)")
+            return
+        self._apply_resource_budget()
+        if self.executor == "process":
+            self._get_process_pool().start()
+        else:
+            from utils.transcription import warm_up_transcription
+            warm_up_transcription()
+    
     def _run_analysis(self, session_id: str, video_path: str, user_id: str, db_collection):
         """Run analysis in background thread with progress updates."""
-        MIN_WORDS_FOR_SPEECH = 10  # Minimum words to consider speech detected
-        
+        artifacts = {}  # temp files created by the stages (cleaned up in finally)
         try:
             print(f"[Analysis Thread] Starting analysis for session {session_id}")
             session_obj_id = ObjectId(session_id)
@@ -75,332 +906,86 @@ class AnalysisManager:
                 {"_id": session_obj_id},
                 {"$set": {"analysis_status": "processing"}}
             )
-            self._update_progress(session_id, 5, "Extracting audio...")
-            print(f"[Analysis Thread] Progress: 5% - Extracting audio...")
-            
-            # Step 1: Extract audio (5-15%)
-            from utils.audioextraction import extract_audio, get_audio_duration
-            print(f"[Analysis Thread] Extracting audio from {video_path}")
-            audio_path = extract_audio(video_path)
-            duration = get_audio_duration(audio_path)
-            audio_present = duration > 0
-            print(f"[Analysis Thread] Audio extracted. Duration: {duration}s, Audio present: {audio_present}")
-            self._update_progress(session_id, 15, "Transcribing audio...")
-            print(f"[Analysis Thread] Progress: 15% - Transcribing audio...")
-            
-            # Step 2: Transcribe (15-30%)
-            from utils.transcription import transcribe_audio, load_whisper_model, resolve_whisper_model_size
-            wsize = resolve_whisper_model_size()
-            print(f"[Analysis Thread] Loading Whisper model (size={wsize}, may download on first use)...")
-            try:
-                load_whisper_model(wsize)
-                print(f"[Analysis Thread] Whisper model ready")
-            except Exception as model_error:
-                print(f"[Analysis Thread] Warning: Model load error: {model_error}")
-            self._update_progress(session_id, 20, "Transcribing audio (this may take a moment)...")
-            print(f"[Analysis Thread] Starting transcription...")
-            transcription = transcribe_audio(audio_path, model_size=wsize)
-            text = transcription["text"].strip()
-            word_count = len(text.split()) if text else 0
-            print(f"[Analysis Thread] Transcription complete. Text: '{text}' ({word_count} words)")
-            
-            # ANALYSIS ELIGIBILITY LAYER - Hard rules check
-            from utils.analysis_eligibility import check_analysis_eligibility
-            import cv2
-            
-            # Get total frames for eligibility check
-            cap_temp = cv2.VideoCapture(video_path)
-            total_frames = int(cap_temp.get(cv2.CAP_PROP_FRAME_COUNT)) if cap_temp.isOpened() else 0
-            fps_temp = cap_temp.get(cv2.CAP_PROP_FPS) if cap_temp.isOpened() else 30
-            cap_temp.release()
-            
-            # SANITIZE FRAME COUNT: If OpenCV reports invalid/overflow values, calculate from duration
-            if total_frames <= 0 or total_frames > 1000000: # Check for overflow/negative
-                if duration > 0 and fps_temp > 0:
-                     print(f"[Analysis Thread] WARNING: Sanitizing frame count: OpenCV reported {total_frames}, using duration calculation")
-                     total_frames = int(duration * fps_temp)
-                else:
-                     total_frames = 0
-            
-            print(f"[Analysis Thread] Frame check: {total_frames} frames, {duration}s duration")
-            
-            print(f"[Analysis Thread] Checking analysis eligibility...")
-            is_eligible, eligibility_warnings, eligibility_details = check_analysis_eligibility(
-                video_duration=duration,
-                audio_present=audio_present,
-                word_count=word_count,
-                total_frames=total_frames
-            )
-            
-            # Check if speech is detected (for metric calculation)
-            speech_detected = word_count >= MIN_WORDS_FOR_SPEECH
             
-            # If not eligible, set warning status but continue with limited analysis
-            warning_message = None
-            if not is_eligible:
-                warning_message = "; ".join(eligibility_warnings)
-                print(f"[Analysis Thread] WARNING: ELIGIBILITY WARNINGS: {warning_message}")
-                print(f"[Analysis Thread] Will continue with limited analysis (some metrics may be unavailable)")
+            # Stages that finished in an earlier failed run of this session are not run again.
+            checkpoints = load_checkpoints(session_id, video_path)
+            if checkpoints:
+                print(f"[Analysis Thread] Found checkpoints for stages: {', '.join(sorted(checkpoints))}")
             
-            if not speech_detected:
-                print(f"[Analysis Thread] WARNING: Insufficient speech detected ({word_count} words < {MIN_WORDS_FOR_SPEECH} minimum)")
-                print(f"[Analysis Thread] Speech-based metrics will be marked as 'Not Evaluated'")
-            
-            self._update_progress(session_id, 30, "Analyzing audio...")
-            print(f"[Analysis Thread] Progress: 30% - Analyzing audio...")
-            
-            # Step 3: Analyze audio (30-45%) - Only if speech detected
-            from utils.audio_analyzer import analyze_audio_complete
-            if speech_detected:
-                print(f"[Analysis Thread] Analyzing audio characteristics...")
-                audio_analysis = analyze_audio_complete(audio_path, text, duration)
-                print(f"[Analysis Thread] Audio analysis complete")
-            else:
-                print(f"[Analysis Thread] Skipping audio analysis (no speech detected)")
-                audio_analysis = {
-                    "speaking_speed": {"wpm": None, "assessment": "N/A", "label": "N/A"},
-                    "filler_words": {"total": 0, "percentage": None, "breakdown": {}, "label": "N/A"},
-                    "pitch": {"mean": None, "stability_score": None, "std": None, "label": "N/A"},
-                    "volume": {"mean_db": None, "stability_score": None, "level_score": None, "label": "N/A"},
-                    "duration_seconds": round(duration, 2)
-                }
-            self._update_progress(session_id, 45, "Analyzing text...")
-            print(f"[Analysis Thread] Progress: 45% - Analyzing text...")
-            
-            # Step 4: Analyze text (45-60%) - Only if speech detected
-            from utils.text_analyzer import analyze_text_complete
-            if speech_detected:
-                print(f"[Analysis Thread] Analyzing text quality...")
-                text_analysis = analyze_text_complete(text)
-                print(f"[Analysis Thread] Text analysis complete")
-            else:
-                print(f"[Analysis Thread] Skipping text analysis (no speech detected)")
-                text_analysis = {
-                    "grammar": {"score": None, "errors": [], "feedback": "N/A", "label": "N/A"},
-                    "repetition": {"repetition_score": None, "repeated_phrases": [], "feedback": "N/A", "label": "N/A"},
-                    "structure": {"structure_score": None, "has_intro": False, "has_body": False, "has_conclusion": False, "feedback": "N/A", "label": "N/A"},
-                    "text_length": 0,
-                    "word_count": 0
-                }
-            self._update_progress(session_id, 60, "Analyzing video...")
-            print(f"[Analysis Thread] Progress: 60% - Analyzing video...")
-            
-            # Step 5: Analyze video (60-85%) - Always run (visual analysis)
-            from utils.video_analyzer import analyze_video_file, VideoAnalyzer
-            print(f"[Analysis Thread] Analyzing video (this may take a while)...")
+            # Stage graph: the video stage needs nothing from the audio chain, so it runs on its
+            # own thread while audio is extracted, transcribed and analyzed; both join for scoring.
+            video_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"VideoStage-{session_id}")
+            stop_event = None
             try:
-                # Update progress at start of video analysis
-                self._update_progress(session_id, 65, "Processing video frames...")
-                
-                # Pass known duration (from FFmpeg audio extraction) to handle OpenCV metadata issues
-                analyzer = VideoAnalyzer()
-                
-                # Update progress during video analysis
-                self._update_progress(session_id, 70, "Detecting faces and poses...")
-                video_analysis = analyzer.analyze_video(video_path, known_duration=duration)
-                
-                # Update progress after video analysis
-                self._update_progress(session_id, 80, "Finalizing video analysis...")
-                
-                face_presence_pct = video_analysis.get("face_presence", {}).get("percentage")
-                face_detected = video_analysis.get("face_detected", False)
-                print(f"[Analysis Thread] Video analysis complete. Face detected: {face_detected} ({face_presence_pct}% of frames)")
-                
-                # Quality metrics from video analysis
-                quality_metrics = video_analysis.get("quality_metrics", {})
-                lighting_quality = quality_metrics.get("lighting_quality")
-                noise_level = quality_metrics.get("noise_level")
-                camera_angle = quality_metrics.get("camera_angle")
-                
-                if not face_detected:
-                    print(f"[Analysis Thread] WARNING: Face not detected or below threshold")
-                    print(f"[Analysis Thread] Face-based metrics will be marked as 'Not Evaluated'")
-                    if not warning_message:
-                        warning_message = "Face not detected in video. Body language metrics unavailable."
-                    else:
-                        warning_message += "; Face not detected in video. Body language metrics unavailable."
-            except Exception as video_error:
-                print(f"[Analysis Thread] Video analysis error: {str(video_error)}")
-                face_detected = False
-                face_presence_pct = None
-                video_analysis = {
-                    "face_detected": False,
-                    "face_presence": {"percentage": None, "frames_analyzed": 0, "label": "N/A"},
-                    "eye_contact": {"score": None, "assessment": "N/A", "label": "N/A"},
-                    "posture": {"score": None, "assessment": "N/A", "label": "N/A"},
-                    "gestures": {"frequency_percentage": None, "assessment": "N/A", "label": "N/A"},
-                    "confidence_estimate": None,
-                    "quality_metrics": {
-                        "lighting_quality": None,
-                        "noise_level": None,
-                        "camera_angle": None
-                    },
-                    "duration_seconds": duration # Preserve duration even on error
-                }
-                lighting_quality = None
-                noise_level = None
-                camera_angle = None
-                
-                if not warning_message:
-                    warning_message = f"Video analysis encountered errors: {str(video_error)}"
-                else:
-                    warning_message += f"; Video analysis errors: {str(video_error)}"
-            self._update_progress(session_id, 85, "Calculating scores...")
-            print(f"[Analysis Thread] Progress: 85% - Calculating scores...")
-            
-            # Step 6: Calculate scores (85-95%) - Re-weight if no speech
-            from utils.scoring import (
-                calculate_voice_delivery_score,
-                calculate_content_quality_score,
-                calculate_confidence_body_language_score,
-                calculate_engagement_score,
-                calculate_final_score_with_validation
-            )
-            
-            if speech_detected:
-                voice_score = calculate_voice_delivery_score(audio_analysis)
-                content_score = calculate_content_quality_score(text_analysis)
-            else:
-                # Set speech-based scores to null/N/A
-                voice_score = {
-                    "overall_score": None,
-                    "components": {
-                        "wpm_score": None,
-                        "filler_score": None,
-                        "pitch_stability": None,
-                        "volume_stability": None,
-                        "volume_level": None
-                    },
-                    "weight": 0.30,
-                    "skipped": True,
-                    "label": "N/A",
-                    "reason": "No speech detected"
-                }
-                content_score = {
-                    "overall_score": None,
-                    "components": {
-                        "grammar_score": None,
-                        "repetition_score": None,
-                        "structure_score": None
-                    },
-                    "weight": 0.30,
-                    "skipped": True,
-                    "label": "N/A",
-                    "reason": "No speech detected"
-                }
-            
-            # Get face_detected and pose_landmarks_detected from video_analysis
-            face_detected = video_analysis.get("face_detected", False)
-            pose_landmarks_detected = video_analysis.get("pose_landmarks_detected", True)  # Default True for backward compat
-            
-            # Pass pose_landmarks_detected flag to video_analysis for scoring
-            video_analysis["pose_landmarks_detected"] = pose_landmarks_detected
-            
-            confidence_score = calculate_confidence_body_language_score(video_analysis, face_detected)
-            engagement_score = calculate_engagement_score(audio_analysis, video_analysis, speech_detected, face_detected)
+                video_future = video_executor.submit(self._run_video_stage, session_id, video_path, checkpoints)
+                audio_path, duration, audio_present, total_frames, transcription, speech, tier, draft_size = (
+                    self._run_audio_chain(session_id, video_path, artifacts, checkpoints)
+                )
+                video_analysis, video_warning = video_future.result()
+            except BaseException:
+                # Audio chain failed: stop the video stage at its next sampled frame.
+                stop_event = self._stop_job_stages(session_id)
+                raise
+            finally:
+                # Wait for it, so it neither runs outside the worker bound nor reports progress
+                # after the job ended (the slot and the cancel event are released after this).
+                video_executor.shutdown(wait=True)
+                if stop_event is not None:
+                    with self._lock:
+                        if self._cancel_events.get(session_id) is stop_event:
+                            self._cancel_events.pop(session_id, None)
+            wsize = tier["model_size"]
             
-            # Calculate final score with validation
-            final_scores = calculate_final_score_with_validation(
-                voice_score, content_score, confidence_score, engagement_score, speech_detected, face_detected
+            # Steps 6-7: Scores + feedback
+            self._update_stage(session_id, "scoring", "running", 0.0, "Calculating scores...")
+            run_id = datetime.now().isoformat()
+            fields = self._build_results(
+                speech, video_analysis, video_warning, video_path, duration, audio_present,
+                session_id=session_id,
+                transcript_stage="draft" if draft_size else "final",
+                model_size=draft_size or wsize,
+                tier=tier,
             )
+            fields["analysis_run_id"] = run_id
+            fields["refinement_status"] = "running" if draft_size else None
+            fields["analysis_stage_seconds"] = self._stage_seconds(session_id)
+            fields["analysis_reused_stages"] = self._reused_stages(session_id)
             
-            self._update_progress(session_id, 95, "Generating feedback...")
-            
-            # Step 7: Generate feedback (95-100%)
-            from utils.feedback_generator import generate_feedback
-            print(f"[Analysis Thread] Generating feedback...")
-            feedback = generate_feedback(audio_analysis, text_analysis, video_analysis, final_scores, speech_detected)
-            print(f"[Analysis Thread] Feedback generated")
-            
-            # Determine metric availability
-            metric_availability = {
-                "speech": speech_detected,
-                "body_language": face_detected
-            }
-            
-            # Determine analysis status
-            if warning_message:
-                analysis_status = "completed_with_warning"
-                print(f"[Analysis Thread] WARNING: Analysis completed with warnings: {warning_message}")
-            else:
-                analysis_status = "completed"
-                print(f"[Analysis Thread] Analysis completed successfully")
-            
-            # Compile complete report with standardized format
-            analysis_report = {
-                "status": "Valid Presentation" if not warning_message else "Presentation with Limitations",
-                "eligibility_details": eligibility_details,
-                "transcription": {
-                    "text": text,
-                    "language": transcription.get("language", "en"),
-                    "segments_count": len(transcription.get("segments", [])),
-                    "word_count": word_count
-                },
-                "audio_analysis": audio_analysis,
-                "text_analysis": text_analysis,
-                "video_analysis": video_analysis,
-                "scores": final_scores,
-                "feedback": feedback,
-                "metadata": {
-                    "video_path": video_path,
-                    "duration_seconds": round(duration, 2),
-                    "analysis_timestamp": datetime.now().isoformat(),
-                    "speech_detected": speech_detected,
-                    "audio_present": audio_present,
-                    "word_count": word_count,
-                    "face_detected": face_detected,
-                    "pose_landmarks_detected": pose_landmarks_detected,
-                    "min_words_required": MIN_WORDS_FOR_SPEECH,
-                    "quality_metrics": {
-                        "lighting_quality": lighting_quality,
-                        "noise_level": noise_level,
-                        "camera_angle": camera_angle
-                    }
-                },
-                # STANDARDIZED RESPONSE CONTRACT
-                "analysis_status": analysis_status,
-                "audio_present": audio_present,
-                "speech_detected": speech_detected,
-                "face_detected": face_detected,
-                "word_count": word_count,
-                "metric_availability": metric_availability,
-                "warning_message": warning_message
-            }
+            # Last cancellation point: a cancelled (or deleted) session must not receive results.
+            self._raise_if_cancelled(session_id)
             
             # Save to database with standardized fields
             print(f"[Analysis Thread] Saving results to database...")
-            session_obj_id = ObjectId(session_id)
-            db_collection.update_one(
-                {"_id": session_obj_id},
-                {"$set": {
-                    "analysis_report": analysis_report,
-                    "feedback": feedback,
-                    "analyzed_at": datetime.now().isoformat(),
-                    "analysis_status": analysis_status,  # Use new status
-                    "score": final_scores.get("final_score"),  # May be None
-                    "grade": final_scores.get("grade"),  # May be None
-                    "speech_detected": speech_detected,
-                    "face_detected": face_detected,
-                    "word_count": word_count,
-                    "audio_present": audio_present,
-                    "metric_availability": metric_availability,
-                    "warning_message": warning_message
-                }}
-            )
+            result = db_collection.update_one({"_id": session_obj_id, "analysis_status": "processing"}, {"$set": fields})
+            if not result.matched_count:
+                # Cancelled or deleted between the last cancellation point and the save.
+                raise AnalysisCancelled(f"Session {session_id} is no longer being analyzed")
             print(f"[Analysis Thread] Results saved to database")
+            self._update_stage(session_id, "scoring", "completed")
+            print(f"[Analysis Thread] Stage timings: {fields['analysis_stage_seconds']}")
             
-            # Cleanup temp audio file
-            try:
-                if os.path.exists(audio_path):
-                    os.remove(audio_path)
-                    print(f"[Analysis Thread] Cleaned up temp audio file")
-            except Exception as cleanup_error:
-                print(f"[Analysis Thread] Warning: Could not delete temp file: {cleanup_error}")
+            if draft_size:
+                # Provisional results are visible now; the refinement runs on this worker afterwards
+                # and the job keeps counting as running (see _occupies_worker) until it is done.
+                self._update_progress(
+                    session_id, 100, "Provisional results ready, refining transcript...",
+                    completed=True, refining=True
+                )
+                print(f"[Analysis Thread] Draft results published for session {session_id} (model={draft_size})")
+                self._refine_transcript(
+                    session_id, db_collection, run_id, audio_path, wsize, video_analysis, video_warning,
+                    video_path, duration, audio_present, total_frames, tier, draft=fields
+                )
             
             # Mark as completed
+            clear_checkpoints(session_id)
             self._update_progress(session_id, 100, "Analysis complete!", completed=True)
             print(f"[Analysis Thread] Analysis completed successfully for session {session_id}")
             
+        except AnalysisCancelled:
+            print(f"[Analysis Thread] Analysis cancelled for session {session_id}")
+            self._mark_cancelled(session_id, db_collection)
+        
         except Exception as e:
             error_msg = str(e)
             import traceback
@@ -418,48 +1003,871 @@ class AnalysisManager:
                 pass
             
             self._update_progress(session_id, 0, f"Analysis failed: {error_msg}", failed=True)
+        
+        finally:
+            # Cleanup temp audio file
+            try:
+                audio_path = artifacts.get("audio_path")
+                if audio_path and os.path.exists(audio_path):
+                    os.remove(audio_path)
+                    print(f"[Analysis Thread] Cleaned up temp audio file")
+            except Exception as cleanup_error:
+                print(f"[Analysis Thread] Warning: Could not delete temp file: {cleanup_error}")
     
-    def _update_progress(self, session_id: str, progress: int, message: str = "", completed: bool = False, failed: bool = False):
-        """Update progress for a session."""
+    def _run_audio_chain(self, session_id: str, video_path: str, artifacts: Dict, checkpoints: Dict):
+        """
+        Audio side of the stage graph: extraction -> transcription -> audio + text analysis.
+        The extracted WAV path is recorded in artifacts["audio_path"] as soon as it exists.
+        Checkpointed stages are reused; with a speech checkpoint nothing runs (audio_path is None).
+        
+        Returns:
+            (audio_path, duration, audio_present, total_frames, transcription, speech, tier, draft_size)
+        """
+        checkpoint = checkpoints.get("speech")
+        if checkpoint:
+            for stage in ("audio_extraction", "transcription", "audio_analysis", "text_analysis"):
+                self._update_stage(session_id, stage, "reused")
+            print(f"[Analysis Thread] Reusing checkpointed transcript and audio/text analysis")
+            speech = checkpoint["speech"]
+            return (None, checkpoint["duration"], checkpoint["audio_present"], checkpoint["total_frames"],
+                    speech["transcription"], speech, checkpoint["tier"], checkpoint["draft_size"])
+        
+        # Step 1: Extract audio
+        self._update_stage(session_id, "audio_extraction", "running", 0.0, "Extracting audio...")
+        from utils.audioextraction import extract_audio, get_audio_duration
+        print(f"[Analysis Thread] Extracting audio from {video_path}")
+        audio_path = extract_audio(video_path)
+        artifacts["audio_path"] = audio_path
+        duration = self._probe_duration(video_path) or get_audio_duration(audio_path)
+        audio_present = duration > 0
+        print(f"[Analysis Thread] Audio extracted. Duration: {duration}s, Audio present: {audio_present}")
+        self._update_stage(session_id, "audio_extraction", "completed")
+        
+        # Step 2: Transcribe
+        # The speed tier (model size + decoding settings) is chosen from duration and load.
+        # Draft mode: a small model transcribes first so results can be published early;
+        # the tier's model refines afterwards (see _refine_transcript).
+        checkpoint = checkpoints.get("transcription")
+        if checkpoint:
+            self._update_stage(session_id, "transcription", "reused")
+            transcription, tier, draft_size = checkpoint["transcription"], checkpoint["tier"], checkpoint["draft_size"]
+            print(f"[Analysis Thread] Reusing checkpointed transcript (model={transcription.get('model_size')})")
+        else:
+            self._update_stage(session_id, "transcription", "running", 0.0, "Transcribing audio...")
+            from utils.transcription import resolve_draft_model_size
+            tier = self._select_tier(session_id, duration)
+            draft_size = resolve_draft_model_size(tier["model_size"]) if tier["name"] != "fast" else None
+            if draft_size:
+                transcription = self._transcribe(session_id, audio_path, draft_size)
+            else:
+                transcription = self._transcribe(session_id, audio_path, tier["model_size"], tier)
+            self._update_stage(session_id, "transcription", "completed")
+            save_checkpoint(session_id, video_path, "transcription", {
+                "transcription": transcription, "tier": tier, "draft_size": draft_size,
+            })
+        
+        total_frames = self._count_video_frames(video_path, duration)
+        
+        # Steps 3-4: Audio + text analysis - Only if speech detected
+        self._update_stage(session_id, "audio_analysis", "running", 0.0, "Analyzing audio...")
+        speech = self._analyze_speech(session_id, audio_path, transcription, duration, audio_present, total_frames)
+        self._update_stage(session_id, "text_analysis", "completed")
+        save_checkpoint(session_id, video_path, "speech", {
+            "speech": speech, "duration": duration, "audio_present": audio_present,
+            "total_frames": total_frames, "tier": tier, "draft_size": draft_size,
+        })
+        return audio_path, duration, audio_present, total_frames, transcription, speech, tier, draft_size
+    
+    def _run_video_stage(self, session_id: str, video_path: str, checkpoints: Dict):
+        """
+        Video side of the stage graph. Runs before the audio is extracted, so the known duration
+        comes from the container (media probe) instead of the extracted WAV.
+        """
+        checkpoint = checkpoints.get("video_analysis")
+        if checkpoint:
+            self._update_stage(session_id, "video_analysis", "reused")
+            print(f"[Analysis Thread] Reusing checkpointed video analysis")
+            return checkpoint["video_analysis"], checkpoint["video_warning"]
+        
+        self._update_stage(session_id, "video_analysis", "running", 0.0, "Analyzing video...")
+        duration = self._probe_duration(video_path)
+        video_analysis, video_warning = self._analyze_video(session_id, video_path, duration)
+        self._update_stage(session_id, "video_analysis", "completed")
+        if not (video_warning or "").startswith("Video analysis encountered errors"):
+            # Degraded N/A metrics from a failed run are not worth keeping for the retry.
+            save_checkpoint(session_id, video_path, "video_analysis", {
+                "video_analysis": video_analysis, "video_warning": video_warning,
+            })
+        return video_analysis, video_warning
+    
+    def _select_tier(self, session_id: str, duration: float) -> Dict:
+        """Pick the transcription speed tier for this job from its duration and the current load."""
+        from utils.transcription_tiers import select_tier
+        
         with self._lock:
-            if session_id not in self._progress:
-                self._progress[session_id] = {}
+            # Other analyses still transcribing (or refining) compete for the same Whisper workers.
+            queue_depth = sum(
+                1 for sid, p in self._progress.items()
+                if sid != session_id and p.get("status") == "running"
+                and (p.get("stages") or {}).get("transcription", {}).get("status") != "completed"
+            ) + sum(1 for sid, p in self._progress.items() if sid != session_id and p.get("refining"))
+        
+        tier = select_tier(duration, queue_depth, workers=self._transcription_parallelism())
+        print(
+            f"[Analysis Thread] Transcription tier '{tier['name']}' (model={tier['model_size']}, "
+            f"queue_depth={queue_depth}, predicted={tier['predicted_seconds']}s, {tier['reason']})"
+        )
+        return tier
+    
+    def _transcription_parallelism(self) -> int:
+        """How many transcriptions can run at once (service worker processes)."""
+        from utils.transcription_service import resolve_worker_count
+        return max(1, resolve_worker_count())
+    
+    def _transcribe(self, session_id: str, audio_path: str, model_size: str, tier: Optional[Dict] = None) -> Dict:
+        """Transcribe with word timings (one decoding pass) and return the transcription dict."""
+        from utils.transcription import transcribe_audio, warm_up_transcription
+        print(f"[Analysis Thread] Preparing Whisper (size={model_size}, may download on first use)...")
+        try:
+            warm_up_transcription(model_size)
+            print(f"[Analysis Thread] Whisper ready")
+        except Exception as model_error:
+            print(f"[Analysis Thread] Warning: Model load error: {model_error}")
+        self._update_stage(session_id, "transcription", "running", 0.2, "Transcribing audio (this may take a moment)...")
+        print(f"[Analysis Thread] Starting transcription...")
+        # Word timings come from the same decoding pass (no second Whisper run).
+        try:
+            transcription = transcribe_audio(
+                audio_path, model_size=model_size, word_timestamps=True,
+                decode_options=tier["decode_options"] if tier else None,
+                chunked=True if tier and tier["chunked"] else None,
+                cancel_event=self._cancel_event(session_id),
+            )
+        except Exception:
+            self._raise_if_cancelled(session_id)
+            raise
+        transcription["model_size"] = model_size
+        text = transcription["text"].strip()
+        print(f"[Analysis Thread] Transcription complete. Text: '{text}' ({len(text.split()) if text else 0} words)")
+        return transcription
+    
+    def _probe_duration(self, video_path: str) -> Optional[float]:
+        """Container duration in seconds from the media probe (None if it cannot be read)."""
+        from utils.media_probe import probe_media
+        try:
+            return probe_media(video_path)["duration"]
+        except Exception as probe_error:
+            print(f"[Analysis Thread] WARNING: Could not probe video duration: {probe_error}")
+            return None
+    
+    def _count_video_frames(self, video_path: str, duration: float) -> int:
+        """Total frame count for the eligibility check (from the media probe, no decoder opened)."""
+        from utils.media_probe import probe_media
+        
+        try:
+            media = probe_media(video_path)
+            total_frames, fps_temp = media["frame_count"] or 0, media["fps"] or 30
+        except Exception as probe_error:
+            print(f"[Analysis Thread] WARNING: Could not probe video frames: {probe_error}")
+            total_frames, fps_temp = 0, 30
+        
+        # SANITIZE FRAME COUNT: If the container reports invalid/overflow values, calculate from duration
+        if total_frames <= 0 or total_frames > 1000000: # Check for overflow/negative
+            if duration > 0 and fps_temp > 0:
+                 print(f"[Analysis Thread] WARNING: Sanitizing frame count: probe reported {total_frames}, using duration calculation")
+                 total_frames = int(duration * fps_temp)
+            else:
+                 total_frames = 0
+        
+        print(f"[Analysis Thread] Frame check: {total_frames} frames, {duration}s duration")
+        return total_frames
+    
+    def _analyze_speech(self, session_id: Optional[str], audio_path: str, transcription: Dict, duration: float,
+                        audio_present: bool, total_frames: int, prosody: Optional[Dict] = None) -> Dict:
+        """
+        Eligibility check plus audio and text analysis for one transcript.
+        prosody: pitch and volume of the same audio from an earlier pass (reused, not recomputed).
+        """
+        from utils.analysis_eligibility import check_analysis_eligibility
+        from utils.audio_analyzer import analyze_audio_complete
+        from utils.text_analyzer import analyze_text_complete
+        
+        text = transcription["text"].strip()
+        words = transcription.get("words") or []
+        word_count = len(text.split()) if text else 0
+        
+        # ANALYSIS ELIGIBILITY LAYER - Hard rules check
+        print(f"[Analysis Thread] Checking analysis eligibility...")
+        is_eligible, eligibility_warnings, eligibility_details = check_analysis_eligibility(
+            video_duration=duration,
+            audio_present=audio_present,
+            word_count=word_count,
+            total_frames=total_frames
+        )
+        
+        # Check if speech is detected (for metric calculation)
+        speech_detected = word_count >= MIN_WORDS_FOR_SPEECH
+        
+        # If not eligible, set warning status but continue with limited analysis
+        warning_message = None
+        if not is_eligible:
+            warning_message = "; ".join(eligibility_warnings)
+            print(f"[Analysis Thread] WARNING: ELIGIBILITY WARNINGS: {warning_message}")
+            print(f"[Analysis Thread] Will continue with limited analysis (some metrics may be unavailable)")
+        
+        if not speech_detected:
+            print(f"[Analysis Thread] WARNING: Insufficient speech detected ({word_count} words < {MIN_WORDS_FOR_SPEECH} minimum)")
+            print(f"[Analysis Thread] Speech-based metrics will be marked as 'Not Evaluated'")
+        
+        # Step 3: Analyze audio (30-45%)
+        if speech_detected:
+            print(f"[Analysis Thread] Analyzing audio characteristics...")
+            audio_analysis = analyze_audio_complete(audio_path, text, duration, words=words, prosody=prosody)
+            print(f"[Analysis Thread] Audio analysis complete")
+        else:
+            print(f"[Analysis Thread] Skipping audio analysis (no speech detected)")
+            audio_analysis = {
+                "speaking_speed": {"wpm": None, "assessment": "N/A", "label": "N/A"},
+                "filler_words": {"total": 0, "percentage": None, "breakdown": {}, "label": "N/A"},
+                "pitch": {"mean": None, "stability_score": None, "std": None, "label": "N/A"},
+                "volume": {"mean_db": None, "stability_score": None, "level_score": None, "label": "N/A"},
+                "duration_seconds": round(duration, 2)
+            }
+        self._update_stage(session_id, "audio_analysis", "completed")
+        self._update_stage(session_id, "text_analysis", "running", 0.0, "Analyzing text...")
+        
+        # Step 4: Analyze text (45-60%)
+        if speech_detected:
+            print(f"[Analysis Thread] Analyzing text quality...")
+            text_analysis = analyze_text_complete(text)
+            print(f"[Analysis Thread] Text analysis complete")
+        else:
+            print(f"[Analysis Thread] Skipping text analysis (no speech detected)")
+            text_analysis = {
+                "grammar": {"score": None, "errors": [], "feedback": "N/A", "label": "N/A"},
+                "repetition": {"repetition_score": None, "repeated_phrases": [], "feedback": "N/A", "label": "N/A"},
+                "structure": {"structure_score": None, "has_intro": False, "has_body": False, "has_conclusion": False, "feedback": "N/A", "label": "N/A"},
+                "text_length": 0,
+                "word_count": 0
+            }
+        
+        return {
+            "transcription": transcription,
+            "text": text,
+            "word_count": word_count,
+            "speech_detected": speech_detected,
+            "eligibility_details": eligibility_details,
+            "warning_message": warning_message,
+            "audio_analysis": audio_analysis,
+            "text_analysis": text_analysis,
+        }
+    
+    def _analyze_video(self, session_id: str, video_path: str, duration: float):
+        """Visual analysis; returns (video_analysis, warning or None). Errors degrade to N/A metrics."""
+        from utils.video_analyzer import VideoAnalyzer
+        print(f"[Analysis Thread] Analyzing video (this may take a while)...")
+        video_warning = None
+        try:
+            # Update progress at start of video analysis
+            self._update_stage(session_id, "video_analysis", "running", 0.1, "Processing video frames...")
+            
+            # Pass known duration (from FFmpeg audio extraction) to handle OpenCV metadata issues
+            analyzer = VideoAnalyzer()
             
-            self._progress[session_id]["progress"] = progress
-            self._progress[session_id]["message"] = message
-            self._progress[session_id]["updated_at"] = datetime.now().isoformat()
+            # Update progress during video analysis
+            self._update_stage(session_id, "video_analysis", "running", 0.2, "Detecting faces and poses...")
+            video_analysis = analyzer.analyze_video(
+                video_path, known_duration=duration,
+                cancel_check=lambda: self._raise_if_cancelled(session_id)
+            )
+            
+            # Update progress after video analysis
+            self._update_stage(session_id, "video_analysis", "running", 0.9, "Finalizing video analysis...")
+            
+            face_presence_pct = video_analysis.get("face_presence", {}).get("percentage")
+            face_detected = video_analysis.get("face_detected", False)
+            print(f"[Analysis Thread] Video analysis complete. Face detected: {face_detected} ({face_presence_pct}% of frames)")
+            
+            if not face_detected:
+                print(f"[Analysis Thread] WARNING: Face not detected or below threshold")
+                print(f"[Analysis Thread] Face-based metrics will be marked as 'Not Evaluated'")
+                video_warning = "Face not detected in video. Body language metrics unavailable."
+        except AnalysisCancelled:
+            raise
+        except Exception as video_error:
+            print(f"[Analysis Thread] Video analysis error: {str(video_error)}")
+            video_analysis = {
+                "face_detected": False,
+                "face_presence": {"percentage": None, "frames_analyzed": 0, "label": "N/A"},
+                "eye_contact": {"score": None, "assessment": "N/A", "label": "N/A"},
+                "posture": {"score": None, "assessment": "N/A", "label": "N/A"},
+                "gestures": {"frequency_percentage": None, "assessment": "N/A", "label": "N/A"},
+                "confidence_estimate": None,
+                "quality_metrics": {
+                    "lighting_quality": None,
+                    "noise_level": None,
+                    "camera_angle": None
+                },
+                "duration_seconds": duration # Preserve duration even on error
+            }
+            video_warning = f"Video analysis encountered errors: {str(video_error)}"
+        
+        return video_analysis, video_warning
+    
+    def _build_results(self, speech: Dict, video_analysis: Dict, video_warning: Optional[str], video_path: str,
+                       duration: float, audio_present: bool, session_id: Optional[str] = None,
+                       transcript_stage: str = "final", model_size: Optional[str] = None,
+                       tier: Optional[Dict] = None, previous: Optional[Dict] = None) -> Dict:
+        """
+        Scores, feedback and the standardized session fields (analysis_report included).
+        previous: fields of an earlier run on the same video (the draft); its feedback is kept
+        when the scores come out the same, instead of generating it again.
+        """
+        from utils.scoring import (
+            calculate_voice_delivery_score,
+            calculate_content_quality_score,
+            calculate_confidence_body_language_score,
+            calculate_engagement_score,
+            calculate_final_score_with_validation
+        )
+        from utils.feedback_generator import generate_feedback
+        
+        speech_detected = speech["speech_detected"]
+        audio_analysis = speech["audio_analysis"]
+        text_analysis = speech["text_analysis"]
+        transcription = speech["transcription"]
+        text = speech["text"]
+        word_count = speech["word_count"]
+        
+        warning_message = speech["warning_message"]
+        if video_warning:
+            if not warning_message:
+                warning_message = video_warning
+            elif video_warning.startswith("Video analysis encountered errors: "):
+                warning_message += "; Video analysis errors: " + video_warning[len("Video analysis encountered errors: "):]
+            else:
+                warning_message += "; " + video_warning
+        
+        # Step 6: Calculate scores (85-95%) - Re-weight if no speech
+        if speech_detected:
+            voice_score = calculate_voice_delivery_score(audio_analysis)
+            content_score = calculate_content_quality_score(text_analysis)
+        else:
+            # Set speech-based scores to null/N/A
+            voice_score = {
+                "overall_score": None,
+                "components": {
+                    "wpm_score": None,
+                    "filler_score": None,
+                    "pitch_stability": None,
+                    "volume_stability": None,
+                    "volume_level": None
+                },
+                "weight": 0.30,
+                "skipped": True,
+                "label": "N/A",
+                "reason": "No speech detected"
+            }
+            content_score = {
+                "overall_score": None,
+                "components": {
+                    "grammar_score": None,
+                    "repetition_score": None,
+                    "structure_score": None
+                },
+                "weight": 0.30,
+                "skipped": True,
+                "label": "N/A",
+                "reason": "No speech detected"
+            }
+        
+        # Get face_detected and pose_landmarks_detected from video_analysis
+        face_detected = video_analysis.get("face_detected", False)
+        pose_landmarks_detected = video_analysis.get("pose_landmarks_detected", True)  # Default True for backward compat
+        
+        # Pass pose_landmarks_detected flag to video_analysis for scoring
+        video_analysis["pose_landmarks_detected"] = pose_landmarks_detected
+        
+        confidence_score = calculate_confidence_body_language_score(video_analysis, face_detected)
+        engagement_score = calculate_engagement_score(audio_analysis, video_analysis, speech_detected, face_detected)
+        
+        # Calculate final score with validation
+        final_scores = calculate_final_score_with_validation(
+            voice_score, content_score, confidence_score, engagement_score, speech_detected, face_detected
+        )
+        
+        self._update_stage(session_id, "scoring", "running", 0.5, "Generating feedback...")
+        
+        # Step 7: Generate feedback (95-100%)
+        previous_report = (previous or {}).get("analysis_report") or {}
+        if previous_report.get("scores") == final_scores and previous.get("feedback") is not None:
+            feedback = previous["feedback"]
+            print(f"[Analysis Thread] Scores unchanged, keeping previous feedback")
+        else:
+            print(f"[Analysis Thread] Generating feedback...")
+            feedback = generate_feedback(audio_analysis, text_analysis, video_analysis, final_scores, speech_detected)
+            print(f"[Analysis Thread] Feedback generated")
+        
+        # Determine metric availability
+        metric_availability = {
+            "speech": speech_detected,
+            "body_language": face_detected
+        }
+        
+        # Determine analysis status
+        if warning_message:
+            analysis_status = "completed_with_warning"
+            print(f"[Analysis Thread] WARNING: Analysis completed with warnings: {warning_message}")
+        else:
+            analysis_status = "completed"
+            print(f"[Analysis Thread] Analysis completed successfully")
+        
+        # Quality metrics from video analysis
+        quality_metrics = video_analysis.get("quality_metrics", {})
+        
+        # Compile complete report with standardized format
+        analysis_report = {
+            "status": "Valid Presentation" if not warning_message else "Presentation with Limitations",
+            "eligibility_details": speech["eligibility_details"],
+            "transcription": {
+                "text": text,
+                "language": transcription.get("language", "en"),
+                "segments_count": len(transcription.get("segments", [])),
+                "word_count": word_count,
+                "model_size": model_size,
+                "stage": transcript_stage,
+                "tier": tier["name"] if tier else None
+            },
+            "audio_analysis": audio_analysis,
+            "text_analysis": text_analysis,
+            "video_analysis": video_analysis,
+            "scores": final_scores,
+            "feedback": feedback,
+            "metadata": {
+                "video_path": video_path,
+                "duration_seconds": round(duration, 2),
+                "analysis_timestamp": datetime.now().isoformat(),
+                "speech_detected": speech_detected,
+                "audio_present": audio_present,
+                "word_count": word_count,
+                "face_detected": face_detected,
+                "pose_landmarks_detected": pose_landmarks_detected,
+                "min_words_required": MIN_WORDS_FOR_SPEECH,
+                "quality_metrics": {
+                    "lighting_quality": quality_metrics.get("lighting_quality"),
+                    "noise_level": quality_metrics.get("noise_level"),
+                    "camera_angle": quality_metrics.get("camera_angle")
+                }
+            },
+            # STANDARDIZED RESPONSE CONTRACT
+            "analysis_status": analysis_status,
+            "audio_present": audio_present,
+            "speech_detected": speech_detected,
+            "face_detected": face_detected,
+            "word_count": word_count,
+            "metric_availability": metric_availability,
+            "warning_message": warning_message,
+            "provisional": transcript_stage == "draft"
+        }
+        
+        return {
+            "analysis_report": analysis_report,
+            "feedback": feedback,
+            "analyzed_at": datetime.now().isoformat(),
+            "analysis_status": analysis_status,  # Use new status
+            "score": final_scores.get("final_score"),  # May be None
+            "grade": final_scores.get("grade"),  # May be None
+            "speech_detected": speech_detected,
+            "face_detected": face_detected,
+            "word_count": word_count,
+            "audio_present": audio_present,
+            "metric_availability": metric_availability,
+            "warning_message": warning_message,
+            "transcript_stage": transcript_stage,
+            "transcription_tier": tier,
+            "analysis_pipeline_version": ANALYSIS_PIPELINE_VERSION
+        }
+    
+    def _refine_transcript(self, session_id: str, db_collection, run_id: str, audio_path: Optional[str], model_size: str,
+                           video_analysis: Dict, video_warning: Optional[str], video_path: str, duration: float,
+                           audio_present: bool, total_frames: int, tier: Optional[Dict] = None,
+                           draft: Optional[Dict] = None):
+        """
+        Re-transcribe with the configured model and atomically replace the draft transcript and
+        every score derived from it. Only transcript-dependent metrics are recomputed: video
+        metrics, the draft's pitch and volume and (when the scores do not change) its feedback
+        are reused. A failed or cancelled refinement keeps the draft; cancelling (or deleting the
+        session) also cancels its Whisper jobs.
+        audio_path is None when the draft came from a checkpoint; the audio is extracted again here.
+        """
+        session_obj_id = ObjectId(session_id)
+        extracted_path = None
+        try:
+            self._raise_if_cancelled(session_id)
+            if not audio_path:
+                from utils.audioextraction import extract_audio
+                audio_path = extracted_path = extract_audio(video_path)
+            print(f"[Analysis Thread] Refining transcript with model '{model_size}'...")
+            from utils.transcription import transcribe_audio
+            transcription = transcribe_audio(
+                audio_path, model_size=model_size, word_timestamps=True,
+                decode_options=tier["decode_options"] if tier else None,
+                chunked=True if tier and tier["chunked"] else None,
+                cancel_event=self._cancel_event(session_id),
+            )
+            self._raise_if_cancelled(session_id)
+            transcription["model_size"] = model_size
+            draft_audio = ((draft or {}).get("analysis_report") or {}).get("audio_analysis") or {}
+            prosody = None
+            if (draft_audio.get("pitch") or {}).get("mean") is not None:
+                prosody = {"pitch": draft_audio["pitch"], "volume": draft_audio["volume"]}
+            speech = self._analyze_speech(
+                None, audio_path, transcription, duration, audio_present, total_frames, prosody=prosody
+            )
+            fields = self._build_results(
+                speech, video_analysis, video_warning, video_path, duration, audio_present,
+                transcript_stage="final", model_size=model_size, tier=tier, previous=draft,
+            )
+            fields["refinement_status"] = "completed"
+            self._raise_if_cancelled(session_id)
             
-            if completed:
-                self._progress[session_id]["status"] = "completed"
-            elif failed:
-                self._progress[session_id]["status"] = "failed"
-                self._progress[session_id]["error"] = message
+            # One $set on the run we published, so a newer re-analysis is never overwritten.
+            result = db_collection.update_one(
+                {"_id": session_obj_id, "analysis_run_id": run_id},
+                {"$set": fields}
+            )
+            if result.matched_count:
+                print(f"[Analysis Thread] Refined results saved for session {session_id}")
+            else:
+                print(f"[Analysis Thread] Session {session_id} changed during refinement; refined results discarded")
+        except Exception as refine_error:
+            if self._is_cancelled(session_id):
+                print(f"[Analysis Thread] Refinement cancelled for session {session_id}, keeping draft results")
+                update = {"refinement_status": "cancelled"}
             else:
-                self._progress[session_id]["status"] = "running"
+                print(f"[Analysis Thread] WARNING: Refinement failed, keeping draft results: {refine_error}")
+                update = {"refinement_status": "failed", "refinement_error": str(refine_error)}
+            try:
+                db_collection.update_one({"_id": session_obj_id, "analysis_run_id": run_id}, {"$set": update})
+            except Exception:
+                pass
+        finally:
+            if extracted_path and os.path.exists(extracted_path):
+                try:
+                    os.remove(extracted_path)
+                except OSError:
+                    pass
+    
+    def _update_stage(self, session_id: Optional[str], stage: str, status: str, fraction: Optional[float] = None,
+                      message: Optional[str] = None):
+        """
+        Record one stage's state and derive the overall progress from all stages, since the
+        video stage and the audio chain run at the same time. Starting or advancing a stage is
+        also a cancellation point.
         
-        # Log progress update
+        Args:
+            session_id: Session ID (None during refinement: nothing is reported)
+            stage: Key of STAGE_WEIGHTS
+            status: "running", "completed" or "reused" (completed from a checkpoint)
+            fraction: Completion of the stage (0.0-1.0) while running
+            message: Progress message for this stage
+        """
+        if not session_id:
+            return
+        if status == "running":
+            self._raise_if_cancelled(session_id)
+        now = time.time()
+        # Merge, overall progress and write happen in one critical section: the video stage and
+        # the audio chain update concurrently and must not overwrite each other's stage entries.
+        with self._lock:
+            entry = self._progress.setdefault(session_id, {})
+            if entry.get("status") in ("failed", "completed", "cancelled"):
+                # A stage still winding down after the job already failed must not revive it.
+                return
+            # Copied, never mutated once stored: snapshots of it are published without the lock.
+            stages = {name: dict(state) for name, state in (entry.get("stages") or {}).items()}
+            state = stages.setdefault(stage, {"status": "pending", "progress": 0})
+            state.setdefault("started_at", now)
+            if status == "reused":
+                state.update(progress=100, seconds=0.0, reused=True)
+                status = "completed"
+            elif status == "completed":
+                state["progress"] = 100
+                state["seconds"] = round(now - state["started_at"], 2)
+            elif fraction is not None:
+                state["progress"] = int(round(100 * max(0.0, min(1.0, fraction))))
+            state["status"] = status
+            if message:
+                state["message"] = message
+            
+            overall = sum(weight * stages.get(name, {}).get("progress", 0) / 100.0 for name, weight in STAGE_WEIGHTS.items())
+            running = [
+                stages[name].get("message", "") for name in STAGE_WEIGHTS
+                if stages.get(name, {}).get("status") == "running"
+            ]
+            # 100% is reserved for the final "Analysis complete!" update.
+            progress = min(99, int(overall))
+            message = " | ".join(m for m in running if m) or message or ""
+            self._apply_progress_locked(session_id, progress, message, stages=stages)
+        self._progress_changed(session_id, progress, message)
+    
+    def _stage_seconds(self, session_id: str) -> Dict[str, float]:
+        """Wall-clock seconds of each finished stage (stored on the session for latency tracking)."""
+        with self._lock:
+            stages = (self._progress.get(session_id) or {}).get("stages") or {}
+            return {name: state["seconds"] for name, state in stages.items() if "seconds" in state}
+    
+    def _reused_stages(self, session_id: str) -> List[str]:
+        """Stages of the current run whose output came from a checkpoint."""
+        with self._lock:
+            stages = (self._progress.get(session_id) or {}).get("stages") or {}
+            return [name for name in STAGE_WEIGHTS if stages.get(name, {}).get("reused")]
+    
+    def _update_progress(self, session_id: str, progress: int, message: str = "", completed: bool = False,
+                         failed: bool = False, refining: bool = False, stages: Optional[Dict] = None,
+                         cancelled: bool = False):
+        """Update progress for a session (stages: per-stage state from _update_stage)."""
+        with self._lock:
+            self._apply_progress_locked(session_id, progress, message, completed=completed, failed=failed,
+                                        refining=refining, stages=stages, cancelled=cancelled)
+        self._progress_changed(session_id, progress, message)
+    
+    def _apply_progress_locked(self, session_id: str, progress: int, message: str = "", completed: bool = False,
+                               failed: bool = False, refining: bool = False, stages: Optional[Dict] = None,
+                               cancelled: bool = False):
+        """Store a progress update (caller holds _lock)."""
+        if session_id not in self._progress:
+            self._progress[session_id] = {}
+        
+        self._progress[session_id]["progress"] = progress
+        if stages is not None:
+            self._progress[session_id]["stages"] = stages
+        self._progress[session_id]["message"] = message
+        self._progress[session_id]["updated_at"] = datetime.now().isoformat()
+        if refining and not self._progress[session_id].get("refining"):
+            self._progress[session_id]["refine_started_ts"] = time.time()
+        self._progress[session_id]["refining"] = refining
+        
+        if completed:
+            self._progress[session_id]["status"] = "completed"
+        elif failed:
+            self._progress[session_id]["status"] = "failed"
+            self._progress[session_id]["error"] = message
+        elif cancelled:
+            self._progress[session_id]["status"] = "cancelled"
+        elif self._progress[session_id].get("status") == "cancelling":
+            # Updates still in flight from a job being cancelled.
+            self._progress[session_id]["message"] = "Cancelling analysis..."
+        else:
+            self._progress[session_id]["status"] = "running"
+    
+    def _progress_changed(self, session_id: str, progress: int, message: str):
+        """Log and publish an update stored by _apply_progress_locked (called without _lock)."""
         print(f"[Progress] Session {session_id}: {progress}% - {message}")
+        self._publish(session_id)
+    
+    def _snapshot_locked(self, session_id: str) -> Optional[Dict]:
+        progress = self._progress.get(session_id, None)
+        if progress is None:
+            return None
+        progress = dict(progress)
+        if progress.get("status") == "queued":
+            progress["queue_position"] = self._queue.position(session_id)
+            progress["queue_length"] = len(self._queue)
+        return progress
     
     def get_progress(self, session_id: str) -> Optional[Dict]:
-        """Get current progress for a session."""
+        """Get current progress for a session (queued jobs include their 1-based queue_position)."""
+        with self._lock:
+            snapshot = self._snapshot_locked(session_id)
+        if snapshot is None and self.role == "api":
+            return self._shared_progress(session_id)
+        return snapshot
+    
+    def _shared_progress(self, session_id: str) -> Optional[Dict]:
+        """API node: progress of a shared-queue job from its record (None if there is no such job)."""
+        job = self.get_job(session_id)
+        if not job:
+            return None
+        state = job.get("state")
+        if state == "queued":
+            position, length = self._job_store().position(session_id)
+            return {
+                "status": "queued",
+                "progress": 0,
+                "priority": job.get("priority"),
+                "estimated_seconds": job.get("estimated_seconds"),
+                "queue_position": position,
+                "queue_length": length,
+            }
+        progress = job.get("progress")
+        if progress:
+            if state == "cancelled" and progress.get("status") == "running":
+                # The worker has not noticed the cancellation yet.
+                progress.update(status="cancelling", message="Cancelling analysis...")
+            return progress
+        if state == "leased":
+            return {"status": "running", "progress": 0, "message": "Starting analysis..."}
+        if state in ("failed", "cancelled"):
+            return {"status": state, "progress": 0, "error": job.get("error")}
+        return None
+    
+    def subscribe(self, session_id: str) -> queue.Queue:
+        """Receive a progress snapshot (as returned by get_progress) on every change of this session."""
+        subscriber = queue.Queue(maxsize=100)
+        with self._lock:
+            self._subscribers.setdefault(session_id, []).append(subscriber)
+            if self.role == "api" and (self._progress_poller is None or not self._progress_poller.is_alive()):
+                self._progress_poller = threading.Thread(
+                    target=self._poll_shared_progress,
+                    daemon=True,
+                    name="AnalysisProgressPoller"
+                )
+                self._progress_poller.start()
+        return subscriber
+    
+    def _poll_shared_progress(self):
+        """API node: the workers run elsewhere, so read subscribed sessions' progress from the store and push changes."""
+        last = {}
+        while True:
+            time.sleep(SHARED_PROGRESS_POLL_SECONDS)
+            with self._lock:
+                session_ids = list(self._subscribers)
+            last = {sid: key for sid, key in last.items() if sid in session_ids}
+            for session_id in session_ids:
+                snapshot = self._shared_progress(session_id)
+                if snapshot is None:
+                    continue
+                key = (snapshot.get("status"), snapshot.get("version"), snapshot.get("queue_position"),
+                       snapshot.get("refining"))
+                if last.get(session_id) != key:
+                    last[session_id] = key
+                    self._push(session_id, snapshot)
+    
+    def unsubscribe(self, session_id: str, subscriber: queue.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(session_id) or []
+            if subscriber in subscribers:
+                subscribers.remove(subscriber)
+            if not subscribers:
+                self._subscribers.pop(session_id, None)
+    
+    def _publish(self, session_id: str):
+        """Bump the session's progress version and push a snapshot to its subscribers."""
+        with self._lock:
+            entry = self._progress.get(session_id)
+            if entry is None:
+                return
+            entry["version"] = entry.get("version", 0) + 1
+            has_subscribers = bool(self._subscribers.get(session_id))
+            snapshot = self._snapshot_locked(session_id) if has_subscribers else None
+        if has_subscribers:
+            self._push(session_id, snapshot)
+        if self.role == "worker":
+            self._report_shared(session_id)
+    
+    def _push(self, session_id: str, snapshot: Dict):
         with self._lock:
-            return self._progress.get(session_id, None)
+            subscribers = list(self._subscribers.get(session_id) or ())
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(snapshot)
+            except queue.Full:
+                # Slow consumer: only the latest state matters, drop the oldest update.
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(snapshot)
+                except (queue.Empty, queue.Full):
+                    pass
+    
+    def _report_shared(self, session_id: str, force: bool = False):
+        """
+        Worker: store the session's progress in its job record for the API nodes. Updates within
+        PROGRESS_REPORT_SECONDS of the last write are held back unless the status changes; the
+        heartbeat flushes them (force=True).
+        """
+        with self._lock:
+            snapshot = self._snapshot_locked(session_id)
+            if snapshot is None:
+                return
+            state = (snapshot.get("status"), snapshot.get("refining"))
+            last = self._reported.get(session_id)
+            now = time.monotonic()
+            if last is not None:
+                if last[2] == snapshot.get("version"):
+                    return
+                if not force and last[1] == state and now - last[0] < PROGRESS_REPORT_SECONDS:
+                    return
+            if state[0] in ("completed", "failed", "cancelled") and not state[1]:
+                # Final state: nothing more to throttle for this session
+                self._reported.pop(session_id, None)
+            else:
+                self._reported[session_id] = (now, state, snapshot.get("version"))
+        snapshot.pop("user_id", None)
+        try:
+            self._job_store().report_progress(session_id, self.instance_id, snapshot)
+        except Exception as e:
+            print(f"[Analysis Manager] WARNING: Could not report progress for session {session_id}: {e}")
+    
+    def _publish_queued(self):
+        """Queue positions changed: notify subscribers of every queued session."""
+        with self._lock:
+            session_ids = [
+                sid for sid in self._subscribers
+                if (self._progress.get(sid) or {}).get("status") == "queued"
+            ]
+        for sid in session_ids:
+            self._publish(sid)
     
     def is_running(self, session_id: str) -> bool:
-        """Check if analysis is running for a session."""
+        """Check if analysis is running for a session (including one still winding down after a cancel)."""
+        if self.role == "api":
+            return (self.get_job(session_id) or {}).get("state") == "leased"
         with self._lock:
             progress = self._progress.get(session_id)
             if not progress:
                 return False
-            return progress.get("status") == "running"
+            return progress.get("status") in ("running", "cancelling")
+    
+    def is_queued(self, session_id: str) -> bool:
+        """Check if analysis is waiting in the queue for a session."""
+        if self.role == "api":
+            return (self.get_job(session_id) or {}).get("state") == "queued"
+        with self._lock:
+            progress = self._progress.get(session_id)
+            return bool(progress) and progress.get("status") == "queued"
+    
+    def queue_stats(self) -> Dict:
+        """Snapshot of the pool: workers, running and queued jobs, and per-class scheduler wait times."""
+        if self.role == "api":
+            from utils.job_store import get_queue_backend
+            load = self._shared_load(self._job_store())
+            return {
+                "backend": get_queue_backend(),
+                "active_workers": load["workers"],
+                "running": load["running"],
+                "queued": load["queued"],
+                "pending_seconds": round(load["pending_seconds"], 1),
+            }
+        with self._lock:
+            return {
+                "backend": "local",
+                "max_workers": self.max_workers,
+                "workers": self.active_workers,
+                "running": sum(1 for p in self._progress.values() if _occupies_worker(p)),
+                "queued": len(self._queue),
+                "queued_estimated_seconds": round(self._queue.pending_seconds(), 1),
+                "pending_seconds": round(self._load_locked()["pending_seconds"], 1),
+                "scheduler": self._queue.stats(),
+                "autoscaler": self._autoscaler.metrics(self.active_workers) if self._autoscaler else None,
+            }
     
     def cleanup(self, session_id: str):
         """Clean up progress data for a session (after some time)."""
         with self._lock:
             if session_id in self._progress:
                 del self._progress[session_id]
-            if session_id in self._threads:
-                del self._threads[session_id]
+            self._reported.pop(session_id, None)
 
 
 # Global instance (survives Flask reloads on Windows)
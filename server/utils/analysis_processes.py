@@ -0,0 +1,262 @@
+"""
+Analysis Worker Processes
+Runs whole analysis jobs in separate processes (ANALYSIS_EXECUTOR=process).
+
+In the default thread mode every stage shares the Flask process and its GIL, so the
+Python-level loops (pitch tracking, text analysis, per-frame glue) of concurrent jobs serialize
+against each other and against request handling. Here each pool slot owns a long-lived worker
+process that loads Whisper once (in-process, no nested transcription service) and imports the
+analysis modules up front, then runs jobs one at a time. Progress updates travel back over a
+multiprocessing queue and are applied to the parent AnalysisManager's _progress structure.
+"""
+
+import atexit
+import multiprocessing as mp
+import os
+import sys
+import threading
+from typing import Dict, Optional
+
+from utils.analysis_manager import AnalysisManager
+
+
+class _ProcessAnalysisRunner(AnalysisManager):
+    """AnalysisManager used inside a worker process: runs one job and forwards its progress."""
+
+    def __init__(self, events, parallelism: int, progress_snapshot: Dict):
+        super().__init__()
+        # Runs one job handed over by its parent, whatever queue the parent takes jobs from.
+        self.role = "standalone"
+        self._events = events
+        self._parallelism = parallelism
+        # Other sessions' state at dispatch time, so tier selection sees the parent's load.
+        self._progress = progress_snapshot
+
+    def _transcription_parallelism(self) -> int:
+        # Every analysis process transcribes with its own model.
+        return self._parallelism
+
+    def _apply_progress_locked(self, session_id: str, progress: int, message: str = "", completed: bool = False,
+                               failed: bool = False, refining: bool = False, stages: Optional[Dict] = None,
+                               cancelled: bool = False):
+        # The parent logs and stores the update; keep only the local copy _update_stage and tier selection read.
+        # Sent while holding the lock, so concurrent stages reach the parent in the order they were merged.
+        entry = self._progress.setdefault(session_id, {})
+        entry.update(
+            progress=progress,
+            refining=refining,
+            status="completed" if completed else "failed" if failed else "cancelled" if cancelled else "running",
+        )
+        if stages is not None:
+            entry["stages"] = stages
+        self._events.put(("progress", session_id, {
+            "progress": progress,
+            "message": message,
+            "completed": completed,
+            "failed": failed,
+            "refining": refining,
+            "stages": stages,
+            "cancelled": cancelled,
+        }))
+
+    def _progress_changed(self, session_id: str, progress: int, message: str):
+        pass
+
+
+def _analysis_process_main(index: int, parallelism: int, budget: tuple, job_queue, events):
+    """
+    Worker process entry point: warm up once, then run jobs until a None sentinel.
+    `budget` is (threads, cores) from the resource governor's plan for this pool slot.
+    """
+    if hasattr(sys.stdout, "reconfigure"):
+        try:
+            sys.stdout.reconfigure(line_buffering=True)
+        except Exception:
+            pass
+    # Whisper runs inside this process; a nested pool of transcription processes would only
+    # oversubscribe the cores this process was given.
+    os.environ["WHISPER_WORKERS"] = "0"
+    threads, cores = budget
+    os.environ["WHISPER_TORCH_THREADS"] = str(threads)
+    # Before the heavy imports, so BLAS/OpenMP size their pools from the budget.
+    from utils.resource_governor import apply_thread_budget
+    apply_thread_budget(threads, cores, f"Analysis Process {index}")
+
+    print(f"[Analysis Process {index}] Started (pid={os.getpid()}, threads={threads})")
+    try:
+        from utils.transcription import warm_up_transcription
+        warm_up_transcription()
+        import utils.audio_analyzer  # noqa: F401
+        import utils.text_analyzer  # noqa: F401
+        import utils.video_analyzer  # noqa: F401
+    except Exception as e:
+        # Not fatal: the first job retries and reports the error on its session.
+        print(f"[Analysis Process {index}] WARNING: Warm-up failed: {e}")
+    events.put(("ready", index, os.getpid()))
+
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+        session_id, video_path, user_id, progress_snapshot = job
+        runner = _ProcessAnalysisRunner(events, parallelism, progress_snapshot)
+        try:
+            from config.database import get_collection
+            runner._run_analysis(session_id, video_path, user_id, get_collection("session"))
+        except Exception as e:
+            runner._update_progress(session_id, 0, f"Analysis failed: {e}", failed=True)
+        finally:
+            events.put(("finished", session_id, None))
+
+    print(f"[Analysis Process {index}] Stopped")
+
+
+class AnalysisProcessPool:
+    """
+    One worker process per AnalysisManager pool slot, plus a listener for their progress events.
+    Slots added by the autoscaler spawn their process on first use; removed ones are retired.
+    """
+
+    def __init__(self, manager: AnalysisManager, size: int):
+        self.manager = manager
+        self.size = max(1, size)
+        # Spawn (not fork): torch, MediaPipe and the Flask request threads do not survive a fork safely.
+        self._ctx = mp.get_context("spawn")
+        self._events = None
+        self._slots: Dict[int, tuple] = {}  # index -> (process, job_queue)
+        self._finished: Dict[str, threading.Event] = {}
+        self._running: Dict[str, int] = {}  # session_id -> pool slot
+        self._lock = threading.Lock()
+        self._listener = None
+        self._started = False
+
+    def start(self):
+        """Spawn every worker process (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            self._events = self._ctx.Queue()
+            for index in range(min(self.size, self.manager.active_workers)):
+                self._spawn_locked(index)
+            self._listener = threading.Thread(
+                target=self._listen,
+                daemon=True,
+                name="AnalysisProcessListener"
+            )
+            self._listener.start()
+            self._started = True
+            atexit.register(self.shutdown)
+        print(f"[Analysis Manager] Started {len(self._slots)} analysis worker process(es)")
+
+    def _spawn_locked(self, index: int):
+        from utils.resource_governor import get_resource_plan
+        plan = get_resource_plan(self.manager.max_workers)["analysis"]
+        budget = (plan["threads"], plan["affinity"][index % len(plan["affinity"])])
+        job_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_analysis_process_main,
+            args=(index, self.size, budget, job_queue, self._events),
+            daemon=True,
+            name=f"AnalysisProcess-{index}"
+        )
+        process.start()
+        self._slots[index] = (process, job_queue)
+
+    def _listen(self):
+        """Apply child progress events to the parent's _progress and wake the waiting pool threads."""
+        while True:
+            try:
+                kind, session_id, payload = self._events.get()
+            except (EOFError, OSError):
+                break
+            if kind == "progress":
+                self.manager._update_progress(session_id, **payload)
+            elif kind == "finished":
+                with self._lock:
+                    done = self._finished.get(session_id)
+                if done is not None:
+                    done.set()
+            elif kind == "ready":
+                print(f"[Analysis Manager] Analysis process {session_id} ready (pid={payload})")
+
+    def run(self, index: int, session_id: str, video_path: str, user_id: str,
+            progress_snapshot: Dict) -> Optional[str]:
+        """
+        Run one job on the worker process of pool slot `index` and wait for it.
+
+        Returns:
+            None on completion (success or a failure the job reported itself),
+            or an error message if the worker process died mid-job
+        """
+        self.start()
+        done = threading.Event()
+        with self._lock:
+            slot = self._slots.get(index)
+            if slot is None or not slot[0].is_alive():
+                if slot is not None:
+                    print(f"[Analysis Manager] WARNING: Analysis process {index} is not running, restarting")
+                self._spawn_locked(index)
+            process, job_queue = self._slots[index]
+            self._finished[session_id] = done
+            self._running[session_id] = index
+        job_queue.put((session_id, video_path, user_id, progress_snapshot))
+
+        try:
+            while not done.wait(1.0):
+                if not process.is_alive():
+                    # Give the listener a moment to drain events sent just before exit.
+                    if done.wait(1.0):
+                        break
+                    with self._lock:
+                        self._spawn_locked(index)
+                    return f"Analysis worker process exited unexpectedly (code={process.exitcode})"
+            return None
+        finally:
+            with self._lock:
+                self._finished.pop(session_id, None)
+                self._running.pop(session_id, None)
+
+    def cancel(self, session_id: str) -> bool:
+        """
+        Terminate the worker process running this session; run() then respawns the slot and
+        returns an error for the job. Returns False if the session is not running here.
+        """
+        with self._lock:
+            index = self._running.get(session_id)
+            slot = self._slots.get(index) if index is not None else None
+        if slot is None:
+            return False
+        process, _ = slot
+        print(f"[Analysis Manager] Terminating analysis process {index} (pid={process.pid}) for session {session_id}")
+        process.terminate()
+        return True
+    
+    def retire(self, index: int):
+        """Stop the (idle) worker process of a pool slot the autoscaler removed."""
+        with self._lock:
+            slot = self._slots.pop(index, None)
+        if slot is None:
+            return
+        process, job_queue = slot
+        try:
+            job_queue.put(None)
+        except Exception:
+            process.terminate()
+        print(f"[Analysis Manager] Stopping analysis process {index} (pid={process.pid})")
+
+    def shutdown(self, timeout: float = 5.0):
+        with self._lock:
+            if not self._started:
+                return
+            slots = list(self._slots.values())
+            self._slots.clear()
+            self._started = False
+        for _, job_queue in slots:
+            try:
+                job_queue.put(None)
+            except Exception:
+                pass
+        for process, _ in slots:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
@@ -0,0 +1,190 @@
+"""
+Analysis Job Scheduler
+Orders queued analyses by estimated cost (shortest job first) within priority classes.
+
+A long recording queued first no longer holds short practice clips behind it: every pick
+takes the job with the lowest score
+
+    score = estimated_seconds + class_offset - aging_rate * seconds_waited
+
+so short jobs go first, "bulk" work (re-analysis) yields to "interactive" requests by a fixed
+offset, and waiting steadily lowers a job's score so neither long nor bulk jobs starve.
+Estimated cost comes from the probed duration and resolution of the video.
+
+ANALYSIS_SCHEDULER=fifo restores plain arrival order.
+"""
+
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+PRIORITY_CLASSES = ("interactive", "bulk")
+DEFAULT_PRIORITY = "interactive"
+
+# Analysis seconds per second of media: the audio chain plus video work at 720p (scaled by pixel count).
+AUDIO_COST_PER_SECOND = 0.3
+VIDEO_COST_PER_SECOND_720P = 0.7
+REFERENCE_PIXELS = 1280 * 720
+# Used when the video cannot be probed.
+UNKNOWN_COST_SECONDS = 60.0
+
+WAIT_SAMPLES = 200  # recent waits kept per class for the stats
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def get_scheduling_policy() -> str:
+    """ANALYSIS_SCHEDULER: "sjf" (default) or "fifo"."""
+    policy = (os.getenv("ANALYSIS_SCHEDULER") or "sjf").strip().lower()
+    return policy if policy in ("sjf", "fifo") else "sjf"
+
+
+def get_aging_rate() -> float:
+    """Estimated seconds forgiven per second waited (ANALYSIS_AGING_RATE, default 1.0)."""
+    return max(0.0, _env_float("ANALYSIS_AGING_RATE", 1.0))
+
+
+def get_class_offsets() -> Dict[str, float]:
+    """Score added per priority class (ANALYSIS_BULK_OFFSET_SECONDS for bulk, default 900)."""
+    return {
+        "interactive": 0.0,
+        "bulk": max(0.0, _env_float("ANALYSIS_BULK_OFFSET_SECONDS", 900.0)),
+    }
+
+
+def schedule_key(priority: str, estimated_seconds: float, enqueued_at: float) -> float:
+    """
+    Time-invariant sort key for queues shared between processes (lowest runs first).
+    Every waiting job ages at the same rate, so ordering by
+    estimated_seconds + class_offset + aging_rate * enqueued_at picks the same job as the
+    AnalysisScheduler score at any moment.
+    """
+    if get_scheduling_policy() == "fifo":
+        return enqueued_at
+    offset = get_class_offsets().get(priority, 0.0)
+    return estimated_seconds + offset + get_aging_rate() * enqueued_at
+
+
+def probe_video(video_path: str) -> Dict:
+    """
+    Duration and resolution of a video (from the cached media probe).
+
+    Returns:
+        Dictionary with duration (seconds), width and height (None when unknown)
+    """
+    from utils.media_probe import probe_media
+
+    info = probe_media(video_path)
+    return {"duration": info["duration"], "width": info["width"], "height": info["height"]}
+
+
+def estimate_cost(duration: Optional[float], width: Optional[int] = None, height: Optional[int] = None) -> float:
+    """Estimated analysis seconds for a video of this duration and resolution."""
+    if not duration or duration <= 0:
+        return UNKNOWN_COST_SECONDS
+    scale = (width * height / REFERENCE_PIXELS) if width and height else 1.0
+    return duration * (AUDIO_COST_PER_SECOND + VIDEO_COST_PER_SECOND_720P * scale)
+
+
+def estimate_job_cost(video_path: str) -> float:
+    """Probe a video and estimate its analysis cost (falls back to UNKNOWN_COST_SECONDS)."""
+    try:
+        info = probe_video(video_path)
+    except Exception as e:
+        print(f"[Scheduler] WARNING: Could not probe {video_path}: {e}")
+        return UNKNOWN_COST_SECONDS
+    return estimate_cost(info["duration"], info["width"], info["height"])
+
+
+class AnalysisScheduler:
+    """
+    Queue of analysis jobs picked by lowest score. Not thread-safe: the AnalysisManager
+    calls it under its own lock.
+    """
+
+    def __init__(self, policy: Optional[str] = None):
+        self.policy = policy or get_scheduling_policy()
+        self.aging_rate = get_aging_rate()
+        self.class_offsets = get_class_offsets()
+        self._entries: List[Dict] = []
+        self._seq = 0
+        self._waits = {name: deque(maxlen=WAIT_SAMPLES) for name in PRIORITY_CLASSES}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def push(self, job: Tuple, priority: str = DEFAULT_PRIORITY, estimated_seconds: float = UNKNOWN_COST_SECONDS):
+        """Queue a job tuple (its first element is the session ID)."""
+        self._seq += 1
+        self._entries.append({
+            "job": job,
+            "priority": priority if priority in PRIORITY_CLASSES else DEFAULT_PRIORITY,
+            "estimated_seconds": float(estimated_seconds),
+            "enqueued_at": time.monotonic(),
+            "seq": self._seq,
+        })
+
+    def _score(self, entry: Dict, now: float) -> Tuple[float, int]:
+        if self.policy == "fifo":
+            return (0.0, entry["seq"])
+        waited = now - entry["enqueued_at"]
+        score = entry["estimated_seconds"] + self.class_offsets[entry["priority"]] - self.aging_rate * waited
+        return (score, entry["seq"])
+
+    def _ordered(self) -> List[Dict]:
+        now = time.monotonic()
+        return sorted(self._entries, key=lambda entry: self._score(entry, now))
+
+    def pop(self) -> Tuple[Tuple, Dict]:
+        """Remove the next job to run. Returns (job, entry) and records its wait time."""
+        entry = self._ordered()[0]
+        self._entries.remove(entry)
+        entry["waited_seconds"] = time.monotonic() - entry["enqueued_at"]
+        self._waits[entry["priority"]].append(entry["waited_seconds"])
+        return entry["job"], entry
+
+    def remove(self, session_id: str) -> Optional[Tuple]:
+        """Drop a queued job. Returns its job tuple, or None if it is not queued."""
+        for entry in self._entries:
+            if entry["job"][0] == session_id:
+                self._entries.remove(entry)
+                return entry["job"]
+        return None
+
+    def position(self, session_id: str) -> Optional[int]:
+        """1-based position in the current pick order (changes as jobs age)."""
+        for index, entry in enumerate(self._ordered()):
+            if entry["job"][0] == session_id:
+                return index + 1
+        return None
+
+    def pending_seconds(self) -> float:
+        """Estimated analysis seconds of everything queued."""
+        return sum(entry["estimated_seconds"] for entry in self._entries)
+
+    def stats(self) -> Dict:
+        """Per-class queue depth and recent wait times (seconds) for tuning."""
+        classes = {}
+        for name in PRIORITY_CLASSES:
+            waits = sorted(self._waits[name])
+            count = len(waits)
+            classes[name] = {
+                "queued": sum(1 for entry in self._entries if entry["priority"] == name),
+                "samples": count,
+                "mean_wait": round(sum(waits) / count, 2) if count else None,
+                "p50_wait": round(waits[count // 2], 2) if count else None,
+                "p95_wait": round(waits[min(count - 1, int(count * 0.95))], 2) if count else None,
+                "max_wait": round(waits[-1], 2) if count else None,
+            }
+        return {
+            "policy": self.policy,
+            "aging_rate": self.aging_rate,
+            "class_offsets": self.class_offsets,
+            "classes": classes,
+        }
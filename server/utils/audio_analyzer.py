@@ -8,6 +8,8 @@ import numpy as np
 from typing import Dict, List, Tuple
 import re
 
+from utils.transcription import normalize_word
+
 
 # Common filler words to detect
 FILLER_WORDS = [
@@ -15,6 +17,11 @@ FILLER_WORDS = [
     "actually", "basically", "literally", "right", "okay", "ok"
 ]
 
+# Word-timing thresholds (used when the transcription carries word timestamps)
+PAUSE_THRESHOLD_SECONDS = 0.5   # gap between words counted as a pause
+LONG_PAUSE_SECONDS = 2.0        # gap counted as a long pause
+PACE_WINDOW_SECONDS = 30.0      # window size for per-window WPM
+
 
 def calculate_wpm(text: str, duration_seconds: float) -> float:
     """
@@ -70,6 +77,101 @@ def count_filler_words(text: str) -> Dict[str, int]:
     }
 
 
+def count_filler_words_from_words(words: List[Dict]) -> Dict:
+    """
+    Count filler words from word timings (same shape as count_filler_words, plus when they occur).
+    
+    Args:
+        words: [{"word", "start", "end"}, ...] from transcribe_audio(..., word_timestamps=True)
+    
+    Returns:
+        Dictionary with filler word counts, total, percentage and occurrence times
+    """
+    tokens = [normalize_word(w["word"]) for w in words]
+    filler_counts = {}
+    occurrences = []
+    
+    for filler in FILLER_WORDS:
+        parts = filler.split()
+        size = len(parts)
+        for i in range(len(tokens) - size + 1):
+            if tokens[i:i + size] == parts:
+                filler_counts[filler] = filler_counts.get(filler, 0) + 1
+                occurrences.append({"word": filler, "start": round(words[i]["start"], 2)})
+    
+    total_fillers = sum(filler_counts.values())
+    occurrences.sort(key=lambda o: o["start"])
+    
+    return {
+        "breakdown": filler_counts,
+        "total": total_fillers,
+        "percentage": round((total_fillers / max(len(words), 1)) * 100, 2),
+        "occurrences": occurrences
+    }
+
+
+def detect_pauses(words: List[Dict]) -> Dict:
+    """
+    Detect pauses from gaps between consecutive words.
+    
+    Args:
+        words: [{"word", "start", "end"}, ...] word timings
+    
+    Returns:
+        Dictionary with pause count, long pauses, total/longest pause and pauses per minute
+    """
+    gaps = []
+    for previous, current in zip(words, words[1:]):
+        gap = current["start"] - previous["end"]
+        if gap >= PAUSE_THRESHOLD_SECONDS:
+            gaps.append(gap)
+    
+    speaking_span = (words[-1]["end"] - words[0]["start"]) if words else 0.0
+    per_minute = (len(gaps) / speaking_span * 60) if speaking_span > 0 else 0.0
+    
+    return {
+        "count": len(gaps),
+        "long_pauses": sum(1 for g in gaps if g >= LONG_PAUSE_SECONDS),
+        "total_seconds": round(float(sum(gaps)), 2),
+        "longest_seconds": round(float(max(gaps)), 2) if gaps else 0.0,
+        "per_minute": round(per_minute, 2)
+    }
+
+
+def calculate_windowed_wpm(words: List[Dict], duration_seconds: float,
+                           window_seconds: float = PACE_WINDOW_SECONDS) -> Dict:
+    """
+    Calculate WPM per fixed time window to show how pace changes over the talk.
+    
+    Args:
+        words: [{"word", "start", "end"}, ...] word timings
+        duration_seconds: Audio duration in seconds
+        window_seconds: Window length in seconds
+    
+    Returns:
+        Dictionary with per-window WPM values and their standard deviation
+    """
+    if duration_seconds <= 0 or not words:
+        return {"window_seconds": window_seconds, "values": [], "std": None}
+    
+    n_windows = max(1, int(np.ceil(duration_seconds / window_seconds)))
+    counts = [0] * n_windows
+    for w in words:
+        index = min(n_windows - 1, max(0, int(w["start"] // window_seconds)))
+        counts[index] += 1
+    
+    values = []
+    for i, count in enumerate(counts):
+        length = min(window_seconds, duration_seconds - i * window_seconds)
+        values.append(round(count / length * 60, 2) if length > 0 else 0.0)
+    
+    return {
+        "window_seconds": window_seconds,
+        "values": values,
+        "std": round(float(np.std(values)), 2) if len(values) > 1 else 0.0
+    }
+
+
 def analyze_pitch(audio_path: str) -> Dict[str, float]:
     """
     Analyze pitch characteristics of the audio.
@@ -202,7 +304,8 @@ def analyze_volume(audio_path: str) -> Dict[str, float]:
         }
 
 
-def analyze_audio_complete(audio_path: str, text: str, duration: float) -> Dict:
+def analyze_audio_complete(audio_path: str, text: str, duration: float, words: List[Dict] = None,
+                           prosody: Dict = None) -> Dict:
     """
     Complete audio analysis combining all metrics.
     
@@ -210,16 +313,24 @@ def analyze_audio_complete(audio_path: str, text: str, duration: float) -> Dict:
         audio_path: Path to the audio file
         text: Transcribed text
         duration: Audio duration in seconds
+        words: Optional word timings from the same transcription pass; adds pause
+               detection and per-window WPM, and locates filler words in time
+        prosody: Optional "pitch" and "volume" results from an earlier pass over the same
+                 audio; they do not depend on the transcript, so the audio is not read again
     
     Returns:
         Complete audio analysis dictionary
     """
     wpm = calculate_wpm(text, duration)
-    filler_analysis = count_filler_words(text)
-    pitch_analysis = analyze_pitch(audio_path)
-    volume_analysis = analyze_volume(audio_path)
+    filler_analysis = count_filler_words_from_words(words) if words else count_filler_words(text)
+    if prosody:
+        pitch_analysis = prosody["pitch"]
+        volume_analysis = prosody["volume"]
+    else:
+        pitch_analysis = analyze_pitch(audio_path)
+        volume_analysis = analyze_volume(audio_path)
     
-    return {
+    result = {
         "speaking_speed": {
             "wpm": wpm,
             "assessment": _assess_wpm(wpm)
@@ -229,6 +340,12 @@ def analyze_audio_complete(audio_path: str, text: str, duration: float) -> Dict:
         "volume": volume_analysis,
         "duration_seconds": round(duration, 2)
     }
+    
+    if words:
+        result["speaking_speed"]["windows"] = calculate_windowed_wpm(words, duration)
+        result["pauses"] = detect_pauses(words)
+    
+    return result
 
 
 def _assess_wpm(wpm: float) -> str:
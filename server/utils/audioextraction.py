@@ -6,9 +6,11 @@ Extracts audio from video files using ffmpeg
 import os
 import subprocess
 import tempfile
+import uuid
 from pathlib import Path
 
 from utils.path_utils import resolve_ffprobe_executable, resolve_ffmpeg_executable
+from utils.resource_governor import ffmpeg_thread_args
 
 
 def extract_audio(video_path: str, output_format: str = "wav") -> str:
@@ -31,7 +33,8 @@ def extract_audio(video_path: str, output_format: str = "wav") -> str:
     # Create temporary directory for audio output
     temp_dir = tempfile.gettempdir()
     video_name = Path(video_path).stem
-    audio_path = os.path.join(temp_dir, f"{video_name}_audio.{output_format}")
+    # Unique per call: sessions with identical content share one video file
+    audio_path = os.path.join(temp_dir, f"{video_name}_{uuid.uuid4().hex[:8]}_audio.{output_format}")
     
     try:
         ffmpeg_bin = resolve_ffmpeg_executable()
@@ -48,6 +51,7 @@ def extract_audio(video_path: str, output_format: str = "wav") -> str:
             "-acodec", "pcm_s16le" if output_format == "wav" else "libmp3lame",
             "-ar", "16000",  # Sample rate for Whisper
             "-ac", "1",  # Mono channel
+            *ffmpeg_thread_args(),  # Stay within this worker's core budget
             "-y",  # Overwrite output file
             audio_path
         ]
@@ -29,6 +29,34 @@ def generate_token(email):
 def verify_token(token):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        # Single-purpose tokens (verification, reset, progress stream) are not login tokens
+        if payload.get('type'):
+            return None
+        return payload['email']
+    except jwt.ExpiredSignatureError:
+        return None
+    except jwt.InvalidTokenError:
+        return None
+
+#  Generate progress stream token (EventSource puts it in the URL, so it is short-lived and
+#  only opens the progress stream of one session)
+STREAM_TOKEN_SECONDS = 120
+
+def generate_stream_token(email, session_id):
+    payload = {
+        'email': email,
+        'type': 'progress_stream',
+        'session_id': session_id,
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(seconds=STREAM_TOKEN_SECONDS)
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm='HS256')
+
+#  Verify progress stream token
+def verify_stream_token(token, session_id):
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        if payload.get('type') != 'progress_stream' or payload.get('session_id') != session_id:
+            return None
         return payload['email']
     except jwt.ExpiredSignatureError:
         return None
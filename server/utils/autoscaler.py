@@ -0,0 +1,200 @@
+"""
+Analysis Worker Autoscaler
+Grows and shrinks the pool of analysis workers between ANALYSIS_MIN_WORKERS and
+ANALYSIS_MAX_WORKERS (ANALYSIS_AUTOSCALE=1; otherwise the pool stays at ANALYSIS_MAX_WORKERS).
+
+Every ANALYSIS_AUTOSCALE_INTERVAL_SECONDS the pool changes by at most one worker:
+- up when the queue would take longer than ANALYSIS_TARGET_WAIT_SECONDS to drain at the recent
+  per-job latency, as long as the host has headroom: CPU below ANALYSIS_AUTOSCALE_MAX_CPU_PERCENT
+  and room for ANALYSIS_WORKER_MEMORY_MB more on top of ANALYSIS_MIN_FREE_MEMORY_MB
+- down when workers sat idle with an empty queue for ANALYSIS_SCALE_DOWN_IDLE_SECONDS, or when
+  available memory falls below ANALYSIS_MIN_FREE_MEMORY_MB
+A worker removed while busy finishes its job first. Decisions are logged and kept for the
+queue statistics.
+"""
+
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from utils.admission_control import get_available_memory_mb, get_min_free_memory_mb
+
+DECISION_HISTORY = 20  # scaling decisions kept for the metrics
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def autoscale_enabled() -> bool:
+    """ANALYSIS_AUTOSCALE=1 lets the pool grow and shrink (disabled by default)."""
+    return (os.getenv("ANALYSIS_AUTOSCALE") or "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_min_workers() -> int:
+    """Smallest pool the autoscaler shrinks to (ANALYSIS_MIN_WORKERS, default 1)."""
+    return max(1, int(_env_float("ANALYSIS_MIN_WORKERS", 1)))
+
+
+def get_autoscale_interval() -> float:
+    """Seconds between scaling decisions (ANALYSIS_AUTOSCALE_INTERVAL_SECONDS, default 10)."""
+    return max(1.0, _env_float("ANALYSIS_AUTOSCALE_INTERVAL_SECONDS", 10.0))
+
+
+def get_target_wait_seconds() -> float:
+    """Queue drain time above which a worker is added (ANALYSIS_TARGET_WAIT_SECONDS, default 60)."""
+    return max(0.0, _env_float("ANALYSIS_TARGET_WAIT_SECONDS", 60.0))
+
+
+def get_max_cpu_percent() -> float:
+    """Host CPU utilization at which the pool stops growing (ANALYSIS_AUTOSCALE_MAX_CPU_PERCENT, default 85)."""
+    return min(100.0, max(1.0, _env_float("ANALYSIS_AUTOSCALE_MAX_CPU_PERCENT", 85.0)))
+
+
+def get_worker_memory_mb() -> float:
+    """Memory one more worker is expected to need (ANALYSIS_WORKER_MEMORY_MB, default 1024)."""
+    return max(0.0, _env_float("ANALYSIS_WORKER_MEMORY_MB", 1024.0))
+
+
+def get_scale_down_idle_seconds() -> float:
+    """Idle time before a worker is removed (ANALYSIS_SCALE_DOWN_IDLE_SECONDS, default 120)."""
+    return max(0.0, _env_float("ANALYSIS_SCALE_DOWN_IDLE_SECONDS", 120.0))
+
+
+class CpuSampler:
+    """Host CPU utilization in percent since the previous sample (psutil, /proc/stat or the load average)."""
+
+    def __init__(self):
+        self._last = None  # (busy, total) jiffies from /proc/stat
+
+    def sample(self) -> Optional[float]:
+        try:
+            import psutil
+            return float(psutil.cpu_percent(interval=None))
+        except Exception:
+            pass
+
+        if sys.platform.startswith("linux"):
+            try:
+                with open("/proc/stat", "r") as f:
+                    fields = [int(value) for value in f.readline().split()[1:]]
+                idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+                total = sum(fields)
+                last, self._last = self._last, (total - idle, total)
+                if last is not None and total > last[1]:
+                    return round(100.0 * (total - idle - last[0]) / (total - last[1]), 1)
+            except Exception:
+                pass
+
+        if hasattr(os, "getloadavg"):
+            return round(min(100.0, 100.0 * os.getloadavg()[0] / (os.cpu_count() or 1)), 1)
+        return None
+
+
+class Autoscaler:
+    """Scaling decisions for one worker pool (called periodically by the AnalysisManager)."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self.min_workers = min(get_min_workers(), self.max_workers)
+        self.target_wait_seconds = get_target_wait_seconds()
+        self.max_cpu_percent = get_max_cpu_percent()
+        self.worker_memory_mb = get_worker_memory_mb()
+        self.idle_seconds = get_scale_down_idle_seconds()
+        self._cpu = CpuSampler()
+        self._cpu.sample()  # prime the utilization counters
+        self._idle_since = None
+        self._last_reason = None
+        self._holding = False
+        self.last_sample: Dict = {}
+        self.decisions = deque(maxlen=DECISION_HISTORY)
+
+    def decide(self, workers: int, busy: int, queued: int, queued_seconds: float,
+               job_seconds: Optional[float]) -> Tuple[int, str]:
+        """
+        Pool size for the next interval.
+
+        Args:
+            workers: Current pool size
+            busy: Workers running a job
+            queued: Jobs waiting
+            queued_seconds: Their estimated analysis seconds
+            job_seconds: Recent mean wall time per job (None before the first one finishes)
+
+        Returns:
+            (new pool size, reason)
+        """
+        now = time.monotonic()
+        cpu = self._cpu.sample()
+        available = get_available_memory_mb()
+        min_free = get_min_free_memory_mb()
+        # Measured latency beats the estimates once jobs have finished on this host.
+        backlog = queued * job_seconds if job_seconds else queued_seconds
+        drain_seconds = backlog / max(1, workers)
+
+        if queued or busy >= workers:
+            self._idle_since = None
+        elif self._idle_since is None:
+            self._idle_since = now
+
+        target, reason, holding = workers, "steady", False
+        if workers < self.min_workers:
+            target, reason = self.min_workers, "below the minimum pool size"
+        elif workers > self.max_workers:
+            target, reason = self.max_workers, "above the maximum pool size"
+        elif available is not None and min_free and available < min_free and workers > self.min_workers:
+            target, reason = workers - 1, f"low memory ({available:.0f} MB available)"
+        elif queued and drain_seconds > self.target_wait_seconds and workers < self.max_workers:
+            if cpu is not None and cpu >= self.max_cpu_percent:
+                reason, holding = f"queue needs ~{drain_seconds:.0f}s but CPU is at {cpu:.0f}%", True
+            elif available is not None and available < min_free + self.worker_memory_mb:
+                reason, holding = f"queue needs ~{drain_seconds:.0f}s but only {available:.0f} MB are available", True
+            else:
+                target = workers + 1
+                reason = f"queue drains in ~{drain_seconds:.0f}s (target {self.target_wait_seconds:.0f}s)"
+        elif (self._idle_since is not None and workers > self.min_workers
+              and now - self._idle_since >= self.idle_seconds):
+            target, reason = workers - 1, f"idle for {now - self._idle_since:.0f}s"
+            self._idle_since = now  # space further steps down by another idle period
+
+        self.last_sample = {
+            "cpu_percent": cpu,
+            "available_memory_mb": round(available) if available is not None else None,
+            "busy": busy,
+            "queued": queued,
+            "drain_seconds": round(drain_seconds, 1),
+            "recent_job_seconds": round(job_seconds, 1) if job_seconds else None,
+        }
+        if target != workers:
+            self.decisions.append({
+                "at": datetime.now().isoformat(),
+                "from": workers,
+                "to": target,
+                "reason": reason,
+                **self.last_sample,
+            })
+            print(f"[Autoscaler] {workers} -> {target} workers: {reason} "
+                  f"(busy {busy}, queued {queued}, cpu {cpu}%, available {self.last_sample['available_memory_mb']} MB)")
+        elif holding and not self._holding:
+            print(f"[Autoscaler] Holding at {workers} workers: {reason}")
+        self._holding = holding
+        self._last_reason = reason
+        return target, reason
+
+    def metrics(self, workers: int) -> Dict:
+        """Bounds, the latest sample and recent decisions, for the queue statistics."""
+        return {
+            "workers": workers,
+            "min_workers": self.min_workers,
+            "max_workers": self.max_workers,
+            "target_wait_seconds": self.target_wait_seconds,
+            "last_sample": self.last_sample,
+            "last_reason": self._last_reason,
+            "decisions": list(self.decisions),
+        }
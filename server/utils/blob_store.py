@@ -0,0 +1,177 @@
+"""
+Content-Addressed Upload Storage
+Each uploaded video is stored once per content: the file in the uploads folder is named by the
+SHA-256 of its bytes (<sha256>.<ext>), and every session with identical content references the
+same blob through its video_path. A blob is deleted together with the last session that
+references it.
+
+An upload reserves its blob (blob_reservation collection) before it is stored and until its
+session is inserted, so a concurrent delete of the last other session sharing that content
+cannot remove the file in between.
+"""
+
+import hashlib
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+READ_BLOCK_BYTES = 1024 * 1024
+# A reservation older than this belongs to a request that died before creating its session.
+RESERVATION_SECONDS = 600
+
+
+def blob_name(digest: str, extension: str) -> str:
+    return f"{digest}.{extension.lower()}"
+
+
+def save_stream(stream, upload_folder: str, extension: str, max_bytes: int = 0) -> Tuple[str, str, int]:
+    """
+    Write an incoming upload to a temporary file in the uploads folder, hashing it on the way.
+
+    Args:
+        stream: Readable binary stream (e.g. a multipart file part)
+        upload_folder: Uploads folder (same filesystem as the blobs, so store_blob only renames)
+        extension: File extension
+        max_bytes: Size limit (0 = none)
+
+    Returns:
+        (temporary path, SHA-256 hex digest, size in bytes)
+
+    Raises:
+        ValueError: If the stream exceeds max_bytes (the partial file is removed)
+    """
+    temp_path = os.path.join(upload_folder, f".incoming_{uuid.uuid4().hex}.{extension}")
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, "wb") as f:
+            while True:
+                block = stream.read(READ_BLOCK_BYTES)
+                if not block:
+                    break
+                size += len(block)
+                if max_bytes and size > max_bytes:
+                    raise ValueError(f"File is too large (limit {max_bytes // (1024 * 1024)} MB)")
+                hasher.update(block)
+                f.write(block)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return temp_path, hasher.hexdigest(), size
+
+
+@contextmanager
+def reserve_blob(reservations, name: str):
+    """
+    Hold a reference to a blob while its session is being created: enter before store_blob,
+    leave after the session is inserted (or the upload is turned away).
+
+    Args:
+        reservations: Blob reservations collection
+        name: Blob file name (see blob_name)
+    """
+    reservation_id = reservations.insert_one({"name": name, "created_at": time.time()}).inserted_id
+    try:
+        yield
+    finally:
+        try:
+            reservations.delete_one({"_id": reservation_id})
+        except Exception as e:
+            # Expires after RESERVATION_SECONDS anyway.
+            print(f"[Blob Store] WARNING: Could not drop reservation of {name}: {e}")
+
+
+def store_blob(upload_folder: str, path: str, digest: str, extension: str) -> str:
+    """
+    Move a fully written upload to its blob (a rename within the uploads folder). If the blob
+    already exists the upload is discarded and the existing file kept untouched: replacing it
+    would change its inode and mtime, which the media probe cache and the analysis checkpoints
+    use to recognise the file. Call inside reserve_blob.
+
+    Returns:
+        Blob file name, relative to the uploads folder (the session's video_path)
+    """
+    name = blob_name(digest, extension)
+    blob_path = os.path.join(upload_folder, name)
+    if os.path.exists(blob_path):
+        print(f"[Blob Store] Upload matches existing blob {name}; sharing it")
+        os.remove(path)
+        return name
+    try:
+        os.replace(path, blob_path)
+    except OSError:
+        # Another upload of the same content stored it first (and Windows cannot replace it).
+        if not os.path.exists(blob_path):
+            raise
+        os.remove(path)
+    return name
+
+
+def _referenced(collection, reservations, name: str) -> bool:
+    if collection.count_documents({"video_path": name}, limit=1):
+        return True
+    if reservations is None:
+        return False
+    live = {"name": name, "created_at": {"$gt": time.time() - RESERVATION_SECONDS}}
+    return bool(reservations.count_documents(live, limit=1))
+
+
+def release_blob(collection, upload_folder: str, name: Optional[str], reservations=None) -> bool:
+    """
+    Delete a video file once no session references it any more (call after removing the session).
+    An MP4 converted from a WebM blob for download is deleted with it.
+
+    The blob is first moved aside and the references counted again: an upload of the same
+    content that reserved it in the meantime either found the blob before the move (and its
+    reservation now keeps it) or finds it missing and stores its own copy.
+
+    Args:
+        collection: Sessions collection
+        upload_folder: Uploads folder
+        name: The session's video_path
+        reservations: Blob reservations collection (see reserve_blob)
+
+    Returns:
+        True if the file was deleted
+    """
+    if not name:
+        return False
+    path = os.path.join(upload_folder, name)
+    if not os.path.exists(path):
+        return False
+    if _referenced(collection, reservations, name):
+        print(f"[Blob Store] Keeping {name}: still used by other sessions")
+        return False
+
+    doomed = os.path.join(upload_folder, f".deleting_{uuid.uuid4().hex}_{name}")
+    try:
+        os.rename(path, doomed)
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        print(f"Warning: Could not delete file {name}: {e}")
+        return False
+    if _referenced(collection, reservations, name):
+        print(f"[Blob Store] Keeping {name}: reserved by a new upload")
+        if os.path.exists(path):
+            # That upload already stored its own copy.
+            os.remove(doomed)
+        else:
+            os.rename(doomed, path)
+        return False
+    os.remove(doomed)
+
+    stem, extension = os.path.splitext(name)
+    if extension.lower() == ".webm" and not collection.count_documents({"video_path": stem + ".mp4"}, limit=1):
+        try:
+            os.remove(os.path.join(upload_folder, stem + ".mp4"))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Warning: Could not delete file {stem}.mp4: {e}")
+    return True
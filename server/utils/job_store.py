@@ -0,0 +1,636 @@
+"""
+Analysis Job Store
+Durable record of analysis jobs so a server restart does not lose queued or running work.
+
+Jobs move through queued -> leased -> completed | failed (or cancelled by the user). A worker leases a job before running
+it and renews the lease with heartbeats; a job whose lease expires (the server died or hung)
+is put back in the queue and picked up again automatically, up to ANALYSIS_MAX_ATTEMPTS times.
+Every transition is appended to job_events for troubleshooting.
+
+Backed by a local SQLite file (ANALYSIS_JOB_DB, default data/analysis_jobs.sqlite3). One server
+instance owns a given file.
+
+With ANALYSIS_QUEUE_BACKEND=mongo or sqlite the store is a queue shared between API nodes and
+standalone workers (worker.py): the API only enqueues, and workers claim the next job atomically
+(shortest estimated job first, with aging), report progress into the job record and
+expire each other's stale leases. "mongo" keeps the job on its session document so workers on
+several machines can share it; "sqlite" is the single-machine stand-in (API and worker processes
+sharing ANALYSIS_JOB_DB).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from utils.analysis_scheduler import DEFAULT_PRIORITY, schedule_key
+from utils.path_utils import get_data_dir
+
+QUEUE_BACKENDS = ("local", "mongo", "sqlite")
+ACTIVE_JOB_STATES = ("queued", "leased")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def job_store_enabled() -> bool:
+    """ANALYSIS_DURABLE_QUEUE=0 keeps jobs in memory only (enabled by default)."""
+    return (os.getenv("ANALYSIS_DURABLE_QUEUE") or "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def get_lease_seconds() -> int:
+    """How long a job stays leased without a heartbeat (ANALYSIS_LEASE_SECONDS, default 60)."""
+    return max(10, _env_int("ANALYSIS_LEASE_SECONDS", 60))
+
+
+def get_max_attempts() -> int:
+    """Runs allowed per job before an interrupted job is marked failed (ANALYSIS_MAX_ATTEMPTS, default 3)."""
+    return max(1, _env_int("ANALYSIS_MAX_ATTEMPTS", 3))
+
+
+def get_job_db_path() -> str:
+    return os.getenv("ANALYSIS_JOB_DB") or str(Path(get_data_dir()).joinpath("analysis_jobs.sqlite3"))
+
+
+def get_queue_backend() -> str:
+    """
+    ANALYSIS_QUEUE_BACKEND: "local" (default, jobs run in the API process), or "mongo" / "sqlite"
+    for a queue shared with standalone workers (worker.py).
+    """
+    backend = (os.getenv("ANALYSIS_QUEUE_BACKEND") or "local").strip().lower()
+    return backend if backend in QUEUE_BACKENDS else "local"
+
+
+def is_shared_queue() -> bool:
+    return get_queue_backend() != "local"
+
+
+def get_worker_poll_seconds() -> float:
+    """How often an idle worker looks for a job (ANALYSIS_WORKER_POLL_SECONDS, default 2)."""
+    try:
+        return max(0.2, float((os.getenv("ANALYSIS_WORKER_POLL_SECONDS") or "").strip() or 2.0))
+    except ValueError:
+        return 2.0
+
+
+def queue_load(jobs: List[Dict], user_id: Optional[str] = None) -> Dict:
+    """
+    Load of the shared queue from its active job records, in the shape admission control expects
+    (see admission_control.check_admission). Workers are counted as the distinct owners of
+    leased jobs (at least one).
+    """
+    now = time.time()
+    queued, running, pending, queued_seconds, owners, user_remaining = 0, 0, 0.0, 0.0, set(), []
+    for job in jobs:
+        estimated = job.get("estimated_seconds") or 0.0
+        if job.get("state") == "leased":
+            running += 1
+            owners.add(job.get("owner"))
+            remaining = max(0.0, estimated - (now - (job.get("started_at") or now)))
+        else:
+            queued += 1
+            queued_seconds += estimated
+            remaining = estimated
+        pending += remaining
+        if user_id is not None and job.get("user_id") == user_id:
+            user_remaining.append(remaining)
+    return {
+        "queued": queued,
+        "running": running,
+        "pending_seconds": pending,
+        "queued_seconds": queued_seconds,
+        "workers": max(1, len(owners)),
+        "user_jobs": len(user_remaining),
+        "user_remaining_seconds": min(user_remaining) if user_remaining else 0.0,
+    }
+
+
+class SQLiteJobStore:
+    """Job table plus transition log in one SQLite file (thread-safe; processes may share the file)."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Wait for other processes' write locks instead of failing (shared queue).
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    session_id TEXT PRIMARY KEY,
+                    video_path TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    priority TEXT NOT NULL DEFAULT 'interactive',
+                    estimated_seconds REAL,
+                    sort_key REAL,
+                    state TEXT NOT NULL,
+                    owner TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_expires_at REAL,
+                    heartbeat_at REAL,
+                    started_at REAL,
+                    error TEXT,
+                    progress TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    owner TEXT,
+                    detail TEXT,
+                    at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state)")
+            # Job files created by earlier versions.
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for name, definition in (
+                ("priority", "TEXT NOT NULL DEFAULT 'interactive'"),
+                ("estimated_seconds", "REAL"),
+                ("sort_key", "REAL"),
+                ("started_at", "REAL"),
+                ("progress", "TEXT"),
+            ):
+                if name not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {definition}")
+
+    def _log_locked(self, session_id: str, state: str, owner: Optional[str], detail: Optional[str] = None):
+        self._conn.execute(
+            "INSERT INTO job_events (session_id, state, owner, detail, at) VALUES (?, ?, ?, ?, ?)",
+            (session_id, state, owner, detail, time.time()),
+        )
+
+    def enqueue(self, session_id: str, video_path: str, user_id: str, owner: Optional[str],
+                priority: str = DEFAULT_PRIORITY, estimated_seconds: Optional[float] = None):
+        """
+        Record a queued job (re-queuing a finished job resets its attempt count).
+        `owner` is None for jobs left to whichever worker claims them first (shared queue).
+        """
+        now = time.time()
+        sort_key = schedule_key(priority, estimated_seconds or 0.0, now)
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM jobs WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None or row["state"] in ("completed", "failed", "cancelled"):
+                self._conn.execute(
+                    """
+                    INSERT OR REPLACE INTO jobs
+                        (session_id, video_path, user_id, priority, estimated_seconds, sort_key, state, owner,
+                         attempts, lease_expires_at, heartbeat_at, started_at, error, progress, created_at,
+                         updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, 0, NULL, NULL, NULL, NULL, NULL, ?, ?)
+                    """,
+                    (session_id, video_path, user_id, priority, estimated_seconds, sort_key, owner, now, now),
+                )
+            else:
+                # Recovered job: keep its attempt count and original position.
+                self._conn.execute(
+                    "UPDATE jobs SET state = 'queued', owner = ?, lease_expires_at = NULL, updated_at = ? "
+                    "WHERE session_id = ?",
+                    (owner, now, session_id),
+                )
+            self._log_locked(session_id, "queued", owner)
+
+    def lease(self, session_id: str, owner: str, lease_seconds: int) -> int:
+        """Lease a job to `owner`. Returns the attempt number of this run."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = 'leased', owner = ?, attempts = attempts + 1, "
+                "lease_expires_at = ?, heartbeat_at = ?, started_at = ?, updated_at = ? WHERE session_id = ?",
+                (owner, now + lease_seconds, now, now, now, session_id),
+            )
+            row = self._conn.execute("SELECT attempts FROM jobs WHERE session_id = ?", (session_id,)).fetchone()
+            self._log_locked(session_id, "leased", owner)
+        return row["attempts"] if row else 1
+
+    def heartbeat(self, session_ids: Iterable[str], owner: str, lease_seconds: int):
+        """Extend the leases `owner` holds on these jobs."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE jobs SET lease_expires_at = ?, heartbeat_at = ? "
+                "WHERE session_id = ? AND owner = ? AND state = 'leased'",
+                [(now + lease_seconds, now, session_id, owner) for session_id in session_ids],
+            )
+
+    def complete(self, session_id: str, owner: str):
+        self._finish(session_id, owner, "completed", None)
+
+    def fail(self, session_id: str, owner: str, error: str):
+        self._finish(session_id, owner, "failed", error)
+
+    def _finish(self, session_id: str, owner: str, state: str, error: Optional[str]):
+        with self._lock:
+            # A job cancelled meanwhile stays cancelled.
+            cursor = self._conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE session_id = ? AND owner = ? AND state IN ('queued', 'leased')",
+                (state, error, time.time(), session_id, owner),
+            )
+            if cursor.rowcount:
+                self._log_locked(session_id, state, owner, error)
+
+    def cancel(self, session_id: str) -> bool:
+        """Stop a queued or leased job for good. Returns False if there was no such job."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET state = 'cancelled', lease_expires_at = NULL, updated_at = ? "
+                "WHERE session_id = ? AND state IN ('queued', 'leased')",
+                (time.time(), session_id),
+            )
+            if cursor.rowcount:
+                self._log_locked(session_id, "cancelled", None)
+        return cursor.rowcount > 0
+    
+    def unclaim(self, session_id: str):
+        """Give a recovered job back (no owner) so the next recover() picks it up again."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET owner = NULL, updated_at = ? WHERE session_id = ? AND state = 'queued'",
+                (time.time(), session_id),
+            )
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE session_id = ?", (session_id,)).fetchone()
+        return self._job(row) if row else None
+
+    @staticmethod
+    def _job(row) -> Dict:
+        job = dict(row)
+        job["progress"] = json.loads(job["progress"]) if job.get("progress") else None
+        return job
+
+    def claim(self, owner: str, lease_seconds: int) -> Optional[Dict]:
+        """
+        Lease the next queued job to `owner` (shared queue). Safe against other worker processes
+        claiming at the same time.
+
+        Returns:
+            The claimed job (attempts already counting this run), or None if nothing is queued
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE state = 'queued' ORDER BY COALESCE(sort_key, created_at), created_at "
+                    "LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET state = 'leased', owner = ?, attempts = attempts + 1, lease_expires_at = ?, "
+                        "heartbeat_at = ?, started_at = ?, progress = NULL, updated_at = ? WHERE session_id = ?",
+                        (owner, now + lease_seconds, now, now, now, row["session_id"]),
+                    )
+                    self._log_locked(row["session_id"], "leased", owner)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = self._job(row)
+        job.update(state="leased", owner=owner, attempts=job["attempts"] + 1, started_at=now)
+        return job
+
+    def expire_leases(self, max_attempts: int) -> List[Dict]:
+        """
+        Put jobs whose worker stopped renewing its lease back in the queue (shared queue).
+
+        Returns:
+            Interrupted jobs that already used max_attempts runs; they are marked failed
+        """
+        now = time.time()
+        exhausted = []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE state = 'leased' AND lease_expires_at < ?", (now,)
+            ).fetchall()
+            for row in rows:
+                job = self._job(row)
+                if job["attempts"] >= max_attempts:
+                    job["error"] = f"Analysis was interrupted {job['attempts']} times"
+                    self._conn.execute(
+                        "UPDATE jobs SET state = 'failed', error = ?, lease_expires_at = NULL, updated_at = ? "
+                        "WHERE session_id = ? AND state = 'leased'",
+                        (job["error"], now, job["session_id"]),
+                    )
+                    self._log_locked(job["session_id"], "failed", job["owner"], job["error"])
+                    exhausted.append(job)
+                    continue
+                self._conn.execute(
+                    "UPDATE jobs SET state = 'queued', owner = NULL, lease_expires_at = NULL, updated_at = ? "
+                    "WHERE session_id = ? AND state = 'leased'",
+                    (now, job["session_id"]),
+                )
+                self._log_locked(job["session_id"], "requeued", job["owner"], "lease expired")
+        return exhausted
+
+    def cancelled(self, session_ids: Iterable[str]) -> List[str]:
+        """Which of these jobs were cancelled (workers poll this for the jobs they run)."""
+        session_ids = list(session_ids)
+        if not session_ids:
+            return []
+        placeholders = ", ".join("?" * len(session_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT session_id FROM jobs WHERE state = 'cancelled' AND session_id IN ({placeholders})",
+                session_ids,
+            ).fetchall()
+        return [row["session_id"] for row in rows]
+
+    def report_progress(self, session_id: str, owner: str, progress: Dict):
+        """Store the latest progress snapshot of a job `owner` runs (read by the API nodes)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress = ? WHERE session_id = ? AND owner = ?",
+                (json.dumps(progress, default=str), session_id, owner),
+            )
+
+    def active_jobs(self) -> List[Dict]:
+        """Queued and leased jobs."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id, user_id, priority, estimated_seconds, state, owner, started_at "
+                "FROM jobs WHERE state IN ('queued', 'leased')"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def position(self, session_id: str) -> Tuple[Optional[int], int]:
+        """1-based position of a queued job in claim order, and the number of queued jobs."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id FROM jobs WHERE state = 'queued' ORDER BY COALESCE(sort_key, created_at), created_at"
+            ).fetchall()
+        order = [row["session_id"] for row in rows]
+        return (order.index(session_id) + 1 if session_id in order else None), len(order)
+
+    def recover(self, owner: str, max_attempts: int) -> Dict[str, List[Dict]]:
+        """
+        Claim jobs abandoned by a previous or dead worker: queued jobs owned by another server
+        instance and leased jobs whose lease expired.
+
+        Returns:
+            {"requeue": jobs to put back in the queue (oldest first),
+             "exhausted": interrupted jobs that already used max_attempts runs}
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT * FROM jobs
+                WHERE (state = 'queued' AND (owner IS NULL OR owner != ?))
+                   OR (state = 'leased' AND lease_expires_at < ?)
+                ORDER BY created_at
+                """,
+                (owner, now),
+            ).fetchall()
+
+            requeue, exhausted = [], []
+            for row in rows:
+                job = dict(row)
+                if job["state"] == "leased" and job["attempts"] >= max_attempts:
+                    error = f"Analysis was interrupted {job['attempts']} times"
+                    self._conn.execute(
+                        "UPDATE jobs SET state = 'failed', error = ?, lease_expires_at = NULL, updated_at = ? "
+                        "WHERE session_id = ?",
+                        (error, now, job["session_id"]),
+                    )
+                    self._log_locked(job["session_id"], "failed", owner, error)
+                    job["error"] = error
+                    exhausted.append(job)
+                    continue
+                detail = "lease expired" if job["state"] == "leased" else "orphaned in queue"
+                self._conn.execute(
+                    "UPDATE jobs SET state = 'queued', owner = ?, lease_expires_at = NULL, updated_at = ? "
+                    "WHERE session_id = ?",
+                    (owner, now, job["session_id"]),
+                )
+                self._log_locked(job["session_id"], "requeued", owner, detail)
+                requeue.append(job)
+        return {"requeue": requeue, "exhausted": exhausted}
+
+
+class MongoJobStore:
+    """
+    Shared queue kept on the session documents (field analysis_job), so API nodes and workers on
+    several machines coordinate through the database they already use. Offers the shared-queue
+    operations of SQLiteJobStore; transitions are not logged separately.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        try:
+            collection.create_index([("analysis_job.state", 1), ("analysis_job.sort_key", 1)])
+        except Exception as e:
+            print(f"[Job Store] WARNING: Could not create the analysis queue index: {e}")
+
+    @staticmethod
+    def _job(doc) -> Optional[Dict]:
+        job = (doc or {}).get("analysis_job")
+        if not job:
+            return None
+        job = dict(job)
+        job["session_id"] = str(doc["_id"])
+        return job
+
+    def enqueue(self, session_id: str, video_path: str, user_id: str, owner: Optional[str],
+                priority: str = DEFAULT_PRIORITY, estimated_seconds: Optional[float] = None):
+        """Record a queued job on its session (re-queuing a finished job resets its attempt count)."""
+        now = time.time()
+        job = {
+            "video_path": video_path,
+            "user_id": user_id,
+            "priority": priority,
+            "estimated_seconds": estimated_seconds,
+            "sort_key": schedule_key(priority, estimated_seconds or 0.0, now),
+            "state": "queued",
+            "owner": owner,
+            "attempts": 0,
+            "lease_expires_at": None,
+            "heartbeat_at": None,
+            "started_at": None,
+            "error": None,
+            "progress": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        result = self.collection.update_one(
+            {"_id": ObjectId(session_id), "analysis_job.state": {"$nin": list(ACTIVE_JOB_STATES)}},
+            {"$set": {"analysis_job": job}}
+        )
+        if not result.matched_count:
+            # Still active (a recovered job): keep its attempt count and original position.
+            self.collection.update_one(
+                {"_id": ObjectId(session_id)},
+                {"$set": {"analysis_job.state": "queued", "analysis_job.owner": owner,
+                          "analysis_job.lease_expires_at": None, "analysis_job.updated_at": now}}
+            )
+
+    def claim(self, owner: str, lease_seconds: int) -> Optional[Dict]:
+        """Lease the next queued job to `owner` (one atomic find_one_and_update). None if nothing is queued."""
+        now = time.time()
+        doc = self.collection.find_one_and_update(
+            {"analysis_job.state": "queued"},
+            {
+                "$set": {
+                    "analysis_job.state": "leased",
+                    "analysis_job.owner": owner,
+                    "analysis_job.lease_expires_at": now + lease_seconds,
+                    "analysis_job.heartbeat_at": now,
+                    "analysis_job.started_at": now,
+                    "analysis_job.progress": None,
+                    "analysis_job.updated_at": now,
+                },
+                "$inc": {"analysis_job.attempts": 1},
+            },
+            sort=[("analysis_job.sort_key", 1)],
+            projection={"analysis_job": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        return self._job(doc)
+
+    def heartbeat(self, session_ids: Iterable[str], owner: str, lease_seconds: int):
+        """Extend the leases `owner` holds on these jobs."""
+        session_ids = [ObjectId(session_id) for session_id in session_ids]
+        if not session_ids:
+            return
+        now = time.time()
+        self.collection.update_many(
+            {"_id": {"$in": session_ids}, "analysis_job.owner": owner, "analysis_job.state": "leased"},
+            {"$set": {"analysis_job.lease_expires_at": now + lease_seconds, "analysis_job.heartbeat_at": now}}
+        )
+
+    def complete(self, session_id: str, owner: str):
+        self._finish(session_id, owner, "completed", None)
+
+    def fail(self, session_id: str, owner: str, error: str):
+        self._finish(session_id, owner, "failed", error)
+
+    def _finish(self, session_id: str, owner: str, state: str, error: Optional[str]):
+        # A job cancelled meanwhile stays cancelled.
+        self.collection.update_one(
+            {"_id": ObjectId(session_id), "analysis_job.owner": owner,
+             "analysis_job.state": {"$in": list(ACTIVE_JOB_STATES)}},
+            {"$set": {"analysis_job.state": state, "analysis_job.error": error,
+                      "analysis_job.lease_expires_at": None, "analysis_job.updated_at": time.time()}}
+        )
+
+    def cancel(self, session_id: str) -> bool:
+        """Stop a queued or leased job for good. Returns False if there was no such job."""
+        result = self.collection.update_one(
+            {"_id": ObjectId(session_id), "analysis_job.state": {"$in": list(ACTIVE_JOB_STATES)}},
+            {"$set": {"analysis_job.state": "cancelled", "analysis_job.lease_expires_at": None,
+                      "analysis_job.updated_at": time.time()}}
+        )
+        return result.modified_count > 0
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        return self._job(self.collection.find_one({"_id": ObjectId(session_id)}, {"analysis_job": 1}))
+
+    def expire_leases(self, max_attempts: int) -> List[Dict]:
+        """
+        Put jobs whose worker stopped renewing its lease back in the queue.
+
+        Returns:
+            Interrupted jobs that already used max_attempts runs; they are marked failed
+        """
+        now = time.time()
+        exhausted = []
+        expired = self.collection.find(
+            {"analysis_job.state": "leased", "analysis_job.lease_expires_at": {"$lt": now}},
+            {"analysis_job": 1}
+        )
+        for doc in expired:
+            job = self._job(doc)
+            match = {"_id": doc["_id"], "analysis_job.state": "leased", "analysis_job.owner": job.get("owner")}
+            if (job.get("attempts") or 0) >= max_attempts:
+                job["error"] = f"Analysis was interrupted {job['attempts']} times"
+                result = self.collection.update_one(match, {"$set": {
+                    "analysis_job.state": "failed", "analysis_job.error": job["error"],
+                    "analysis_job.lease_expires_at": None, "analysis_job.updated_at": now,
+                }})
+                if result.modified_count:
+                    exhausted.append(job)
+                continue
+            self.collection.update_one(match, {"$set": {
+                "analysis_job.state": "queued", "analysis_job.owner": None,
+                "analysis_job.lease_expires_at": None, "analysis_job.updated_at": now,
+            }})
+        return exhausted
+
+    def cancelled(self, session_ids: Iterable[str]) -> List[str]:
+        """Which of these jobs were cancelled (workers poll this for the jobs they run)."""
+        session_ids = [ObjectId(session_id) for session_id in session_ids]
+        if not session_ids:
+            return []
+        docs = self.collection.find({"_id": {"$in": session_ids}, "analysis_job.state": "cancelled"}, {"_id": 1})
+        return [str(doc["_id"]) for doc in docs]
+
+    def report_progress(self, session_id: str, owner: str, progress: Dict):
+        """Store the latest progress snapshot of a job `owner` runs (read by the API nodes)."""
+        self.collection.update_one(
+            {"_id": ObjectId(session_id), "analysis_job.owner": owner},
+            {"$set": {"analysis_job.progress": progress}}
+        )
+
+    def active_jobs(self) -> List[Dict]:
+        """Queued and leased jobs."""
+        docs = self.collection.find(
+            {"analysis_job.state": {"$in": list(ACTIVE_JOB_STATES)}},
+            {f"analysis_job.{key}": 1 for key in
+             ("user_id", "priority", "estimated_seconds", "state", "owner", "started_at")}
+        )
+        return [self._job(doc) for doc in docs]
+
+    def position(self, session_id: str) -> Tuple[Optional[int], int]:
+        """1-based position of a queued job in claim order, and the number of queued jobs."""
+        docs = self.collection.find({"analysis_job.state": "queued"}, {"_id": 1}).sort("analysis_job.sort_key", 1)
+        order = [str(doc["_id"]) for doc in docs]
+        return (order.index(session_id) + 1 if session_id in order else None), len(order)
+
+
+# Global instance
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_store():
+    """
+    Get or create the global job store: the shared queue for ANALYSIS_QUEUE_BACKEND=mongo|sqlite,
+    else the local SQLite store (None when ANALYSIS_DURABLE_QUEUE=0).
+    """
+    global _store
+    backend = get_queue_backend()
+    if backend == "local" and not job_store_enabled():
+        return None
+    with _store_lock:
+        if _store is None:
+            if backend == "mongo":
+                from config.database import get_collection
+                _store = MongoJobStore(get_collection("session"))
+                print("[Job Store] Using the session collection as the shared analysis queue")
+            else:
+                _store = SQLiteJobStore(get_job_db_path())
+                print(f"[Job Store] Using {_store.db_path}" + (" (shared queue)" if backend == "sqlite" else ""))
+        return _store
@@ -0,0 +1,167 @@
+"""
+Media Probe
+Container and stream metadata of an uploaded recording from a single ffprobe call, cached per
+file (path, size and modification time), so the analyze route, the scheduler and the analysis
+stages share one probe instead of each extracting audio or opening the video again.
+"""
+
+import json
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+PROBE_CACHE_SIZE = 256  # files whose metadata is kept
+PROBE_TIMEOUT_SECONDS = 30
+# Seek target beyond the end of any recording: the demuxer lands on the last keyframe
+TAIL_SEEK_SECONDS = 24 * 3600
+
+# path -> ((size, mtime_ns), metadata)
+_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class MediaProbeError(Exception):
+    """ffprobe ran but could not read the file (corrupt, truncated or not a media file)."""
+
+
+def _number(value) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None  # missing or "N/A"
+    return number if number > 0 else None
+
+
+def _frame_rate(value) -> Optional[float]:
+    """ffprobe rates are fractions like "30000/1001"; "0/0" means unknown."""
+    try:
+        num, _, den = str(value).partition("/")
+        rate = float(num) / float(den or 1)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    return rate if 0 < rate <= 240 else None
+
+
+def _run_ffprobe(args: list) -> str:
+    from utils.path_utils import resolve_ffprobe_executable
+
+    result = subprocess.run(
+        [resolve_ffprobe_executable(), "-v", "error", *args],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=PROBE_TIMEOUT_SECONDS
+    )
+    if result.returncode != 0:
+        raise MediaProbeError(f"ffprobe failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def _last_packet_end(path: str, stream: str) -> Optional[float]:
+    """
+    End time of the last packet of the first `stream` ("a" or "v") stream. Browser recordings
+    (MediaRecorder WebM) carry no duration in the header. Only the packets after the last
+    keyframe are listed; if the demuxer cannot seek there, the whole file is demuxed (not decoded).
+
+    Raises:
+        subprocess.TimeoutExpired: If ffprobe takes longer than PROBE_TIMEOUT_SECONDS
+    """
+    try:
+        end = _packet_end(path, stream, ["-read_intervals", f"{TAIL_SEEK_SECONDS}%"])
+    except MediaProbeError:
+        end = None
+    if end is None:
+        end = _packet_end(path, stream, [])
+    return end
+
+
+def _packet_end(path: str, stream: str, interval_args: list) -> Optional[float]:
+    output = _run_ffprobe([
+        "-select_streams", f"{stream}:0",
+        *interval_args,
+        "-show_entries", "packet=pts_time,duration_time",
+        "-of", "csv=p=0",
+        path
+    ])
+    end = None
+    for line in output.splitlines():
+        pts, _, length = line.partition(",")
+        pts = _number(pts)
+        if pts is not None:
+            end = max(end or 0.0, pts + (_number(length) or 0.0))
+    return end
+
+
+def _probe(path: str) -> Dict:
+    data = json.loads(_run_ffprobe(["-show_streams", "-show_format", "-of", "json", path]) or "{}")
+    streams = data.get("streams") or []
+    if not streams:
+        raise MediaProbeError("no audio or video streams found")
+    container = data.get("format") or {}
+    # Cover art in audio files shows up as a one-frame video stream.
+    video = next((s for s in streams if s.get("codec_type") == "video"
+                  and not (s.get("disposition") or {}).get("attached_pic")), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+    duration = _number(container.get("duration")) or max(
+        (_number(s.get("duration")) or 0.0 for s in (video, audio) if s), default=0.0
+    ) or None
+    if duration is None and (audio or video):
+        duration = _last_packet_end(path, "a" if audio else "v")
+
+    fps = None
+    frame_count = None
+    if video:
+        fps = _frame_rate(video.get("avg_frame_rate")) or _frame_rate(video.get("r_frame_rate"))
+        frame_count = int(_number(video.get("nb_frames")) or 0) or None
+        if frame_count is None and duration and fps:
+            frame_count = int(duration * fps)
+
+    return {
+        "duration": duration,
+        "format": container.get("format_name"),
+        "bit_rate": int(_number(container.get("bit_rate")) or 0) or None,
+        "has_video": video is not None,
+        "video_codec": video.get("codec_name") if video else None,
+        "width": video.get("width") if video else None,
+        "height": video.get("height") if video else None,
+        "fps": round(fps, 3) if fps else None,
+        "frame_count": frame_count,
+        "has_audio": audio is not None,
+        "audio_codec": audio.get("codec_name") if audio else None,
+        "sample_rate": (int(_number(audio.get("sample_rate")) or 0) or None) if audio else None,
+        "channels": audio.get("channels") if audio else None,
+    }
+
+
+def probe_media(path: str) -> Dict:
+    """
+    Metadata of a media file, probed once per version of the file.
+
+    Args:
+        path: Video or audio file
+
+    Returns:
+        Dictionary with duration (seconds), format, bit_rate, has_video, video_codec, width,
+        height, fps, frame_count, has_audio, audio_codec, sample_rate and channels
+        (None when unknown)
+
+    Raises:
+        MediaProbeError: If ffprobe cannot read the file
+        Exception: If the file is missing or ffprobe is unavailable
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    version = (stat.st_size, stat.st_mtime_ns)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == version:
+            _cache.move_to_end(path)
+            return dict(cached[1])
+
+    info = _probe(path)
+    with _cache_lock:
+        _cache[path] = (version, info)
+        _cache.move_to_end(path)
+        while len(_cache) > PROBE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return dict(info)
@@ -79,6 +79,36 @@ def get_uploads_dir() -> str:
     return uploads_dir
 
 
+def get_cache_dir() -> str:
+    """
+    Local cache location (derived data that is safe to delete):
+    - dev: server/cache
+    - packaged: %APPDATA%/AI Presentation Coach/cache
+    """
+    if is_packaged():
+        cache_dir = str(Path(get_app_roaming_root()).joinpath("cache"))
+    else:
+        cache_dir = str(Path(get_project_server_dir()).joinpath("cache"))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def get_data_dir() -> str:
+    """
+    Local state that must survive restarts (e.g. the analysis job queue):
+    - dev: server/data
+    - packaged: %APPDATA%/AI Presentation Coach/data
+    """
+    if is_packaged():
+        data_dir = str(Path(get_app_roaming_root()).joinpath("data"))
+    else:
+        data_dir = str(Path(get_project_server_dir()).joinpath("data"))
+
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
+
+
 def resolve_uploads_dir(upload_folder_env: Optional[str]) -> str:
     """
     Resolve UPLOAD_FOLDER from env (may be absolute or relative).
@@ -0,0 +1,226 @@
+"""
+Resource Governor
+Splits the machine's cores between the analysis workers and the Whisper worker processes, and
+applies each one's budget to every library that starts its own thread pool.
+
+Left alone, torch, OpenCV, NumPy/BLAS (librosa) and OpenMP each size their pools to all cores, so
+a few concurrent analyses run several times more threads than there are cores. The governor gives
+- each Whisper worker process WHISPER_TORCH_THREADS cores (default: an equal share of the cores)
+- each analysis worker ANALYSIS_THREADS_PER_WORKER cores (default: what the Whisper workers leave,
+  split evenly)
+and applies a budget to torch intra-op threads, cv2.setNumThreads, the BLAS/OpenMP environment,
+threadpoolctl (when installed) and ffmpeg's -threads.
+
+ANALYSIS_CPU_AFFINITY=1 also pins every worker process to its own cores (analysis worker processes
+need ANALYSIS_EXECUTOR=process). ANALYSIS_CPU_CORES limits how many cores are shared out.
+"""
+
+import os
+import sys
+import threading
+from typing import Dict, List, Optional
+
+# Thread-count variables read by OpenMP, MKL, OpenBLAS, numexpr and Accelerate when they load.
+BLAS_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def affinity_enabled() -> bool:
+    """ANALYSIS_CPU_AFFINITY=1 pins worker processes to their cores (disabled by default)."""
+    return (os.getenv("ANALYSIS_CPU_AFFINITY") or "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_available_cores() -> List[int]:
+    """CPU ids this process may run on, limited to the first ANALYSIS_CPU_CORES if set."""
+    cores = None
+    if hasattr(os, "sched_getaffinity"):
+        try:
+            cores = sorted(os.sched_getaffinity(0))
+        except OSError:
+            cores = None
+    if cores is None:
+        try:
+            import psutil
+            cores = sorted(psutil.Process().cpu_affinity())
+        except Exception:
+            cores = list(range(os.cpu_count() or 1))
+    limit = _env_int("ANALYSIS_CPU_CORES", 0)
+    return cores[:limit] if limit > 0 else cores
+
+
+def _core_sets(cores: List[int], start: int, count: int, size: int) -> List[List[int]]:
+    """`count` consecutive blocks of `size` cores from position `start`, wrapping when oversubscribed."""
+    return [
+        [cores[(start + index * size + offset) % len(cores)] for offset in range(size)]
+        for index in range(count)
+    ]
+
+
+def plan_resources(analysis_workers: int, whisper_workers: int, cores: Optional[List[int]] = None) -> Dict:
+    """
+    Core budget of each analysis worker and Whisper worker process.
+
+    Args:
+        analysis_workers: Analysis pool slots (ANALYSIS_MAX_WORKERS)
+        whisper_workers: Whisper worker processes (0 = transcription runs inside the analysis workers)
+        cores: CPU ids to share out (default: get_available_cores())
+
+    Returns:
+        Dictionary with cores (count), and per group ("analysis", "whisper") its workers,
+        threads per worker and the core set of each worker for affinity pinning
+    """
+    cores = cores or get_available_cores()
+    total = len(cores)
+    analysis_workers = max(1, analysis_workers)
+    whisper_workers = max(0, whisper_workers)
+
+    whisper_threads = _env_int("WHISPER_TORCH_THREADS", 0)
+    if whisper_threads <= 0:
+        whisper_threads = max(1, total // (analysis_workers + whisper_workers))
+    whisper_total = whisper_workers * whisper_threads
+
+    analysis_threads = _env_int("ANALYSIS_THREADS_PER_WORKER", 0)
+    if analysis_threads <= 0:
+        analysis_threads = max(1, (total - whisper_total) // analysis_workers)
+
+    return {
+        "cores": total,
+        "whisper": {
+            "workers": whisper_workers,
+            "threads": whisper_threads,
+            "affinity": _core_sets(cores, 0, whisper_workers, whisper_threads),
+        },
+        "analysis": {
+            "workers": analysis_workers,
+            "threads": analysis_threads,
+            "affinity": _core_sets(cores, whisper_total, analysis_workers, analysis_threads),
+        },
+        "oversubscribed": whisper_total + analysis_workers * analysis_threads > total,
+    }
+
+
+# Plan of this server process (parent of the worker processes)
+_plan = None
+_plan_lock = threading.Lock()
+# Budget applied to this process: {"threads": int, "cores": list or None, "label": str}
+_applied = None
+
+
+def get_resource_plan(analysis_workers: Optional[int] = None) -> Dict:
+    """
+    Plan for this server, computed once from WHISPER_WORKERS and the analysis pool size
+    (`analysis_workers` of the first caller, default ANALYSIS_MAX_WORKERS).
+    """
+    global _plan
+    with _plan_lock:
+        if _plan is None:
+            if analysis_workers is None:
+                from utils.analysis_manager import resolve_max_workers
+                analysis_workers = resolve_max_workers()
+            from utils.transcription_service import resolve_worker_count
+            _plan = plan_resources(analysis_workers, resolve_worker_count())
+        return _plan
+
+
+def describe_plan(plan: Dict) -> str:
+    whisper = plan["whisper"]
+    analysis = plan["analysis"]
+    parts = [f"{plan['cores']} core(s)",
+             f"{analysis['workers']} analysis worker(s) x {analysis['threads']} thread(s)"]
+    if whisper["workers"]:
+        parts.append(f"{whisper['workers']} Whisper worker(s) x {whisper['threads']} thread(s)")
+    else:
+        parts.append("Whisper inside the analysis workers")
+    parts.append("CPU affinity on" if affinity_enabled() else "CPU affinity off")
+    if plan["oversubscribed"]:
+        parts.append("OVERSUBSCRIBED: budgets exceed the cores")
+    return ", ".join(parts)
+
+
+def set_thread_env(threads: int, override: bool = True):
+    """
+    BLAS/OpenMP thread variables for libraries not loaded yet in this process (and for child
+    processes it spawns). Without `override`, values the user set explicitly are kept.
+    """
+    for name in BLAS_THREAD_ENV_VARS:
+        if override or not os.getenv(name):
+            os.environ[name] = str(threads)
+
+
+def apply_thread_budget(threads: int, cores: Optional[List[int]] = None, label: str = "Analysis",
+                        libraries: tuple = ("torch", "cv2")):
+    """
+    Limit this process to `threads` threads per library and optionally pin it to `cores`.
+    Call early in a worker process: BLAS/OpenMP libraries loaded later read the environment,
+    while torch and OpenCV (`libraries`) are imported here to set their pools.
+    """
+    global _applied
+    threads = max(1, threads)
+    set_thread_env(threads)
+    applied = [f"blas/omp={threads}"]
+
+    if cores and affinity_enabled():
+        if _set_affinity(cores):
+            applied.append(f"cores={cores}")
+
+    try:
+        # BLAS/OpenMP pools that were already loaded before the environment was set.
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=threads)
+    except Exception:
+        pass
+
+    if "torch" in libraries or "torch" in sys.modules:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+            applied.append(f"torch={torch.get_num_threads()}")
+        except Exception:
+            pass
+
+    if "cv2" in libraries or "cv2" in sys.modules:
+        try:
+            import cv2
+            cv2.setNumThreads(threads)
+            applied.append(f"cv2={threads}")
+        except Exception:
+            pass
+
+    _applied = {"threads": threads, "cores": cores, "label": label}
+    print(f"[Resource Governor] {label} (pid={os.getpid()}): {', '.join(applied)}")
+
+
+def _set_affinity(cores: List[int]) -> bool:
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)
+        else:
+            import psutil
+            psutil.Process().cpu_affinity(cores)
+        return True
+    except Exception as e:
+        print(f"[Resource Governor] WARNING: Could not pin pid {os.getpid()} to cores {cores}: {e}")
+        return False
+
+
+def get_thread_budget() -> Optional[int]:
+    """Threads per library granted to this process (None if no budget was applied)."""
+    return _applied["threads"] if _applied else None
+
+
+def ffmpeg_thread_args() -> List[str]:
+    """ffmpeg arguments that keep its encoder/filter threads within this process's budget."""
+    threads = get_thread_budget()
+    return ["-threads", str(threads)] if threads else []
@@ -0,0 +1,275 @@
+"""
+Resumable Uploads
+Chunked upload protocol for large recordings: init, PUT byte ranges in order, finalize.
+
+Chunks are streamed straight into a file in the uploads folder and hashed (SHA-256) as they
+arrive, so the body is neither buffered in a temp file nor copied afterwards: finalize only
+renames the file to its content-addressed blob (see blob_store).
+After a dropped connection the client asks for the upload's offset and continues from there.
+A chunk is written only after claiming the stored offset with a compare-and-set on the upload
+record, so two requests for the same upload, in any API process, never write at once.
+
+UPLOAD_MAX_MB limits one upload (default 1024), UPLOAD_CHUNK_MB is the chunk size suggested to
+clients (default 8), and unfinished uploads are deleted after UPLOAD_EXPIRY_HOURS (default 24).
+"""
+
+import hashlib
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+READ_BLOCK_BYTES = 1024 * 1024
+CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+# A chunk writer renews its claim while it streams; one not renewed for CLAIM_STALE_SECONDS died
+CLAIM_RENEW_SECONDS = 10
+CLAIM_STALE_SECONDS = 120
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def get_max_upload_bytes() -> int:
+    """Largest upload accepted (UPLOAD_MAX_MB, default 1024; 0 = no limit)."""
+    return int(max(0.0, _env_float("UPLOAD_MAX_MB", 1024.0)) * 1024 * 1024)
+
+
+def get_chunk_bytes() -> int:
+    """Chunk size suggested to clients (UPLOAD_CHUNK_MB, default 8)."""
+    return int(max(0.25, _env_float("UPLOAD_CHUNK_MB", 8.0)) * 1024 * 1024)
+
+
+def get_upload_expiry_seconds() -> float:
+    """Age at which an unfinished upload is deleted (UPLOAD_EXPIRY_HOURS, default 24)."""
+    return max(0.1, _env_float("UPLOAD_EXPIRY_HOURS", 24.0)) * 3600
+
+
+def parse_content_range(header: Optional[str]) -> Tuple[int, int, Optional[int]]:
+    """
+    Parse "bytes <first>-<last>/<total>".
+
+    Returns:
+        (start offset, length, total size or None for "*")
+
+    Raises:
+        UploadError: If the header is missing or malformed
+    """
+    match = CONTENT_RANGE.match((header or "").strip())
+    if not match:
+        raise UploadError(400, "Content-Range header required: bytes <first>-<last>/<total>")
+    first, last, total = int(match.group(1)), int(match.group(2)), match.group(3)
+    if last < first:
+        raise UploadError(400, "Invalid Content-Range")
+    return first, last - first + 1, None if total == "*" else int(total)
+
+
+class UploadError(Exception):
+    """A chunked upload request that cannot be applied (status code for the HTTP response)."""
+
+    def __init__(self, status: int, message: str, offset: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.offset = offset
+
+    def to_dict(self) -> Dict:
+        payload = {"success": False, "error": self.message}
+        if self.offset is not None:
+            payload["offset"] = self.offset
+        return payload
+
+
+class ResumableUploads:
+    """
+    Upload records in a MongoDB collection (so any API process can continue an upload),
+    data in the uploads folder. Chunks must arrive in order: each starts at the current offset.
+    """
+
+    def __init__(self, collection, upload_folder: str):
+        self.collection = collection
+        self.upload_folder = upload_folder
+        # upload_id -> (offset, sha256 of the bytes before it) for chunks written by this process;
+        # rebuilt from the file when the previous chunk went to another process
+        self._hashers: Dict[str, tuple] = {}
+
+    def path(self, upload: Dict) -> str:
+        return os.path.join(self.upload_folder, upload["filename"])
+
+    def create(self, user_id: str, extension: str, size: int, metadata: Dict) -> Dict:
+        """
+        Start an upload of `size` bytes and reserve its final file.
+
+        Args:
+            user_id: Owner
+            extension: File extension (already validated)
+            size: Declared size in bytes
+            metadata: Session fields applied on finalize (title, start_time, end_time)
+
+        Raises:
+            UploadError: If the size is missing or over UPLOAD_MAX_MB
+        """
+        max_bytes = get_max_upload_bytes()
+        if size <= 0:
+            raise UploadError(400, "Upload size must be a positive number of bytes")
+        if max_bytes and size > max_bytes:
+            raise UploadError(413, f"File is too large (limit {max_bytes // (1024 * 1024)} MB)")
+        self.expire_stale()
+
+        upload_id = uuid.uuid4().hex
+        now = datetime.now()
+        upload = {
+            "_id": upload_id,
+            "user_id": user_id,
+            "filename": f"{user_id}_{int(now.timestamp())}_{upload_id[:8]}.{extension}",
+            "size": size,
+            "received": 0,
+            "metadata": metadata,
+            "created_at": now.isoformat(),
+            "updated_ts": time.time(),
+        }
+        open(self.path(upload), "wb").close()
+        self.collection.insert_one(upload)
+        print(f"[Upload] Started {upload_id}: {size} bytes -> {upload['filename']}")
+        return upload
+
+    def get(self, upload_id: str, user_id: str) -> Optional[Dict]:
+        return self.collection.find_one({"_id": upload_id, "user_id": user_id})
+
+    def _hasher(self, upload: Dict, offset: int):
+        """SHA-256 state after the first `offset` bytes (re-read from disk after a restart or on another process)."""
+        cached = self._hashers.get(upload["_id"])
+        if cached and cached[0] == offset:
+            return cached[1]
+        hasher = hashlib.sha256()
+        remaining = offset
+        with open(self.path(upload), "rb") as f:
+            while remaining > 0:
+                block = f.read(min(READ_BLOCK_BYTES, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        return hasher
+
+    def _claim(self, upload_id: str, start: int) -> Optional[str]:
+        """
+        Claim the upload for one chunk at `start`: succeeds only while the stored offset is still
+        `start` and no live writer holds it. Returns the claim token, or None.
+        """
+        now = time.time()
+        writer = uuid.uuid4().hex
+        claimed = self.collection.find_one_and_update(
+            {
+                "_id": upload_id,
+                "received": start,
+                "$or": [{"writer": None}, {"writer_ts": {"$lt": now - CLAIM_STALE_SECONDS}}],
+            },
+            {"$set": {"writer": writer, "writer_ts": now}}
+        )
+        return writer if claimed is not None else None
+
+    def write(self, upload: Dict, start: int, length: int, stream) -> int:
+        """
+        Append one chunk read from `stream` at `start` (must equal the received offset).
+        Bytes that arrived before a dropped connection are kept, so the client resumes after them.
+
+        Returns:
+            New offset
+
+        Raises:
+            UploadError: On an out-of-order or oversized chunk, a chunk already being written by
+                another request, or an incomplete body
+        """
+        if start + length > upload["size"]:
+            raise UploadError(413, f"Chunk ends past the declared size ({upload['size']} bytes)", upload["received"])
+        writer = self._claim(upload["_id"], start)
+        if writer is None:
+            current = self.collection.find_one({"_id": upload["_id"]})
+            if current is None:
+                raise UploadError(404, "Upload not found or expired")
+            offset = current["received"]
+            if start != offset:
+                raise UploadError(409, f"Expected a chunk starting at byte {offset}", offset)
+            raise UploadError(409, "Another chunk of this upload is still being written", offset)
+        claim = {"_id": upload["_id"], "writer": writer}
+
+        hasher = self._hasher(upload, start)
+        written = 0
+        renewed = time.monotonic()
+        try:
+            with open(self.path(upload), "r+b") as f:
+                f.seek(start)
+                f.truncate()  # bytes past the offset are from a write that was never recorded
+                while written < length:
+                    block = stream.read(min(READ_BLOCK_BYTES, length - written))
+                    if not block:
+                        break
+                    if time.monotonic() - renewed >= CLAIM_RENEW_SECONDS:
+                        # Checked before writing: a claim lost while the client stalled is not ours to write
+                        if not self.collection.update_one(claim, {"$set": {"writer_ts": time.time()}}).matched_count:
+                            raise UploadError(409, "This chunk was taken over by another request", start)
+                        renewed = time.monotonic()
+                    f.write(block)
+                    hasher.update(block)
+                    written += len(block)
+        finally:
+            offset = start + written
+            recorded = self.collection.update_one(
+                claim,
+                {"$set": {"received": offset, "updated_ts": time.time()}, "$unset": {"writer": "", "writer_ts": ""}}
+            ).matched_count
+            if recorded:
+                self._hashers[upload["_id"]] = (offset, hasher)
+        if not recorded:
+            raise UploadError(409, "This chunk was taken over by another request", start)
+        if written < length:
+            raise UploadError(400, f"Chunk incomplete: received {written} of {length} bytes", offset)
+        return offset
+
+    def complete(self, upload: Dict) -> Tuple[str, str]:
+        """
+        Finish an upload whose bytes have all arrived and remove its record.
+
+        Returns:
+            (path of the file, SHA-256 hex digest of its content)
+
+        Raises:
+            UploadError: If bytes are still missing
+        """
+        upload = self.collection.find_one({"_id": upload["_id"]}) or upload
+        if upload["received"] != upload["size"]:
+            raise UploadError(409, f"Upload incomplete: {upload['received']} of {upload['size']} bytes received",
+                              upload["received"])
+        digest = self._hasher(upload, upload["size"]).hexdigest()
+        # Only one finalize request (in any process) removes the record and gets the file
+        if not self.collection.delete_one({"_id": upload["_id"], "received": upload["size"]}).deleted_count:
+            raise UploadError(404, "Upload not found or already finalized")
+        self._hashers.pop(upload["_id"], None)
+        print(f"[Upload] Completed {upload['_id']}: {upload['filename']} (sha256 {digest[:12]})")
+        return self.path(upload), digest
+
+    def discard(self, upload: Dict):
+        """Delete an upload and its partial file (a chunk still being written then fails to record)."""
+        self.collection.delete_one({"_id": upload["_id"]})
+        self._hashers.pop(upload["_id"], None)
+        try:
+            os.remove(self.path(upload))
+        except OSError:
+            pass
+
+    def expire_stale(self) -> int:
+        """Delete uploads without progress for UPLOAD_EXPIRY_HOURS; returns how many."""
+        cutoff = time.time() - get_upload_expiry_seconds()
+        expired = 0
+        for upload in list(self.collection.find({"updated_ts": {"$lt": cutoff}})):
+            self.discard(upload)
+            expired += 1
+        if expired:
+            print(f"[Upload] Deleted {expired} abandoned upload(s)")
+        return expired
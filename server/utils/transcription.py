@@ -1,16 +1,21 @@
 """
 Transcription Module
-Converts speech to text using OpenAI Whisper
+Converts speech to text using Whisper (openai-whisper or CTranslate2, see transcription_backends)
 """
 
 import os
-import whisper
+import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
-from utils.path_utils import get_whisper_models_dir, is_packaged
+from utils.path_utils import get_whisper_models_dir
+from utils.transcription_backends import create_backend, resolve_backend_name, resolve_precision
 
-_whisper_model = None
-_loaded_size = None
+# Loaded backends keyed by (backend name, model size), least recently used first.
+_backends = OrderedDict()
+# Whisper decoding is not safe to run concurrently on one model instance.
+_model_lock = threading.RLock()
 
 
 def resolve_whisper_model_size() -> str:
@@ -29,95 +34,271 @@ def resolve_whisper_model_size() -> str:
     return "tiny"
 
 
-def load_whisper_model(model_size: str | None = None):
+def resolve_draft_model_size(final_size: str | None = None) -> str | None:
+    """
+    Small model for the fast draft transcript (WHISPER_DRAFT_MODEL_SIZE, e.g. tiny).
+    Returns None when draft-then-refine is disabled or the draft would equal the final model.
+    """
+    env = (os.getenv("WHISPER_DRAFT_MODEL_SIZE") or "").strip().lower()
+    if not env:
+        return None
+    if final_size is None:
+        final_size = resolve_whisper_model_size()
+    return None if env == final_size else env
+
+
+def resolve_batch_size() -> int:
+    """
+    Number of 30-second mel windows encoded together (WHISPER_BATCH_SIZE).
+    1 (default) keeps the backend's own sequential decode loop.
+    """
+    try:
+        return max(1, int((os.getenv("WHISPER_BATCH_SIZE") or "1").strip()))
+    except ValueError:
+        return 1
+
+
+def resolve_max_loaded_models() -> int:
     """
-    Load Whisper model (lazy loading for efficiency).
-    Uses download_root pointing at bundled server/models/whisper for offline-capable packaged builds.
+    How many models a process keeps loaded at once (WHISPER_MAX_LOADED_MODELS, default 2),
+    so jobs alternating between a draft/fast model and the final one do not reload weights.
+    """
+    try:
+        return max(1, int((os.getenv("WHISPER_MAX_LOADED_MODELS") or "2").strip()))
+    except ValueError:
+        return 2
+
+
+def load_whisper_model(model_size: str | None = None):
     """
-    global _whisper_model, _loaded_size
+    Load the Whisper model for the configured backend (lazy loading for efficiency).
+    Weights load from bundled server/models/whisper for offline-capable packaged builds.
 
+    Returns:
+        The loaded TranscriptionBackend
+    """
     if model_size is None:
         model_size = resolve_whisper_model_size()
 
-    if _whisper_model is not None and _loaded_size == model_size:
-        return _whisper_model
-
-    download_root = get_whisper_models_dir()
-    os.makedirs(download_root, exist_ok=True)
+    with _model_lock:
+        return _load_backend_locked(model_size)
 
-    # Offline-capable behavior: in packaged mode, fail fast if model weights are missing.
-    expected_file = Path(download_root) / f"{model_size}.pt"
-    if is_packaged() and not expected_file.is_file():
-        raise FileNotFoundError(
-            f"Whisper model file not found: {expected_file}\n"
-            f"Place the model weights under: {expected_file.parent} (e.g., base.pt or tiny.pt) before building the desktop app.\n"
-            f"You can generate them with: scripts\\download_bundled_assets.py --whisper-only --whisper {model_size}"
-        )
 
-    print(f"[Whisper] Loading model: {model_size}...")
-    print(f"[Whisper] download_root={download_root}")
-    print("[Whisper] Note: first run may download weights if the .pt file is not present yet")
+def _load_backend_locked(model_size: str):
+    key = (resolve_backend_name(), model_size)
+    if key in _backends:
+        _backends.move_to_end(key)
+        return _backends[key]
 
+    print(f"[Whisper] Loading model: {model_size} (backend={key[0]})...")
     try:
-        _whisper_model = whisper.load_model(model_size, download_root=download_root)
-        _loaded_size = model_size
-        print(f"[Whisper] OK: Model '{model_size}' loaded successfully!")
+        backend = create_backend(model_size, key[0])
+        backend.load()
     except Exception as e:
         print(f"[Whisper] ERROR: Error loading model: {str(e)}")
-        _whisper_model = None
-        _loaded_size = None
         raise Exception(f"Failed to load Whisper model: {str(e)}") from e
 
-    return _whisper_model
+    _backends[key] = backend
+    while len(_backends) > resolve_max_loaded_models():
+        evicted_key, _ = _backends.popitem(last=False)
+        print(f"[Whisper] Unloaded model '{evicted_key[1]}' (backend={evicted_key[0]})")
+    print(f"[Whisper] OK: Model '{model_size}' loaded successfully!")
+    return backend
+
+
+def warm_up_transcription(model_size: str | None = None):
+    """
+    Make the model ready before the first job: start the worker processes (which preload
+    their models) or, with WHISPER_WORKERS=0, load the model in this process.
+    """
+    from utils.transcription_service import get_transcription_service, service_enabled
+
+    if service_enabled():
+        get_transcription_service().start()
+    else:
+        load_whisper_model(model_size)
+
 
+def normalize_word(word: str) -> str:
+    """Lower-case a transcript word and strip its punctuation, for comparing words."""
+    return re.sub(r"[^\w']", "", word.lower())
 
-def transcribe_audio(audio_path: str, model_size: str | None = None) -> dict:
+
+def extract_words(transcription: dict) -> list:
+    """Flatten segment word timings into [{"word", "start", "end"}, ...]."""
+    words = []
+    for segment in transcription.get("segments", []):
+        for word_info in segment.get("words", []) or []:
+            word = str(word_info.get("word", "")).strip()
+            if not word:
+                continue
+            words.append({
+                "word": word,
+                "start": float(word_info["start"]),
+                "end": float(word_info["end"]),
+            })
+    return words
+
+
+def transcribe_audio(audio_path: str, model_size: str | None = None, word_timestamps: bool = False,
+                     decode_options: dict | None = None, chunked: bool | None = None,
+                     cancel_event: threading.Event | None = None) -> dict:
     """
     Transcribe audio to text using Whisper.
 
+    Results are served from the on-disk transcription cache when the same decoded audio was
+    already transcribed with the same model and options.
+    Jobs run on the transcription service worker processes unless WHISPER_WORKERS=0.
+    With WHISPER_CHUNKED=1, long recordings are split at silences and the chunks are
+    transcribed concurrently across the workers.
+
     Args:
         audio_path: Path to the audio file
         model_size: Whisper model size (optional; defaults to resolve_whisper_model_size())
+        word_timestamps: Also align words in the same decoding pass
+        decode_options: Backend decoding settings (beam_size, best_of, temperature_fallback),
+            usually from a speed tier (see transcription_tiers); None means greedy decoding
+        chunked: Force chunked transcription on (True) or off (False); None follows WHISPER_CHUNKED
+        cancel_event: Once set, the service jobs are cancelled (decoding in this process runs to the end)
 
     Returns:
-        Dictionary containing text, segments, language
+        Dictionary containing text, segments, language (and "words" when word_timestamps=True)
     """
+    from utils.transcription_service import get_transcription_service, service_enabled
+
     if not os.path.exists(audio_path):
         raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
     if model_size is None:
         model_size = resolve_whisper_model_size()
+    decode_options = dict(decode_options or {})
 
-    try:
-        model = load_whisper_model(model_size)
+    from utils.transcription_chunking import should_chunk, transcribe_chunked, sequential_submitter
+    from utils import transcription_cache
 
-        print(f"Transcribing audio: {audio_path}")
+    chunk = should_chunk(audio_path, force=chunked)
+
+    # Cache lookup happens before any model or worker is touched.
+    cache_key = None
+    if transcription_cache.cache_enabled():
         try:
-            result = model.transcribe(
-                audio_path,
-                language="en",
-                task="transcribe",
-                verbose=False,
-                temperature=0.0,
-                condition_on_previous_text=False,
-                fp16=True,
+            audio_hash = transcription_cache.hash_audio(audio_path)
+            backend_name = resolve_backend_name()
+            options = cache_options(word_timestamps, decode_options, chunk, backend_name)
+            cache_key = transcription_cache.make_cache_key(audio_hash, backend_name, model_size, options)
+            cached = transcription_cache.get_cached(cache_key)
+            if cached is None and not word_timestamps and not decode_options:
+                # A result with word timings is a superset of one without.
+                cached = transcription_cache.get_cached(transcription_cache.make_cache_key(
+                    audio_hash, backend_name, model_size, cache_options(True, None, chunk, backend_name)
+                ))
+            if cached is not None:
+                print(f"[Transcription Cache] Hit for {os.path.basename(audio_path)} (model={model_size})")
+                return cached
+        except Exception as cache_error:
+            print(f"[Transcription Cache] WARNING: Lookup failed, transcribing normally: {cache_error}")
+            cache_key = None
+
+    try:
+        if chunk:
+            if service_enabled():
+                service = get_transcription_service()
+                submit = lambda path: service.submit(
+                    path, model_size=model_size, word_timestamps=word_timestamps, decode_options=decode_options
+                )
+            else:
+                submit = sequential_submitter(
+                    lambda path: transcribe_local(
+                        path, model_size=model_size, word_timestamps=word_timestamps, decode_options=decode_options
+                    )
+                )
+            result = transcribe_chunked(audio_path, submit, cancel_event=cancel_event)
+        elif not service_enabled():
+            result = transcribe_local(
+                audio_path, model_size=model_size, word_timestamps=word_timestamps, decode_options=decode_options
             )
-        except Exception as fp16_error:
-            print(f"[Whisper] fp16 not supported, using default precision: {str(fp16_error)}")
-            result = model.transcribe(
-                audio_path,
-                language="en",
-                task="transcribe",
-                verbose=False,
-                temperature=0.0,
-                condition_on_previous_text=False,
+        else:
+            result = get_transcription_service().transcribe(
+                os.path.abspath(audio_path), model_size=model_size, word_timestamps=word_timestamps,
+                decode_options=decode_options, cancel_event=cancel_event
             )
+    except Exception as e:
+        message = str(e)
+        if message.startswith("Transcription failed:"):
+            raise
+        raise Exception(f"Transcription failed: {message}") from e
+
+    if word_timestamps:
+        result["words"] = extract_words(result)
+    if cache_key is not None:
+        transcription_cache.put_cached(cache_key, result)
+    return result
+
+
+def cache_options(word_timestamps: bool, decode_options: dict | None, chunked: bool, backend_name: str) -> dict:
+    """
+    Everything besides audio, backend and model that changes a transcript, for its cache key:
+    word alignment, the decode path (batched windows or not), decoding settings, chunking
+    (with its split settings) and the model's numeric precision.
+    """
+    from utils.transcription_chunking import get_chunk_settings
+
+    options = {
+        "word_timestamps": word_timestamps,
+        # Same condition as transcribe_local: only greedy jobs without word timings use batched windows.
+        "batched": resolve_batch_size() > 1 and not word_timestamps and not decode_options,
+        "chunked": False,
+        "precision": resolve_precision(backend_name),
+    }
+    if chunked:
+        settings = get_chunk_settings()
+        options["chunked"] = {"seconds": settings["chunk_seconds"], "overlap": settings["overlap_seconds"]}
+    if decode_options:
+        options["decode"] = dict(decode_options)
+    return options
 
-        return {
-            "text": result["text"].strip(),
-            "segments": result.get("segments", []),
-            "language": result.get("language", "en"),
-        }
+
+def transcribe_local(audio_path: str, model_size: str | None = None, word_timestamps: bool = False,
+                     decode_options: dict | None = None) -> dict:
+    """
+    Transcribe audio with a model loaded in the current process.
+    Used by the service worker processes (and directly when the service is disabled).
+    """
+    if not os.path.exists(audio_path):
+        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+    if model_size is None:
+        model_size = resolve_whisper_model_size()
+
+    try:
+        with _model_lock:
+            backend = _load_backend_locked(model_size)
+            print(f"Transcribing audio: {audio_path}")
+            batch_size = resolve_batch_size()
+            # The batched window path is greedy without word alignment; other jobs use the regular decode.
+            if batch_size > 1 and not word_timestamps and not decode_options:
+                return backend.transcribe_batch([audio_path], batch_size)[0]
+            return backend.transcribe(audio_path, word_timestamps=word_timestamps, decode_options=decode_options)
+
+    except Exception as e:
+        raise Exception(f"Transcription failed: {str(e)}") from e
+
+
+def transcribe_batch_local(audio_paths: list, model_size: str | None = None) -> list:
+    """
+    Transcribe several files in one batched pass (windows from all files share encoder batches).
+
+    Returns:
+        One transcription dict per input path, in order
+    """
+    if model_size is None:
+        model_size = resolve_whisper_model_size()
+
+    try:
+        with _model_lock:
+            backend = _load_backend_locked(model_size)
+            print(f"Transcribing {len(audio_paths)} file(s) in one batch")
+            return backend.transcribe_batch(list(audio_paths), resolve_batch_size())
 
     except Exception as e:
         raise Exception(f"Transcription failed: {str(e)}") from e
@@ -126,21 +307,11 @@ def transcribe_audio(audio_path: str, model_size: str | None = None) -> dict:
 def get_transcription_with_timestamps(audio_path: str) -> list:
     """
     Get transcription with word-level timestamps.
+    Prefer transcribe_audio(..., word_timestamps=True)["words"] when the transcript is needed
+    too: it produces both from a single decoding pass.
     """
     try:
-        model = load_whisper_model()
-        result = model.transcribe(audio_path, word_timestamps=True)
-
-        words = []
-        for segment in result.get("segments", []):
-            for word_info in segment.get("words", []):
-                words.append({
-                    "word": word_info["word"].strip(),
-                    "start": word_info["start"],
-                    "end": word_info["end"],
-                })
-
-        return words
+        return transcribe_audio(audio_path, word_timestamps=True)["words"]
 
     except Exception as e:
         raise Exception(f"Failed to get word timestamps: {str(e)}") from e
@@ -0,0 +1,408 @@
+"""
+Transcription Backends
+Pluggable speech-to-text engines behind transcribe_audio.
+
+Every backend returns the same shape: {"text", "segments", "language"}.
+- whisper:     openai-whisper (PyTorch), the original implementation
+- ctranslate2: faster-whisper on CTranslate2 with int8 CPU inference
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.path_utils import get_whisper_models_dir, is_packaged
+
+
+DEFAULT_BACKEND = "whisper"
+BACKEND_ALIASES = {
+    "whisper": "whisper",
+    "openai-whisper": "whisper",
+    "pytorch": "whisper",
+    "ctranslate2": "ctranslate2",
+    "ct2": "ctranslate2",
+    "faster-whisper": "ctranslate2",
+    "faster_whisper": "ctranslate2",
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def resolve_backend_name() -> str:
+    """Backend selected by WHISPER_BACKEND (whisper | ctranslate2); defaults to whisper."""
+    env = (os.getenv("WHISPER_BACKEND") or "").strip().lower()
+    if not env:
+        return DEFAULT_BACKEND
+    if env not in BACKEND_ALIASES:
+        raise ValueError(
+            f"Unknown WHISPER_BACKEND '{env}'. Expected one of: {', '.join(sorted(set(BACKEND_ALIASES.values())))}"
+        )
+    return BACKEND_ALIASES[env]
+
+
+def cpu_quantization_enabled() -> bool:
+    """WHISPER_CPU_QUANTIZE=1 applies dynamic int8 quantization to the PyTorch model's Linear layers."""
+    return (os.getenv("WHISPER_CPU_QUANTIZE") or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def resolve_compute_type() -> str:
+    """CTranslate2 weight/compute precision (WHISPER_COMPUTE_TYPE, default int8)."""
+    return (os.getenv("WHISPER_COMPUTE_TYPE") or "int8").strip().lower()
+
+
+def resolve_precision(backend_name: str) -> str:
+    """Numeric precision a backend decodes with; results of different precisions may differ."""
+    if backend_name == "ctranslate2":
+        return resolve_compute_type()
+    return "int8_dynamic" if cpu_quantization_enabled() else "default"
+
+
+def _apply_cpu_thread_budget():
+    """Pin torch intra-op threads to WHISPER_TORCH_THREADS (set per worker by the transcription service)."""
+    threads = _env_int("WHISPER_TORCH_THREADS", 0)
+    if threads <= 0:
+        return
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        # Only allowed before the first parallel op in the process; harmless to skip otherwise.
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    print(f"[Whisper] CPU thread budget: intra-op={torch.get_num_threads()}")
+
+
+def _quantize_linear_layers(model):
+    """
+    Dynamic int8 quantization of every Linear layer (attention projections and MLPs).
+
+    whisper.model.Linear only overrides forward() to cast weights for fp16; quantize_dynamic
+    only accepts exact nn.Linear, so those modules are swapped for plain nn.Linear first.
+    """
+    import torch
+    import whisper.model
+
+    def _swap(module):
+        for name, child in module.named_children():
+            if isinstance(child, whisper.model.Linear):
+                plain = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+                plain.load_state_dict(child.state_dict())
+                setattr(module, name, plain)
+            else:
+                _swap(child)
+
+    _swap(model)
+    quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    print("[Whisper] Applied dynamic int8 quantization to Linear layers")
+    return quantized
+
+
+def _decoding_kwargs(decode_options: Optional[Dict]) -> Dict:
+    """Map tier decode options onto the keyword arguments both Whisper implementations accept."""
+    from utils.transcription_tiers import TEMPERATURE_FALLBACK
+
+    decode_options = decode_options or {}
+    kwargs = {"temperature": TEMPERATURE_FALLBACK if decode_options.get("temperature_fallback") else 0.0}
+    if decode_options.get("beam_size"):
+        kwargs["beam_size"] = int(decode_options["beam_size"])
+    if decode_options.get("best_of"):
+        kwargs["best_of"] = int(decode_options["best_of"])
+    return kwargs
+
+
+class TranscriptionBackend:
+    """Base class: load weights once, then transcribe files."""
+
+    name = "base"
+
+    def __init__(self, model_size: str):
+        self.model_size = model_size
+        self.model = None
+
+    def load(self):
+        """Load model weights (called once per process)."""
+        raise NotImplementedError
+
+    def transcribe(self, audio_path: str, word_timestamps: bool = False,
+                   decode_options: Optional[Dict] = None) -> Dict:
+        """
+        Transcribe an audio file.
+
+        decode_options may set beam_size, best_of and temperature_fallback (see transcription_tiers);
+        without them decoding is greedy at temperature 0.
+
+        Returns:
+            Dictionary containing text, segments, language.
+            Segments carry a "words" list when word_timestamps=True.
+        """
+        raise NotImplementedError
+
+    def transcribe_batch(self, audio_paths: List[str], batch_size: int) -> List[Dict]:
+        """
+        Transcribe several files. Backends without batched inference decode them one by one.
+
+        Returns:
+            One transcription dict per input path, in order
+        """
+        return [self.transcribe(path) for path in audio_paths]
+
+
+class WhisperBackend(TranscriptionBackend):
+    """openai-whisper on PyTorch (float32 on CPU, fp16 on GPU)."""
+
+    name = "whisper"
+
+    def load(self):
+        import whisper
+
+        download_root = get_whisper_models_dir()
+        os.makedirs(download_root, exist_ok=True)
+
+        # Offline-capable behavior: in packaged mode, fail fast if model weights are missing.
+        expected_file = Path(download_root) / f"{self.model_size}.pt"
+        if is_packaged() and not expected_file.is_file():
+            raise FileNotFoundError(
+                f"Whisper model file not found: {expected_file}\n"
+                f"Place the model weights under: {expected_file.parent} (e.g., base.pt or tiny.pt) before building the desktop app.\n"
+                f"You can generate them with: scripts\\download_bundled_assets.py --whisper-only --whisper {self.model_size}"
+            )
+
+        print(f"[Whisper] download_root={download_root}")
+        print("[Whisper] Note: first run may download weights if the .pt file is not present yet")
+        self.model = whisper.load_model(self.model_size, download_root=download_root)
+
+        if self.model.device.type == "cpu":
+            _apply_cpu_thread_budget()
+            if cpu_quantization_enabled():
+                self.model = _quantize_linear_layers(self.model)
+
+    def transcribe(self, audio_path: str, word_timestamps: bool = False,
+                   decode_options: Optional[Dict] = None) -> Dict:
+        options = {
+            "language": "en",
+            "task": "transcribe",
+            "verbose": False,
+            "condition_on_previous_text": False,
+            "word_timestamps": word_timestamps,
+            **_decoding_kwargs(decode_options),
+        }
+        try:
+            result = self.model.transcribe(audio_path, fp16=True, **options)
+        except Exception as fp16_error:
+            print(f"[Whisper] fp16 not supported, using default precision: {str(fp16_error)}")
+            result = self.model.transcribe(audio_path, **options)
+
+        return {
+            "text": result["text"].strip(),
+            "segments": result.get("segments", []),
+            "language": result.get("language", "en"),
+        }
+
+    def transcribe_batch(self, audio_paths: List[str], batch_size: int) -> List[Dict]:
+        """
+        Batched encoder path: cut every input into fixed 30-second mel windows, run the encoder
+        and greedy decoder on up to batch_size windows at once, then reassemble per file.
+
+        Windows are independent (no seek realignment or previous-text conditioning, which the
+        main path disables anyway), so a word straddling a window edge may be split.
+        """
+        import torch
+        import whisper
+        from whisper.audio import CHUNK_LENGTH, N_SAMPLES, SAMPLE_RATE
+        from whisper.tokenizer import get_tokenizer
+
+        device = self.model.device
+        fp16 = device.type == "cuda"
+        options = whisper.DecodingOptions(
+            language="en",
+            task="transcribe",
+            temperature=0.0,
+            without_timestamps=False,
+            fp16=fp16,
+        )
+        tokenizer = get_tokenizer(self.model.is_multilingual, language="en", task="transcribe")
+
+        # (file index, window index, samples) for every 30s window of every file
+        windows = []
+        for file_index, path in enumerate(audio_paths):
+            audio = whisper.load_audio(path)
+            for window_index, offset in enumerate(range(0, max(len(audio), 1), N_SAMPLES)):
+                windows.append((file_index, window_index, audio[offset: offset + N_SAMPLES]))
+
+        per_file: List[List[Dict]] = [[] for _ in audio_paths]
+        n_mels = getattr(self.model.dims, "n_mels", 80)
+        for start in range(0, len(windows), max(1, batch_size)):
+            batch = windows[start: start + max(1, batch_size)]
+            mel = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(chunk), n_mels=n_mels)
+                for _, _, chunk in batch
+            ]).to(device)
+            results = whisper.decode(self.model, mel, options)
+
+            for (file_index, window_index, chunk), decoded in zip(batch, results):
+                if decoded.no_speech_prob > 0.6 and decoded.avg_logprob < -1.0:
+                    continue
+                offset = window_index * CHUNK_LENGTH
+                window_end = offset + len(chunk) / SAMPLE_RATE
+                for segment in _segments_from_timestamp_tokens(tokenizer, decoded, offset, window_end):
+                    per_file[file_index].append(segment)
+
+        transcriptions = []
+        for segments in per_file:
+            for i, segment in enumerate(segments):
+                segment["id"] = i
+            transcriptions.append({
+                "text": "".join(s["text"] for s in segments).strip(),
+                "segments": segments,
+                "language": "en",
+            })
+        return transcriptions
+
+
+def _segments_from_timestamp_tokens(tokenizer, decoded, offset: float, window_end: float) -> List[Dict]:
+    """Split one decoded window into segments at its <|t|> timestamp token pairs."""
+    timestamp_begin = tokenizer.timestamp_begin
+    segments = []
+    text_tokens: List[int] = []
+    seg_start = None
+
+    def _flush(end_time: float):
+        text = tokenizer.decode(text_tokens)
+        if text.strip():
+            segments.append({
+                "seek": int(offset * 100),
+                "start": round(offset + (seg_start or 0.0), 3),
+                "end": round(min(offset + end_time, window_end), 3),
+                "text": text,
+                "tokens": list(text_tokens),
+                "temperature": decoded.temperature,
+                "avg_logprob": decoded.avg_logprob,
+                "compression_ratio": decoded.compression_ratio,
+                "no_speech_prob": decoded.no_speech_prob,
+            })
+
+    for token in decoded.tokens:
+        if tokenizer.eot <= token < timestamp_begin:
+            continue  # other special tokens carry no text
+        if token >= timestamp_begin:
+            time = (token - timestamp_begin) * 0.02
+            if seg_start is None:
+                seg_start = time
+            elif text_tokens:
+                _flush(time)
+                text_tokens = []
+                seg_start = None
+            else:
+                seg_start = time
+        else:
+            text_tokens.append(token)
+
+    if text_tokens:
+        _flush(window_end - offset)
+    return segments
+
+
+class CTranslate2Backend(TranscriptionBackend):
+    """
+    faster-whisper (CTranslate2) with quantized weights; int8 by default for GPU-less workers.
+
+    Weights are looked up under get_whisper_models_dir()/faster-whisper-<size> first, so packaged
+    offline builds can ship a converted model next to the .pt files.
+    """
+
+    name = "ctranslate2"
+
+    def _local_model_dir(self) -> Path:
+        return Path(get_whisper_models_dir()) / f"faster-whisper-{self.model_size}"
+
+    def load(self):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError(
+                "WHISPER_BACKEND=ctranslate2 requires the faster-whisper package: pip install faster-whisper"
+            ) from e
+
+        compute_type = resolve_compute_type()
+        cpu_threads = _env_int("WHISPER_TORCH_THREADS", 0)
+        download_root = get_whisper_models_dir()
+        os.makedirs(download_root, exist_ok=True)
+
+        local_dir = self._local_model_dir()
+        if (local_dir / "model.bin").is_file():
+            model_ref = str(local_dir)
+        elif is_packaged():
+            raise FileNotFoundError(
+                f"CTranslate2 Whisper model not found: {local_dir}\n"
+                f"Place a converted faster-whisper model (model.bin, config.json, tokenizer.json, vocabulary.*) "
+                f"under that folder before building the desktop app."
+            )
+        else:
+            model_ref = self.model_size
+
+        print(f"[Whisper] CTranslate2 model={model_ref} compute_type={compute_type} cpu_threads={cpu_threads or 'auto'}")
+        self.model = WhisperModel(
+            model_ref,
+            device="cpu",
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            download_root=download_root,
+            local_files_only=is_packaged(),
+        )
+
+    def transcribe(self, audio_path: str, word_timestamps: bool = False,
+                   decode_options: Optional[Dict] = None) -> Dict:
+        kwargs = {"beam_size": 1, **_decoding_kwargs(decode_options)}
+        segments_iter, info = self.model.transcribe(
+            audio_path,
+            language="en",
+            task="transcribe",
+            condition_on_previous_text=False,
+            word_timestamps=word_timestamps,
+            **kwargs,
+        )
+
+        segments: List[Dict] = []
+        for seg in segments_iter:
+            segment = {
+                "id": seg.id,
+                "seek": seg.seek,
+                "start": seg.start,
+                "end": seg.end,
+                "text": seg.text,
+                "tokens": list(seg.tokens),
+                "temperature": seg.temperature,
+                "avg_logprob": seg.avg_logprob,
+                "compression_ratio": seg.compression_ratio,
+                "no_speech_prob": seg.no_speech_prob,
+            }
+            if word_timestamps and seg.words:
+                segment["words"] = [
+                    {"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                    for w in seg.words
+                ]
+            segments.append(segment)
+
+        return {
+            "text": "".join(s["text"] for s in segments).strip(),
+            "segments": segments,
+            "language": getattr(info, "language", None) or "en",
+        }
+
+
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    CTranslate2Backend.name: CTranslate2Backend,
+}
+
+
+def create_backend(model_size: str, backend_name: Optional[str] = None) -> TranscriptionBackend:
+    """Instantiate (but do not load) the configured backend."""
+    name = backend_name or resolve_backend_name()
+    return BACKENDS[name](model_size)
@@ -0,0 +1,151 @@
+"""
+Transcription Cache
+Content-addressed on-disk cache of Whisper results.
+
+Entries are keyed by a hash of the decoded audio samples (not the file bytes or path, so a
+re-extracted temp WAV of the same video hits), the backend, the model size and the decoding
+options. Least-recently-used entries are evicted once the cache exceeds its size budget.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+from utils.path_utils import get_cache_dir
+
+# Bump when the stored result shape or decoding defaults change.
+CACHE_VERSION = 1
+HASH_BLOCK_FRAMES = 16000 * 30
+
+_lock = threading.Lock()
+
+
+def cache_enabled() -> bool:
+    """TRANSCRIPTION_CACHE=0 disables the cache (enabled by default)."""
+    return (os.getenv("TRANSCRIPTION_CACHE") or "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def get_cache_limit_bytes() -> int:
+    try:
+        megabytes = float((os.getenv("TRANSCRIPTION_CACHE_MAX_MB") or "256").strip())
+    except ValueError:
+        megabytes = 256.0
+    return int(max(1.0, megabytes) * 1024 * 1024)
+
+
+def get_transcription_cache_dir() -> str:
+    cache_dir = os.getenv("TRANSCRIPTION_CACHE_DIR") or str(Path(get_cache_dir()).joinpath("transcriptions"))
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def hash_audio(audio_path: str) -> str:
+    """
+    SHA-256 of the decoded PCM samples (plus sample rate and channel count).
+    Falls back to hashing the raw file when it cannot be decoded as audio.
+    """
+    digest = hashlib.sha256()
+    try:
+        import soundfile as sf
+
+        with sf.SoundFile(audio_path) as f:
+            digest.update(f"{f.samplerate}:{f.channels}:".encode())
+            for block in f.blocks(blocksize=HASH_BLOCK_FRAMES, dtype="int16"):
+                digest.update(block.tobytes())
+        return digest.hexdigest()
+    except Exception:
+        digest = hashlib.sha256()
+        with open(audio_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+def make_cache_key(audio_hash: str, backend: str, model_size: str, options: Dict) -> str:
+    payload = json.dumps(
+        {
+            "v": CACHE_VERSION,
+            "audio": audio_hash,
+            "backend": backend,
+            "model": model_size,
+            "options": options,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    return Path(get_transcription_cache_dir()) / f"{key}.json"
+
+
+def get_cached(key: str) -> Optional[Dict]:
+    """Return a cached transcription (and mark it recently used), or None."""
+    path = _entry_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[Transcription Cache] WARNING: Dropping unreadable entry {path.name}: {e}")
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return None
+
+    try:
+        os.utime(path, None)  # LRU: recency is the file mtime
+    except OSError:
+        pass
+    return result
+
+
+def put_cached(key: str, result: Dict):
+    """Store a transcription atomically, then evict old entries beyond the size budget."""
+    path = _entry_path(key)
+    tmp_path = path.with_name(f"{path.stem}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"[Transcription Cache] WARNING: Could not write entry: {e}")
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        return
+    evict_to_limit()
+
+
+def evict_to_limit(limit_bytes: Optional[int] = None):
+    """Delete least-recently-used entries until the cache fits in limit_bytes."""
+    if limit_bytes is None:
+        limit_bytes = get_cache_limit_bytes()
+    with _lock:
+        entries = []
+        for entry in Path(get_transcription_cache_dir()).glob("*.json"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        if total <= limit_bytes:
+            return
+        entries.sort(key=lambda e: e[0])
+        for _, size, entry in entries:
+            if total <= limit_bytes:
+                break
+            try:
+                entry.unlink()
+                total -= size
+            except OSError:
+                pass
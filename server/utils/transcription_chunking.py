@@ -0,0 +1,260 @@
+"""
+Chunked Transcription
+Splits long recordings at silence boundaries and transcribes the chunks concurrently.
+
+Chunks are submitted to the transcription service worker processes, so a 45-minute talk is
+decoded by every worker at once instead of one sequential 30-second window loop. Segments are
+shifted back onto the original timeline and the overlap between neighbouring chunks is removed.
+
+The speed-up comes from the worker count: WHISPER_WORKERS (by default one worker per 4 cores when
+WHISPER_CHUNKED=1), and WHISPER_BATCH_SIZE>1, which encodes a worker's chunks together. One worker
+without batching, or WHISPER_WORKERS=0 (chunks decoded one after another in the calling process),
+gives no speed-up over an unchunked decode.
+"""
+
+import os
+import tempfile
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import soundfile as sf
+
+
+FRAME_SECONDS = 0.03       # energy frame size
+SMOOTH_SECONDS = 0.3       # prefer cutting inside longer pauses
+MAX_OVERLAP_WORDS = 12     # longest repeated word run removed at a chunk seam
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def chunking_enabled() -> bool:
+    """WHISPER_CHUNKED=1 enables chunked transcription for long recordings."""
+    return (os.getenv("WHISPER_CHUNKED") or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_chunk_settings() -> Dict[str, float]:
+    return {
+        "chunk_seconds": max(30.0, _env_float("WHISPER_CHUNK_SECONDS", 120.0)),
+        "min_seconds": _env_float("WHISPER_CHUNK_MIN_SECONDS", 300.0),
+        "overlap_seconds": max(0.0, _env_float("WHISPER_CHUNK_OVERLAP_SECONDS", 1.0)),
+    }
+
+
+def should_chunk(audio_path: str, force: Optional[bool] = None) -> bool:
+    """
+    True if chunking is enabled and the recording is long enough to benefit.
+    force=True/False overrides WHISPER_CHUNKED (used by speed tiers); the length check still applies.
+    """
+    if force is False or (force is None and not chunking_enabled()):
+        return False
+    try:
+        duration = sf.info(audio_path).duration
+    except Exception:
+        return False
+    settings = get_chunk_settings()
+    return duration >= max(settings["min_seconds"], settings["chunk_seconds"] * 1.5)
+
+
+def find_cut_points(samples: np.ndarray, sample_rate: int, chunk_seconds: float) -> List[float]:
+    """
+    Pick chunk boundaries (seconds) near every chunk_seconds, snapped to the quietest
+    point within +/-20% of the nominal boundary.
+    """
+    duration = len(samples) / float(sample_rate)
+    if duration <= chunk_seconds * 1.5:
+        return []
+
+    frame_len = max(1, int(sample_rate * FRAME_SECONDS))
+    n_frames = len(samples) // frame_len
+    frames = samples[: n_frames * frame_len].astype(np.float32).reshape(n_frames, frame_len)
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+    smooth = max(1, int(SMOOTH_SECONDS / FRAME_SECONDS))
+    energy = np.convolve(energy, np.ones(smooth) / smooth, mode="same")
+
+    cuts: List[float] = []
+    search = chunk_seconds * 0.2
+    last_cut = 0.0
+    while duration - last_cut > chunk_seconds * 1.5:
+        nominal = last_cut + chunk_seconds
+        lo = int((nominal - search) / FRAME_SECONDS)
+        hi = min(n_frames, int((nominal + search) / FRAME_SECONDS))
+        if hi <= lo:
+            break
+        best = lo + int(np.argmin(energy[lo:hi]))
+        cut = best * FRAME_SECONDS
+        cuts.append(round(cut, 3))
+        last_cut = cut
+    return cuts
+
+
+def plan_chunks(duration: float, cuts: List[float], overlap_seconds: float) -> List[Dict[str, float]]:
+    """
+    Build chunk windows. Each chunk owns [own_start, own_end) on the original timeline and is
+    decoded from [start, end), which reaches overlap_seconds back into the previous chunk.
+    """
+    bounds = [0.0] + list(cuts) + [duration]
+    chunks = []
+    for i in range(len(bounds) - 1):
+        own_start, own_end = bounds[i], bounds[i + 1]
+        chunks.append({
+            "index": i,
+            "start": max(0.0, own_start - overlap_seconds) if i > 0 else 0.0,
+            "end": own_end,
+            "own_start": own_start,
+            "own_end": own_end,
+        })
+    return chunks
+
+
+def _overlap_length(previous_words: List[str], next_words: List[str]) -> int:
+    """Longest run of words that ends previous_words and starts next_words."""
+    from utils.transcription import normalize_word
+    prev_norm = [normalize_word(w) for w in previous_words[-MAX_OVERLAP_WORDS:]]
+    next_norm = [normalize_word(w) for w in next_words[:MAX_OVERLAP_WORDS]]
+    for size in range(min(len(prev_norm), len(next_norm)), 0, -1):
+        if prev_norm[-size:] == next_norm[:size] and any(prev_norm[-size:]):
+            return size
+    return 0
+
+
+def _shift_segment(segment: Dict, offset: float) -> Dict:
+    shifted = dict(segment)
+    shifted["start"] = round(float(segment.get("start", 0.0)) + offset, 3)
+    shifted["end"] = round(float(segment.get("end", 0.0)) + offset, 3)
+    if segment.get("words"):
+        shifted["words"] = [
+            {**w, "start": round(float(w["start"]) + offset, 3), "end": round(float(w["end"]) + offset, 3)}
+            for w in segment["words"]
+        ]
+    return shifted
+
+
+def stitch_chunk_results(chunks: List[Dict[str, float]], results: List[Dict]) -> Dict:
+    """
+    Merge per-chunk transcriptions into one {text, segments, language} result.
+
+    Timestamps are offset by each chunk's decode start; segments whose midpoint falls outside
+    the chunk's owned range are dropped, and words repeated across a seam are removed once.
+    """
+    merged: List[Dict] = []
+    language = None
+
+    for chunk, result in zip(chunks, results):
+        language = language or result.get("language")
+        for segment in result.get("segments", []):
+            shifted = _shift_segment(segment, chunk["start"])
+            midpoint = (shifted["start"] + shifted["end"]) / 2.0
+            if midpoint < chunk["own_start"] or midpoint >= chunk["own_end"]:
+                continue
+
+            text = shifted.get("text", "")
+            if merged and chunk["index"] > 0 and merged[-1].get("_chunk") != chunk["index"]:
+                # First segment of a new chunk: strip words already emitted at the seam.
+                drop = _overlap_length(merged[-1].get("text", "").split(), text.split())
+                if drop:
+                    text = " " + " ".join(text.split()[drop:])
+                    if shifted.get("words"):
+                        shifted["words"] = shifted["words"][drop:]
+                if not text.strip():
+                    continue
+                shifted["text"] = text
+
+            shifted["_chunk"] = chunk["index"]
+            merged.append(shifted)
+
+    for i, segment in enumerate(merged):
+        segment.pop("_chunk", None)
+        segment["id"] = i
+
+    return {
+        "text": "".join(s.get("text", "") for s in merged).strip(),
+        "segments": merged,
+        "language": language or "en",
+    }
+
+
+def transcribe_chunked(
+    audio_path: str,
+    submit: Callable[[str], "object"],
+    settings: Optional[Dict[str, float]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> Dict:
+    """
+    Transcribe a long recording as concurrent chunks.
+
+    Args:
+        audio_path: Path to a mono WAV file
+        submit: Callable taking a chunk path and returning a Future of its transcription dict
+        settings: Optional overrides for get_chunk_settings()
+        cancel_event: Once set, the chunks still queued or running are cancelled
+
+    Returns:
+        Dictionary containing text, segments, language (plus "chunks" count)
+    """
+    from utils.transcription_service import wait_for_result
+
+    settings = settings or get_chunk_settings()
+    samples, sample_rate = sf.read(audio_path, dtype="float32", always_2d=False)
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    duration = len(samples) / float(sample_rate)
+
+    cuts = find_cut_points(samples, sample_rate, settings["chunk_seconds"])
+    chunks = plan_chunks(duration, cuts, settings["overlap_seconds"])
+    print(f"[Whisper] Chunked transcription: {duration:.1f}s audio -> {len(chunks)} chunk(s) at {cuts}")
+
+    temp_dir = tempfile.gettempdir()
+    tag = uuid.uuid4().hex[:8]
+    chunk_paths: List[str] = []
+    try:
+        futures = []
+        for chunk in chunks:
+            chunk_path = os.path.join(temp_dir, f"whisper_chunk_{tag}_{chunk['index']:03d}.wav")
+            start = int(chunk["start"] * sample_rate)
+            end = int(chunk["end"] * sample_rate)
+            sf.write(chunk_path, samples[start:end], sample_rate, subtype="PCM_16")
+            chunk_paths.append(chunk_path)
+            futures.append(submit(chunk_path))
+
+        try:
+            results = [wait_for_result(future, cancel_event=cancel_event) for future in futures]
+        except BaseException:
+            # Cancelled, or one chunk failed: the others are no longer needed.
+            for future in futures:
+                future.cancel()
+            raise
+    finally:
+        for path in chunk_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    stitched = stitch_chunk_results(chunks, results)
+    stitched["chunks"] = len(chunks)
+    return stitched
+
+
+class _ImmediateFuture:
+    """Minimal Future stand-in for the sequential (service disabled) path."""
+
+    def __init__(self, fn: Callable[[], Dict]):
+        self._fn = fn
+
+    def result(self, timeout: Optional[float] = None) -> Dict:
+        return self._fn()
+
+    def cancel(self) -> bool:
+        return False
+
+
+def sequential_submitter(transcribe_fn: Callable[[str], Dict]) -> Callable[[str], _ImmediateFuture]:
+    """Wrap a blocking transcribe function so it can be used as a transcribe_chunked submitter."""
+    return lambda path: _ImmediateFuture(lambda: transcribe_fn(path))
@@ -0,0 +1,544 @@
+"""
+Transcription Service
+Long-lived Whisper worker processes that each own a loaded model and take jobs from a queue.
+
+Analysis threads never touch a Whisper model directly: they submit jobs here and block on the
+result. Each worker process loads its model once, pins its torch intra-op thread count and
+decodes one job at a time, so concurrent analyses no longer contend for shared decoding state.
+
+Jobs wait in the service and are handed to a worker's own queue only when it has room, so the
+service always knows which jobs a worker holds: those of a worker that dies are retried or failed,
+and a job running longer than WHISPER_JOB_TIMEOUT_SECONDS fails and its worker is restarted. A job
+that expires after it was handed to a worker but before it started keeps its slot until that worker
+reports back: the worker drops payloads past their deadline instead of running them.
+A caller that no longer needs a result cancels its Future: a waiting job is dropped, and a worker
+running nothing but abandoned jobs is restarted.
+"""
+
+import atexit
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional
+
+# Times a job is handed to a worker before a crash before it started fails it
+MAX_JOB_ATTEMPTS = 2
+# Extra time a caller waits beyond the job timeout (the service fails overdue jobs itself)
+RESULT_GRACE_SECONDS = 30.0
+# How often a caller waiting on a job checks its cancel event
+CANCEL_POLL_SECONDS = 0.5
+# Default worker count with chunked transcription: one worker per this many cores, at most the cap
+CORES_PER_CHUNK_WORKER = 4
+MAX_DEFAULT_CHUNK_WORKERS = 4
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def resolve_worker_count() -> int:
+    """
+    Number of Whisper worker processes.
+    - WHISPER_WORKERS=0 disables the service (transcribe in the calling process, serialized by a lock).
+    - Default is a single worker process; with WHISPER_CHUNKED=1 one per CORES_PER_CHUNK_WORKER cores
+      (at most MAX_DEFAULT_CHUNK_WORKERS), since a recording's chunks only decode in parallel on
+      separate workers.
+    """
+    if (os.getenv("WHISPER_WORKERS") or "").strip():
+        return max(0, _env_int("WHISPER_WORKERS", 1))
+    from utils.transcription_chunking import chunking_enabled
+    if chunking_enabled():
+        return max(1, min(MAX_DEFAULT_CHUNK_WORKERS, (os.cpu_count() or 1) // CORES_PER_CHUNK_WORKER))
+    return 1
+
+
+def resolve_torch_threads(workers: Optional[int] = None) -> int:
+    """
+    torch intra-op threads per worker process.
+    - WHISPER_TORCH_THREADS if set.
+    - Else split the machine's cores evenly between workers.
+    The server uses the resource governor's plan instead, which also leaves cores for the analysis workers.
+    """
+    configured = _env_int("WHISPER_TORCH_THREADS", 0)
+    if configured > 0:
+        return configured
+    if workers is None:
+        workers = resolve_worker_count()
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def resolve_job_timeout() -> float:
+    """
+    Longest a transcription job may take, queueing included (WHISPER_JOB_TIMEOUT_SECONDS,
+    default 1800; 0 = no limit). A worker still running an overdue job is restarted.
+    """
+    return max(0.0, _env_float("WHISPER_JOB_TIMEOUT_SECONDS", 1800.0))
+
+
+def _settle(future: Future, result=None, error: Optional[str] = None):
+    """Resolve a job's Future, unless its caller cancelled it in the meantime."""
+    try:
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(Exception(error))
+    except InvalidStateError:
+        pass
+
+
+def wait_for_result(future, timeout: Optional[float] = None, cancel_event: Optional[threading.Event] = None):
+    """
+    Wait for a transcription Future; once cancel_event is set the job is cancelled (see
+    TranscriptionService) and an exception raised instead.
+
+    Raises:
+        concurrent.futures.TimeoutError: If no result arrived within `timeout` seconds
+    """
+    if cancel_event is None:
+        return future.result(timeout=timeout)
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        if cancel_event.is_set():
+            future.cancel()
+            raise Exception("Transcription cancelled")
+        wait = CANCEL_POLL_SECONDS
+        if deadline is not None:
+            wait = min(wait, deadline - time.monotonic())
+            if wait <= 0:
+                raise FutureTimeoutError()
+        try:
+            return future.result(timeout=wait)
+        except FutureTimeoutError:
+            continue
+
+
+def _worker_main(worker_index: int, model_size: Optional[str], torch_threads: int, cores: Optional[List[int]],
+                 job_queue, result_queue):
+    """Worker process entry point: load the model once, then serve jobs from its own queue until a None sentinel."""
+    # Backends that manage their own thread pools (CTranslate2) read the budget from the environment.
+    os.environ["WHISPER_TORCH_THREADS"] = str(torch_threads)
+    from utils.resource_governor import apply_thread_budget
+    apply_thread_budget(torch_threads, cores, f"Whisper Worker {worker_index}", libraries=("torch",))
+    from utils import transcription
+
+    print(f"[Whisper Worker {worker_index}] Started (pid={os.getpid()}, torch_threads={torch_threads})", flush=True)
+    try:
+        transcription.load_whisper_model(model_size)
+    except Exception as e:
+        # Not fatal: the first job retries the load and reports the error to its caller.
+        print(f"[Whisper Worker {worker_index}] WARNING: Model preload failed: {e}", flush=True)
+
+    batch_size = transcription.resolve_batch_size()
+    stop = False
+    while not stop:
+        job = job_queue.get()
+        if job is None:
+            break
+        jobs = [job]
+        # Batched mode: pull the other jobs handed to this worker so their windows share encoder batches.
+        while batch_size > 1 and len(jobs) < batch_size:
+            try:
+                extra = job_queue.get_nowait()
+            except queue.Empty:
+                break
+            if extra is None:
+                stop = True
+                break
+            jobs.append(extra)
+
+        # Jobs that expired while waiting here were already failed by the service: skip them.
+        now = time.time()
+        live = []
+        for job in jobs:
+            if job[5] is not None and now >= job[5]:
+                result_queue.put(("expired", job[0], "Transcription timed out before it started"))
+            else:
+                live.append(job)
+        for job_id, *_ in live:
+            result_queue.put(("started", job_id, worker_index))
+        _run_jobs(transcription, live, result_queue)
+
+    print(f"[Whisper Worker {worker_index}] Stopped", flush=True)
+
+
+def _run_jobs(transcription, jobs, result_queue):
+    """
+    Run a group of jobs, batching greedy jobs that share a model size
+    (word-timestamp and beam-search jobs run alone).
+    """
+    by_options: Dict[tuple, list] = {}
+    for job in jobs:
+        decode_options = job[4] or {}
+        by_options.setdefault((job[2], job[3], tuple(sorted(decode_options.items()))), []).append(job)
+
+    for (model_size, word_timestamps, decode_items), group in by_options.items():
+        decode_options = dict(decode_items)
+        if len(group) > 1 and not word_timestamps and not decode_options:
+            try:
+                results = transcription.transcribe_batch_local([job[1] for job in group], model_size=model_size)
+                for (job_id, *_), result in zip(group, results):
+                    result_queue.put(("done", job_id, result))
+                continue
+            except Exception as e:
+                # One bad file should not fail its batch-mates: retry them individually.
+                print(f"[Whisper Worker] Batch of {len(group)} failed ({e}); retrying jobs individually", flush=True)
+
+        for job_id, audio_path, *_ in group:
+            try:
+                result = transcription.transcribe_local(
+                    audio_path, model_size=model_size, word_timestamps=word_timestamps,
+                    decode_options=decode_options
+                )
+                result_queue.put(("done", job_id, result))
+            except Exception as e:
+                result_queue.put(("error", job_id, str(e)))
+
+
+class TranscriptionService:
+    """Pool of Whisper worker processes; jobs are dispatched to the worker with the fewest in hand."""
+
+    def __init__(self, workers: int = 1, torch_threads: int = 1, model_size: Optional[str] = None,
+                 worker_cores: Optional[List[List[int]]] = None, capacity: Optional[int] = None,
+                 job_timeout: Optional[float] = None):
+        self.workers = max(1, workers)
+        self.torch_threads = max(1, torch_threads)
+        self.model_size = model_size
+        # Cores each worker is pinned to (ANALYSIS_CPU_AFFINITY=1), by worker index
+        self.worker_cores = worker_cores or []
+        # Jobs a worker holds at once: its encoder batch (WHISPER_BATCH_SIZE) when batching
+        self.capacity = capacity
+        self.job_timeout = resolve_job_timeout() if job_timeout is None else max(0.0, job_timeout)
+
+        # Spawn (not fork): torch and the Flask request threads do not survive a fork safely.
+        self._ctx = mp.get_context("spawn")
+        self._result_queue = None
+        self._processes: Dict[int, mp.Process] = {}
+        self._queues: Dict[int, object] = {}   # worker_index -> that worker's job queue
+        self._assigned: Dict[int, set] = {}    # worker_index -> job_ids handed to it
+        self._jobs: Dict[int, Dict] = {}       # job_id -> future, payload, worker, started, attempts, deadline, abandoned
+        self._backlog = deque()                # job_ids not yet handed to a worker
+        self._recycling = set()                # worker indexes terminated for an overdue job, until restarted
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._collector = None
+        self._started = False
+        self._stopping = False
+
+    def start(self):
+        """Spawn worker processes (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            if self.capacity is None:
+                from utils.transcription import resolve_batch_size
+                self.capacity = resolve_batch_size()
+            self.capacity = max(1, self.capacity)
+            self._result_queue = self._ctx.Queue()
+            for index in range(self.workers):
+                self._spawn_worker(index)
+            self._collector = threading.Thread(
+                target=self._collect_results,
+                daemon=True,
+                name="TranscriptionResultCollector"
+            )
+            self._collector.start()
+            self._started = True
+        print(
+            f"[Transcription Service] Started {self.workers} worker(s), "
+            f"torch_threads={self.torch_threads}, model={self.model_size or 'default'}"
+        )
+
+    def _spawn_worker(self, index: int):
+        """Start worker `index` with a fresh job queue (a dead worker's queue may be left locked)."""
+        cores = self.worker_cores[index % len(self.worker_cores)] if self.worker_cores else None
+        job_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self.model_size, self.torch_threads, cores, job_queue, self._result_queue),
+            daemon=True,
+            name=f"WhisperWorker-{index}"
+        )
+        process.start()
+        self._processes[index] = process
+        self._queues[index] = job_queue
+        self._assigned[index] = set()
+        self._recycling.discard(index)
+
+    def submit(self, audio_path: str, model_size: Optional[str] = None, word_timestamps: bool = False,
+               decode_options: Optional[Dict] = None) -> Future:
+        """Queue a transcription job and return a Future resolving to the transcription dict."""
+        self.start()
+        future = Future()
+        with self._lock:
+            if self._collector is None or not self._collector.is_alive():
+                future.set_exception(Exception("Transcription service is not running"))
+                return future
+            job_id = next(self._job_ids)
+            # The worker checks the wall-clock deadline in the payload before running it.
+            expires_at = time.time() + self.job_timeout if self.job_timeout else None
+            self._jobs[job_id] = {
+                "future": future,
+                "payload": (job_id, audio_path, model_size, word_timestamps, decode_options or {}, expires_at),
+                "worker": None,
+                "started": False,
+                "attempts": 0,
+                "deadline": time.monotonic() + self.job_timeout if self.job_timeout else None,
+                "abandoned": False,
+            }
+            self._backlog.append(job_id)
+            self._dispatch_locked()
+        future.add_done_callback(lambda done: self._abandon(job_id) if done.cancelled() else None)
+        return future
+
+    def transcribe(self, audio_path: str, model_size: Optional[str] = None, word_timestamps: bool = False,
+                   decode_options: Optional[Dict] = None, cancel_event: Optional[threading.Event] = None) -> dict:
+        """
+        Blocking helper: submit a job and wait for its result (at most the job timeout).
+        Setting cancel_event cancels the job.
+        """
+        future = self.submit(
+            audio_path, model_size=model_size, word_timestamps=word_timestamps, decode_options=decode_options
+        )
+        timeout = self.job_timeout + RESULT_GRACE_SECONDS if self.job_timeout else None
+        try:
+            return wait_for_result(future, timeout, cancel_event)
+        except FutureTimeoutError:
+            raise Exception(f"Transcription did not finish within {timeout:.0f}s")
+
+    def _dispatch_locked(self):
+        """Hand waiting jobs to live workers with room, fewest jobs in hand first. Caller holds _lock."""
+        while self._backlog and not self._stopping:
+            index = min(
+                (i for i, process in self._processes.items()
+                 if process.is_alive() and i not in self._recycling and len(self._assigned[i]) < self.capacity),
+                key=lambda i: len(self._assigned[i]),
+                default=None
+            )
+            if index is None:
+                return
+            job_id = self._backlog.popleft()
+            job = self._jobs[job_id]
+            job["worker"] = index
+            job["attempts"] += 1
+            self._assigned[index].add(job_id)
+            self._queues[index].put(job["payload"])
+
+    def _collect_results(self):
+        """Route worker results back to their Futures, replace dead workers and fail overdue jobs."""
+        while not self._stopping:
+            try:
+                kind, job_id, payload = self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                kind = None
+            except (EOFError, OSError):
+                break
+            if kind is not None:
+                self._handle_result(kind, job_id, payload)
+            # Every pass, not only when idle: a steady stream of results must not hide a dead worker.
+            self._reap_dead_workers()
+            self._expire_overdue_jobs()
+
+        if not self._stopping:
+            print("[Transcription Service] WARNING: Result queue closed; failing outstanding jobs")
+        self._fail_all("Transcription service stopped")
+
+    def _handle_result(self, kind: str, job_id: int, payload):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return  # failed already
+            if kind == "started":
+                job["started"] = True
+                if job["abandoned"]:
+                    # Expired or cancelled just before it started: stop it rather than let it run.
+                    self._recycle_worker_locked(job["worker"], job_id)
+                return
+            del self._jobs[job_id]
+            self._assigned.get(job["worker"], set()).discard(job_id)
+            self._dispatch_locked()
+        if job["abandoned"]:
+            return  # its caller timed out or cancelled it
+        if kind == "done":
+            _settle(job["future"], payload)
+        else:
+            _settle(job["future"], error=payload)
+
+    def _reap_dead_workers(self):
+        """Restart dead workers; retry their jobs that had not started, fail the ones that had."""
+        failed = []
+        with self._lock:
+            if self._stopping:
+                return
+            for index, process in list(self._processes.items()):
+                if process.is_alive():
+                    continue
+                print(f"[Transcription Service] WARNING: Worker {index} exited (code={process.exitcode}), restarting")
+                retry = []
+                for job_id in sorted(self._assigned.pop(index, set())):
+                    job = self._jobs[job_id]
+                    if job["abandoned"]:
+                        del self._jobs[job_id]  # its caller timed out or cancelled it
+                        continue
+                    if job["started"] or job["attempts"] >= MAX_JOB_ATTEMPTS:
+                        del self._jobs[job_id]
+                        failed.append((job, f"Whisper worker {index} crashed during transcription"))
+                    else:
+                        job["worker"] = None
+                        retry.append(job_id)
+                self._backlog.extendleft(reversed(retry))
+                self._spawn_worker(index)
+            self._dispatch_locked()
+        for job, message in failed:
+            _settle(job["future"], error=message)
+
+    def _abandon(self, job_id: int):
+        """A caller cancelled its Future: drop the job, or stop the worker if it runs only abandoned jobs."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["abandoned"]:
+                return
+            if job["worker"] is None:
+                del self._jobs[job_id]
+                self._backlog.remove(job_id)
+                return
+            job["abandoned"] = True
+            if job["started"]:
+                self._recycle_worker_locked(job["worker"], job_id)
+
+    def _recycle_worker_locked(self, index: int, job_id: int, overran: bool = False):
+        """
+        Terminate a worker running an abandoned job (the reaper restarts it). A job that is merely
+        no longer needed is left to finish while the worker also runs one someone still waits for;
+        one that overran its timeout always stops the worker. Caller holds _lock.
+        """
+        process = self._processes.get(index)
+        if index in self._recycling or process is None or not process.is_alive():
+            return
+        if overran:
+            print(f"[Transcription Service] WARNING: Job {job_id} overran {self.job_timeout:.0f}s; "
+                  f"restarting worker {index}")
+        elif any(self._jobs[other]["started"] and not self._jobs[other]["abandoned"]
+                 for other in self._assigned[index]):
+            return
+        else:
+            print(f"[Transcription Service] Job {job_id} is no longer needed; restarting worker {index}")
+        self._recycling.add(index)
+        process.terminate()
+
+    def _expire_overdue_jobs(self):
+        """
+        Fail jobs past their deadline. A job still waiting in the service is dropped; one handed to a
+        worker keeps its slot until the worker skips it (or is terminated, if it is running it).
+        """
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if job["abandoned"] or job["deadline"] is None or now < job["deadline"]:
+                    continue
+                expired.append(job)
+                if job["worker"] is None:
+                    del self._jobs[job_id]
+                    self._backlog.remove(job_id)
+                    continue
+                job["abandoned"] = True
+                if job["started"]:
+                    self._recycle_worker_locked(job["worker"], job_id, overran=True)
+            self._dispatch_locked()
+        for job in expired:
+            _settle(job["future"], error=f"Transcription timed out after {self.job_timeout:.0f}s")
+
+    def _fail_all(self, message: str):
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+            self._backlog.clear()
+            for assigned in self._assigned.values():
+                assigned.clear()
+        for job in jobs:
+            if not job["future"].done():
+                _settle(job["future"], error=message)
+
+    def stats(self) -> Dict:
+        """Snapshot of worker and queue state."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "torch_threads": self.torch_threads,
+                "alive_workers": sum(1 for p in self._processes.values() if p.is_alive()),
+                "pending_jobs": len(self._jobs),
+                "queued_jobs": len(self._backlog),
+                "running_jobs": sum(1 for job in self._jobs.values() if job["started"]),
+            }
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop workers and fail any jobs still waiting."""
+        with self._lock:
+            if not self._started:
+                return
+            self._stopping = True
+            processes = list(self._processes.items())
+            collector = self._collector
+        for index, _ in processes:
+            try:
+                self._queues[index].put(None)
+            except Exception:
+                pass
+        for _, process in processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        # The collector exits within its poll interval; only then may a restart reuse the flags.
+        if collector is not None and collector is not threading.current_thread():
+            collector.join(timeout)
+        self._fail_all("Transcription service shut down")
+        with self._lock:
+            self._processes.clear()
+            self._queues.clear()
+            self._assigned.clear()
+            self._collector = None
+            self._started = False
+            self._stopping = False
+
+
+# Global instance (one pool per server process)
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_transcription_service() -> TranscriptionService:
+    """Get or create the global transcription service (configured from the environment)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            from utils.resource_governor import get_resource_plan
+            from utils.transcription import resolve_whisper_model_size
+            plan = get_resource_plan()["whisper"]
+            _service = TranscriptionService(
+                workers=max(1, resolve_worker_count()),
+                torch_threads=plan["threads"],
+                model_size=resolve_whisper_model_size(),
+                worker_cores=plan["affinity"],
+            )
+            atexit.register(_service.shutdown)
+        return _service
+
+
+def service_enabled() -> bool:
+    """True when transcription should go through worker processes."""
+    return resolve_worker_count() > 0
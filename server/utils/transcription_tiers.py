@@ -0,0 +1,138 @@
+"""
+Transcription Speed Tiers
+Per-job choice of Whisper model size and decoding settings from audio duration, current load
+and a latency target.
+
+Each tier trades accuracy for speed (model size, beam/best_of, temperature fallback, chunking).
+With TRANSCRIPTION_LATENCY_TARGET_SECONDS set, every job gets the most accurate tier whose
+predicted completion time (its own decode plus the work already queued ahead of it) fits the
+target, so a load spike degrades to faster decoding instead of growing the queue latency.
+Without a target every job uses the "standard" tier, which is the previous fixed behavior.
+"""
+
+import os
+from typing import Dict, Optional
+
+# Ordered most accurate -> fastest. "cost" is decode time relative to the standard tier.
+TIER_ORDER = ["accurate", "standard", "fast"]
+
+TEMPERATURE_FALLBACK = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def get_tiers(final_model_size: Optional[str] = None) -> Dict[str, Dict]:
+    """Tier definitions. None model_size means the configured WHISPER_MODEL_SIZE."""
+    from utils.transcription import resolve_whisper_model_size
+
+    final_model_size = final_model_size or resolve_whisper_model_size()
+    fast_model_size = (os.getenv("WHISPER_FAST_MODEL_SIZE") or "tiny").strip().lower()
+    return {
+        "accurate": {
+            "model_size": final_model_size,
+            "beam_size": 5,
+            "best_of": 5,
+            "temperature_fallback": True,
+            "chunked": False,
+            "cost": 2.5,
+        },
+        "standard": {
+            "model_size": final_model_size,
+            "beam_size": None,
+            "best_of": None,
+            "temperature_fallback": False,
+            "chunked": False,
+            "cost": 1.0,
+        },
+        "fast": {
+            "model_size": fast_model_size,
+            "beam_size": None,
+            "best_of": None,
+            "temperature_fallback": False,
+            "chunked": True,
+            "cost": 0.35 if fast_model_size != final_model_size else 0.9,
+        },
+    }
+
+
+def get_latency_target() -> Optional[float]:
+    """TRANSCRIPTION_LATENCY_TARGET_SECONDS (unset or 0 disables tier selection)."""
+    target = _env_float("TRANSCRIPTION_LATENCY_TARGET_SECONDS", 0.0)
+    return target if target > 0 else None
+
+
+def get_realtime_factor() -> float:
+    """Decode seconds per audio second for the standard tier on one worker (WHISPER_REALTIME_FACTOR)."""
+    return max(0.01, _env_float("WHISPER_REALTIME_FACTOR", 0.25))
+
+
+def decode_options(tier: Dict) -> Dict:
+    """Backend decoding options for a tier (empty for plain greedy decoding)."""
+    options = {}
+    if tier.get("beam_size"):
+        options["beam_size"] = tier["beam_size"]
+    if tier.get("best_of"):
+        options["best_of"] = tier["best_of"]
+    if tier.get("temperature_fallback"):
+        options["temperature_fallback"] = True
+    return options
+
+
+def predict_latency(tier: Dict, duration: float, queue_depth: int, workers: int) -> float:
+    """
+    Predicted seconds until this job's transcript is ready.
+
+    Jobs ahead in the queue are assumed to be about as long as this one and share the workers;
+    a chunked job spreads its own decode over every worker.
+    """
+    workers = max(1, workers)
+    per_job = duration * get_realtime_factor() * tier["cost"]
+    own = per_job / workers if tier["chunked"] else per_job
+    return queue_depth * per_job / workers + own
+
+
+def select_tier(duration: float, queue_depth: int, workers: int = 1,
+                latency_target: Optional[float] = None) -> Dict:
+    """
+    Choose the speed tier for one job.
+
+    Args:
+        duration: Audio duration in seconds
+        queue_depth: Transcription jobs already running or waiting ahead of this one
+        workers: Parallel transcription workers
+        latency_target: Seconds (optional; defaults to get_latency_target())
+
+    Returns:
+        Dictionary with name, model_size, decode_options, chunked, predicted_seconds, reason
+    """
+    tiers = get_tiers()
+    forced = (os.getenv("WHISPER_TIER") or "").strip().lower()
+    if latency_target is None:
+        latency_target = get_latency_target()
+
+    if forced in tiers:
+        name, reason = forced, "WHISPER_TIER"
+    elif latency_target is None or duration <= 0:
+        name, reason = "standard", "default"
+    else:
+        name, reason = TIER_ORDER[-1], "fastest tier (target not reachable)"
+        for candidate in TIER_ORDER:
+            if predict_latency(tiers[candidate], duration, queue_depth, workers) <= latency_target:
+                name, reason = candidate, f"fits {latency_target:.0f}s target"
+                break
+
+    tier = tiers[name]
+    return {
+        "name": name,
+        "model_size": tier["model_size"],
+        "decode_options": decode_options(tier),
+        "chunked": tier["chunked"],
+        "predicted_seconds": round(predict_latency(tier, duration, queue_depth, workers), 1),
+        "queue_depth": queue_depth,
+        "reason": reason,
+    }
@@ -5,14 +5,17 @@ Analyzes video: face presence, posture, gestures, eye contact using OpenCV and M
 
 import cv2
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 from collections import Counter
 import os
 import tempfile
 import subprocess
+import uuid
 from pathlib import Path
 
+from utils.media_probe import probe_media
 from utils.path_utils import resolve_ffmpeg_executable
+from utils.resource_governor import ffmpeg_thread_args
 
 # MediaPipe expects uint8 RGB; OpenCV resize can produce non-contiguous arrays that break some backends.
 def _to_mediapipe_rgb(frame_bgr: np.ndarray) -> np.ndarray:
@@ -75,7 +78,7 @@ def _open_video_capture_with_fallbacks(video_path: str) -> Tuple[Optional[cv2.Vi
 def convert_to_mp4(input_path: str) -> str:
     """Transcode video to a baseline H.264 MP4 so OpenCV can decode reliably.
 
-    Writes a temp file ``{stem}_converted_<pid>.mp4`` (original is never overwritten).
+    Writes a temp file ``{stem}_converted_<pid>_<id>.mp4`` (original is never overwritten).
     Caller must delete the returned path when finished.
 
     Raises:
@@ -83,8 +86,9 @@ def convert_to_mp4(input_path: str) -> str:
     """
     ffmpeg_bin = resolve_ffmpeg_executable()
     stem = Path(input_path).stem
-    # Safe unique name in temp dir; avoids clobbering user files named *_converted.mp4
-    out_path = os.path.join(tempfile.gettempdir(), f"{stem}_converted_{os.getpid()}.mp4")
+    # Safe unique name in temp dir; avoids clobbering user files named *_converted.mp4 and
+    # concurrent analyses of the same (shared, content-addressed) upload
+    out_path = os.path.join(tempfile.gettempdir(), f"{stem}_converted_{os.getpid()}_{uuid.uuid4().hex[:8]}.mp4")
 
     # Note: we drop audio for speed (visual analysis only).
     # Ensure dimensions are even for libx264.
@@ -104,6 +108,7 @@ def convert_to_mp4(input_path: str) -> str:
         "veryfast",
         "-crf",
         "23",
+        *ffmpeg_thread_args(),
         out_path,
     ]
 
@@ -218,7 +223,8 @@ class VideoAnalyzer:
             self.pose = None
             self.hands = None
     
-    def analyze_video(self, video_path: str, sample_rate: int = None, known_duration: float = None) -> Dict:
+    def analyze_video(self, video_path: str, sample_rate: int = None, known_duration: float = None,
+                      cancel_check: Optional[Callable[[], None]] = None) -> Dict:
         """
         Analyze video for presentation metrics.
         
@@ -226,6 +232,7 @@ class VideoAnalyzer:
             video_path: Path to the video file
             sample_rate: Analyze every Nth frame (None = auto-calculate based on duration)
             known_duration: Optional known duration in seconds (from reliable source like FFmpeg)
+            cancel_check: Optional callable invoked for every sampled frame; raises to abort the analysis
         
         Returns:
             Dictionary with video analysis results
@@ -269,7 +276,8 @@ class VideoAnalyzer:
                 if transcoded_path:
                     try:
                         return self.analyze_video(
-                            transcoded_path, sample_rate=sample_rate, known_duration=known_duration
+                            transcoded_path, sample_rate=sample_rate, known_duration=known_duration,
+                            cancel_check=cancel_check
                         )
                     finally:
                         try:
@@ -281,9 +289,16 @@ class VideoAnalyzer:
             )
         _va_log(f"[Video Analyzer] OpenCV backend used: {backend_used}")
         
-        # Get video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        # Get video properties: container metadata (cached media probe), OpenCV's as a fallback
+        media = {}
+        try:
+            media = probe_media(video_path)
+        except Exception as probe_err:
+            _va_log(f"[Video Analyzer] WARNING: Media probe failed, using OpenCV properties: {probe_err}")
+        fps = media.get("fps") or cap.get(cv2.CAP_PROP_FPS)
+        total_frames = media.get("frame_count") or int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if not known_duration:
+            known_duration = media.get("duration")
         
         # Sanitize FPS
         if fps <= 0 or fps > 120:  # Invalid or unreasonable FPS
@@ -360,6 +375,9 @@ class VideoAnalyzer:
                     frame_count += 1
                     continue
                 
+                if cancel_check is not None:
+                    cancel_check()
+                
                 # Downscale frame for faster processing (maintain aspect ratio)
                 original_height, original_width = frame.shape[:2]
                 if original_width > TARGET_WIDTH:
@@ -435,7 +453,8 @@ class VideoAnalyzer:
             if transcoded_path:
                 try:
                     return self.analyze_video(
-                        transcoded_path, sample_rate=sample_rate, known_duration=known_duration
+                        transcoded_path, sample_rate=sample_rate, known_duration=known_duration,
+                        cancel_check=cancel_check
                     )
                 finally:
                     try:
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Standalone Analysis Worker
+Claims analysis jobs from the shared queue and runs them, so analysis compute scales
+independently of the API servers.
+
+Set ANALYSIS_QUEUE_BACKEND on the API server and on every worker:
+  mongo   jobs are kept on the session documents; workers may run on any machine that reaches
+          the database and sees the uploads folder (UPLOAD_FOLDER; a job's video is looked up
+          by file name if its recorded path does not exist on the worker)
+  sqlite  jobs are kept in ANALYSIS_JOB_DB; API and workers run on the same machine
+
+Usage:
+  cd server
+  python worker.py                 # ANALYSIS_MAX_WORKERS analyses at once
+  python worker.py --workers 1     # start several of these to test multi-worker claiming
+
+Ctrl+C (or SIGTERM) stops claiming new jobs and exits once the running analyses finish;
+press Ctrl+C again to abort them (their leases expire and another worker picks them up).
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+
+from dotenv import load_dotenv
+
+from utils.path_utils import get_env_path
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run analysis jobs from the shared queue")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Analyses run at once (default: ANALYSIS_MAX_WORKERS)")
+    args = parser.parse_args()
+
+    if hasattr(sys.stdout, "reconfigure"):
+        try:
+            sys.stdout.reconfigure(line_buffering=True)
+            sys.stderr.reconfigure(line_buffering=True)
+        except Exception:
+            pass
+    load_dotenv(get_env_path())
+
+    from config.database import test_database_connection
+    from utils.job_store import get_queue_backend, is_shared_queue
+    if not is_shared_queue():
+        print("ERROR: Set ANALYSIS_QUEUE_BACKEND=mongo or sqlite (on the API server too) to use standalone workers")
+        return 2
+
+    db_ok, db_message = test_database_connection()
+    if not db_ok:
+        print(f"ERROR: {db_message}")
+        return 1
+    print(f"OK: {db_message}")
+
+    from utils.analysis_manager import get_analysis_manager
+    manager = get_analysis_manager()
+
+    def _stop(signum, frame):
+        print("Stopping: no new jobs will be claimed, waiting for running analyses to finish...")
+        manager.stop_worker()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    signal.signal(signal.SIGINT, _stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, _stop)
+
+    print(f"Analysis worker (pid={os.getpid()}) using the '{get_queue_backend()}' queue")
+    manager.run_worker(args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    # Required for spawned analysis/Whisper processes in the frozen (PyInstaller) build.
+    multiprocessing.freeze_support()
+    raise SystemExit(main())